@@ -0,0 +1,192 @@
+"""
+NumPy による盤面の一括評価
+
+評価関数の学習などで大量の局面を評価するときに、1局面ずつ Board.is_valid_move を呼ぶ代わりに、
+N 局面分のビットボードを uint64 の配列にまとめて合法手・合法手数・石数・パターン特徴を一度に計算する。
+計算内容は bitboard.py / search.py の同名の関数と同じ (1局面ずつ計算した結果と一致する)。
+
+入力は (N, 8, 8) の盤面配列 (Board.board と同じ EMPTY / BLACK_PLAYER / WHITE_PLAYER の値) か、
+手番側 own / 相手側 opp の uint64 配列。numpy が必要。
+
+使い方:
+    python batch_eval.py --positions 100000
+"""
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from bitboard import (
+    BLACK_PLAYER, WHITE_PLAYER, FULL_MASK, INITIAL_BLACK, INITIAL_WHITE, LEFT_SHIFTS, RIGHT_SHIFTS,
+    flips_mask, iter_squares, legal_moves_mask,
+)
+from search import MOBILITY_WEIGHT, SQUARE_WEIGHTS, evaluate as evaluate_one
+
+# --- パターン ---
+# パターンごとのマス番号の並び。特徴は各マスの状態 (0: 空き, 1: 手番側, 2: 相手側) を3進数で並べた番号
+# 対称なパターンで同じ重みを共有できるよう、どれも角に近いマスから順に並べる
+PATTERNS = {
+    "edge_top": tuple(range(0, 8)),
+    "edge_bottom": tuple(range(56, 64)),
+    "edge_left": tuple(range(0, 64, 8)),
+    "edge_right": tuple(range(7, 64, 8)),
+    "corner_a1": (0, 1, 8, 9, 2, 16, 10, 17, 18),
+    "corner_h1": (7, 6, 15, 14, 5, 23, 13, 22, 21),
+    "corner_a8": (56, 57, 48, 49, 58, 40, 50, 41, 42),
+    "corner_h8": (63, 62, 55, 54, 61, 47, 53, 46, 45),
+}
+PATTERN_NAMES = tuple(PATTERNS)
+
+_LEFT_SHIFTS = tuple((np.uint64(s), np.uint64(m)) for s, m in LEFT_SHIFTS)
+_RIGHT_SHIFTS = tuple((np.uint64(s), np.uint64(m)) for s, m in RIGHT_SHIFTS)
+_FULL = np.uint64(FULL_MASK)
+_BIT_VALUES = np.uint64(1) << np.arange(64, dtype=np.uint64)
+_WEIGHTS = np.array(SQUARE_WEIGHTS, dtype=np.int32)
+_POPCOUNT8 = np.array([bin(b).count("1") for b in range(256)], dtype=np.uint8)
+
+
+# --- 変換 ---
+def to_array(masks):
+    """Python の整数 (ビットボード) の列を uint64 配列にする"""
+    return np.fromiter(masks, dtype=np.uint64)
+
+
+def from_grids(grids, player=BLACK_PLAYER):
+    """(N, 8, 8) の盤面配列から (手番側, 相手側) の uint64 配列を作る。player は整数か長さ N の配列"""
+    cells = np.asarray(grids).reshape(-1, 64)
+    black = (cells == BLACK_PLAYER) @ _BIT_VALUES
+    white = (cells == WHITE_PLAYER) @ _BIT_VALUES
+    is_black = np.asarray(player) == BLACK_PLAYER
+    return np.where(is_black, black, white), np.where(is_black, white, black)
+
+
+def unpack_bits(masks):
+    """uint64 配列を (N, 64) の 0/1 配列に展開する (列 i がマス番号 i)"""
+    masks = np.ascontiguousarray(masks, dtype="<u8")
+    return np.unpackbits(masks.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+
+
+def popcount(masks):
+    """uint64 配列の各要素の立っているビット数"""
+    if hasattr(np, "bitwise_count"): # numpy 2.0 以降
+        return np.bitwise_count(masks).astype(np.int32)
+    masks = np.ascontiguousarray(masks, dtype="<u8")
+    return _POPCOUNT8[masks.view(np.uint8).reshape(-1, 8)].sum(axis=1, dtype=np.int32)
+
+
+# --- 一括計算 ---
+def legal_moves(own, opp):
+    """手番側 own の合法手のビットマスク (bitboard.legal_moves_mask の配列版)"""
+    empty = ~(own | opp) & _FULL
+    moves = np.zeros_like(own)
+    for shift, mask in _LEFT_SHIFTS:
+        m = opp & mask
+        t = (own << shift) & m
+        for _ in range(5):
+            t |= (t << shift) & m
+        moves |= (t << shift) & mask & empty
+    for shift, mask in _RIGHT_SHIFTS:
+        m = opp & mask
+        t = (own >> shift) & m
+        for _ in range(5):
+            t |= (t >> shift) & m
+        moves |= (t >> shift) & mask & empty
+    return moves
+
+
+def mobility(own, opp):
+    """(手番側の合法手数, 相手側の合法手数) の int32 配列"""
+    return popcount(legal_moves(own, opp)), popcount(legal_moves(opp, own))
+
+
+def disc_counts(own, opp):
+    """(手番側の石数, 相手側の石数) の int32 配列"""
+    return popcount(own), popcount(opp)
+
+
+def pattern_features(own, opp, names=PATTERN_NAMES):
+    """(N, パターン数) の int32 配列。各列は PATTERNS の3進数の番号"""
+    states = unpack_bits(own).astype(np.int32) + 2 * unpack_bits(opp)
+    columns = []
+    for name in names:
+        squares = PATTERNS[name]
+        powers = 3 ** np.arange(len(squares), dtype=np.int32)
+        columns.append(states[:, squares] @ powers)
+    return np.stack(columns, axis=1)
+
+
+def evaluate(own, opp):
+    """手番側から見た静的評価値 (search.evaluate の配列版)"""
+    weights = (unpack_bits(own).astype(np.int32) - unpack_bits(opp)) @ _WEIGHTS
+    own_mobility, opp_mobility = mobility(own, opp)
+    return weights + MOBILITY_WEIGHT * (own_mobility - opp_mobility)
+
+
+def features(own, opp):
+    """学習用の特徴をまとめて dict で返す"""
+    moves = legal_moves(own, opp)
+    own_discs, opp_discs = disc_counts(own, opp)
+    own_mobility, opp_mobility = mobility(own, opp)
+    return {
+        "legal_moves": moves,
+        "own_discs": own_discs,
+        "opp_discs": opp_discs,
+        "own_mobility": own_mobility,
+        "opp_mobility": opp_mobility,
+        "patterns": pattern_features(own, opp),
+        "evaluation": evaluate(own, opp),
+    }
+
+
+# --- 動作確認とベンチマーク ---
+def random_positions(count, seed=0):
+    """ランダムな対局の途中局面を (手番側, 相手側) の整数のリストで count 個集める"""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        own, opp = INITIAL_BLACK, INITIAL_WHITE
+        while len(positions) < count:
+            moves = legal_moves_mask(own, opp)
+            if not moves:
+                own, opp = opp, own
+                moves = legal_moves_mask(own, opp)
+                if not moves:
+                    break
+            positions.append((own, opp))
+            sq = rng.choice(list(iter_squares(moves)))
+            flips = flips_mask(own, opp, sq)
+            own, opp = opp & ~flips, own | flips | (1 << sq)
+    return positions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="NumPy による盤面の一括評価のベンチマーク")
+    parser.add_argument("--positions", type=int, default=100000, help="評価する局面数")
+    parser.add_argument("--seed", type=int, default=0, help="局面生成の乱数 seed")
+    args = parser.parse_args(argv)
+
+    positions = random_positions(args.positions, args.seed)
+    own = to_array(p[0] for p in positions)
+    opp = to_array(p[1] for p in positions)
+
+    start = time.perf_counter()
+    result = features(own, opp)
+    batch_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [evaluate_one(o, p) for o, p in positions]
+    loop_time = time.perf_counter() - start
+
+    if result["evaluation"].tolist() != expected:
+        print("一括評価の結果が search.evaluate と一致しません")
+        return 1
+    print(f"{len(positions)} 局面")
+    print(f"  一括 (features): {batch_time:.3f} 秒, {len(positions) / batch_time:,.0f} 局面/秒")
+    print(f"  1局面ずつ (evaluate): {loop_time:.3f} 秒, {len(positions) / loop_time:,.0f} 局面/秒")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+"""
+オセロ盤面処理のベンチマーク (perft + マイクロベンチマーク)
+
+- perft: 初期局面から深さ d までの局面数を数え、既知の値と照合する (合法手生成・反転の正しさの確認を兼ねる)
+- マイクロベンチマーク: is_valid_move / get_valid_moves / make_move / update_score と
+  ビットボードの基本演算を、序盤・中盤・終盤の局面で計測する
+
+結果は JSON で出力する。--baseline に以前の結果を渡すと、許容幅を超えて遅くなった項目があれば
+終了コード 1 で終わるので、変更前後の比較に使える。
+
+使い方:
+    python benchmark.py --depth 8 --output bench.json
+    python benchmark.py --baseline bench.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import timeit
+
+from bitboard import (
+    BLACK_PLAYER, WHITE_PLAYER, BitBoard, INITIAL_BLACK, INITIAL_WHITE,
+    flips_mask, iter_squares, legal_moves_mask,
+)
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1") # JSON 出力に pygame のメッセージを混ぜない
+try:
+    from othello_game import Board # リスト版 (pygame が必要)
+except ImportError:
+    Board = None
+
+# 初期局面からの perft の既知の値 (パスも1手と数え、途中で終局した局面は葉として1と数える)
+PERFT_REFERENCE = {
+    1: 4,
+    2: 12,
+    3: 56,
+    4: 244,
+    5: 1396,
+    6: 8200,
+    7: 55092,
+    8: 390216,
+    9: 3005288,
+    10: 24571284,
+    11: 212258800,
+    12: 1939886636,
+}
+
+# マイクロベンチマークに使う局面の手数 (序盤・中盤・終盤)
+SAMPLE_PLIES = (10, 30, 50)
+
+
+def perft(own, opp, depth):
+    """手番側 own の局面から深さ depth の末端局面数を数える"""
+    moves = legal_moves_mask(own, opp)
+    if not moves:
+        if not legal_moves_mask(opp, own):
+            return 1 # 終局
+        return perft(opp, own, depth - 1) if depth > 1 else 1 # パス
+    if depth == 1:
+        return moves.bit_count()
+    nodes = 0
+    for sq in iter_squares(moves):
+        flips = flips_mask(own, opp, sq)
+        nodes += perft(opp & ~flips, own | flips | (1 << sq), depth - 1)
+    return nodes
+
+
+def run_perft(max_depth):
+    results = []
+    for depth in range(1, max_depth + 1):
+        start = time.perf_counter()
+        nodes = perft(INITIAL_BLACK, INITIAL_WHITE, depth)
+        elapsed = time.perf_counter() - start
+        expected = PERFT_REFERENCE.get(depth)
+        results.append({
+            "depth": depth,
+            "nodes": nodes,
+            "expected": expected,
+            "ok": expected is None or nodes == expected,
+            "seconds": elapsed,
+            "nodes_per_second": nodes / elapsed if elapsed > 0 else 0.0,
+        })
+    return results
+
+
+def sample_positions(seed=0):
+    """乱数で対局を進め、SAMPLE_PLIES 手目の局面 (black, white, 手番) を集める"""
+    rng = random.Random(seed)
+    while True:
+        black, white, player = INITIAL_BLACK, INITIAL_WHITE, BLACK_PLAYER
+        positions = {}
+        for ply in range(max(SAMPLE_PLIES) + 1):
+            own, opp = (black, white) if player == BLACK_PLAYER else (white, black)
+            moves = legal_moves_mask(own, opp)
+            if not moves:
+                player = WHITE_PLAYER if player == BLACK_PLAYER else BLACK_PLAYER
+                own, opp = opp, own
+                moves = legal_moves_mask(own, opp)
+                if not moves:
+                    break
+            if ply in SAMPLE_PLIES:
+                positions[ply] = (black, white, player)
+            sq = rng.choice(list(iter_squares(moves)))
+            flips = flips_mask(own, opp, sq)
+            own, opp = own | flips | (1 << sq), opp & ~flips
+            black, white = (own, opp) if player == BLACK_PLAYER else (opp, own)
+            player = WHITE_PLAYER if player == BLACK_PLAYER else BLACK_PLAYER
+        if len(positions) == len(SAMPLE_PLIES):
+            return positions
+
+
+def _time_per_call(func, min_time=0.2):
+    """func 1回あたりの平均時間 (マイクロ秒)。3回計測した最小値を使う"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    return min(timer.repeat(repeat=3, number=number)) / number * 1e6
+
+
+def _bench_board(name, make_board, black, white, player):
+    """Board API (リスト版 / ビットボード版) の各メソッドを計測する"""
+    board = make_board(black, white)
+    moves = board.get_valid_moves(player)
+    row, col = next(iter(moves))
+    flips = moves[(row, col)]
+    grid_squares = [(r, c) for r in range(8) for c in range(8)]
+
+    def get_valid_moves_cold():
+        board.invalidate_cache()
+        board.get_valid_moves(player)
+
+    def make_move(number=2000, repeat=3):
+        # 1つの盤面には1回しか打てないので、盤面をあらかじめ用意してから計測する
+        best = float("inf")
+        for _ in range(repeat):
+            boards = [make_board(black, white) for _ in range(number)]
+            start = time.perf_counter()
+            for b in boards:
+                b.make_move(player, row, col, flips)
+            best = min(best, time.perf_counter() - start)
+        return best / number * 1e6
+
+    return {
+        f"{name}.is_valid_move[64]": _time_per_call(
+            lambda: [board.is_valid_move(player, r, c) for r, c in grid_squares]),
+        f"{name}.get_valid_moves[cold]": _time_per_call(get_valid_moves_cold),
+        f"{name}.get_valid_moves[cached]": _time_per_call(lambda: board.get_valid_moves(player)),
+        f"{name}.make_move": make_move(),
+        f"{name}.update_score": _time_per_call(board.update_score),
+    }
+
+
+def _make_list_board(black, white):
+    board = Board()
+    board.board = BitBoard(black, white).to_grid()
+    board.update_score()
+    board.invalidate_cache()
+    return board
+
+
+def run_micro(positions):
+    results = {}
+    for ply, (black, white, player) in sorted(positions.items()):
+        own, opp = (black, white) if player == BLACK_PLAYER else (white, black)
+        moves = legal_moves_mask(own, opp)
+        squares = list(iter_squares(moves))
+        entries = {
+            "bitboard.legal_moves_mask": _time_per_call(lambda: legal_moves_mask(own, opp)),
+            "bitboard.flips_mask[all legal]": _time_per_call(
+                lambda: [flips_mask(own, opp, sq) for sq in squares]),
+        }
+        entries.update(_bench_board("BitBoard", BitBoard, black, white, player))
+        if Board is not None:
+            entries.update(_bench_board("Board", _make_list_board, black, white, player))
+        for key, us in entries.items():
+            results[f"ply{ply}/{key}"] = round(us, 3)
+    return results
+
+
+def compare(results, baseline, tolerance, min_us=1.0):
+    """baseline より (1 + tolerance) 倍を超えて遅くなった項目のリストを返す (min_us 未満の項目は誤差が大きいので除く)"""
+    regressions = []
+    for key, us in results["micro_us"].items():
+        base = baseline.get("micro_us", {}).get(key)
+        if base and base >= min_us and us > base * (1 + tolerance):
+            regressions.append({"name": key, "baseline_us": base, "current_us": us})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="オセロ盤面処理のベンチマーク")
+    parser.add_argument("--depth", type=int, default=8, help="perft の最大深さ (既定: 8)")
+    parser.add_argument("--skip-micro", action="store_true", help="マイクロベンチマークを省略する")
+    parser.add_argument("--output", help="結果の JSON の出力先 (省略時は標準出力)")
+    parser.add_argument("--baseline", help="比較対象の以前の結果 (JSON)")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="遅くなったとみなす割合 (既定: 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "list_board": Board is not None,
+        "perft": run_perft(args.depth),
+        "micro_us": {} if args.skip_micro else run_micro(sample_positions()),
+    }
+    failed = [p["depth"] for p in results["perft"] if not p["ok"]]
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            results["regressions"] = compare(results, json.load(f), args.tolerance)
+
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if failed:
+        print(f"perft の値が一致しません: depth {failed}", file=sys.stderr)
+    for reg in results.get("regressions", []):
+        print(f"遅くなっています: {reg['name']} {reg['baseline_us']:.2f}us -> {reg['current_us']:.2f}us",
+              file=sys.stderr)
+    return 1 if failed or results.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""
+ビットボード版オセロ盤面
+
+黒石・白石をそれぞれ 64bit 整数で持ち、シフトとマスクで合法手生成・反転計算を、
+ポップカウントでスコア計算を行う。othello_game.py の Board と同じメソッド名
+(is_valid_move / get_valid_moves / make_move / update_score / get_score) を持つので、
+OthelloGame からそのまま差し替えて使える。
+
+pygame に依存しないので、ヘッドレスの対局シミュレーションや AI 探索からも利用できる。
+
+マス番号: sq = row * 8 + col (左上 a1 が 0、右下 h8 が 63)
+"""
+
+# --- 定数 (othello_game.py と同じ値) ---
+ROWS, COLS = 8, 8
+EMPTY = 0
+BLACK_PLAYER = 1
+WHITE_PLAYER = 2
+
+FULL_MASK = 0xFFFFFFFFFFFFFFFF
+NOT_A_FILE = 0xFEFEFEFEFEFEFEFE # 左端の列 (col 0) を除いたマスク
+NOT_H_FILE = 0x7F7F7F7F7F7F7F7F # 右端の列 (col 7) を除いたマスク
+
+# 8方向のシフト量と、はみ出し防止マスク
+# 左シフト: 右(+1) / 下(+8) / 右下(+9) / 左下(+7)
+LEFT_SHIFTS = ((1, NOT_A_FILE), (8, FULL_MASK), (9, NOT_A_FILE), (7, NOT_H_FILE))
+# 右シフト: 左(-1) / 上(-8) / 左上(-9) / 右上(-7)
+RIGHT_SHIFTS = ((1, NOT_H_FILE), (8, FULL_MASK), (9, NOT_H_FILE), (7, NOT_A_FILE))
+
+# 初期配置 (d4, e5 が白 / e4, d5 が黒)
+INITIAL_BLACK = (1 << (3 * 8 + 4)) | (1 << (4 * 8 + 3))
+INITIAL_WHITE = (1 << (3 * 8 + 3)) | (1 << (4 * 8 + 4))
+
+
+def opponent_of(player):
+    """相手プレイヤーを返す"""
+    return WHITE_PLAYER if player == BLACK_PLAYER else BLACK_PLAYER
+
+
+def legal_moves_mask(own, opp):
+    """手番側 own が打てるマスのビットマスクを返す"""
+    empty = ~(own | opp) & FULL_MASK
+    moves = 0
+    for shift, mask in LEFT_SHIFTS:
+        m = opp & mask
+        t = (own << shift) & m
+        t |= (t << shift) & m
+        t |= (t << shift) & m
+        t |= (t << shift) & m
+        t |= (t << shift) & m
+        t |= (t << shift) & m
+        moves |= (t << shift) & mask & empty
+    for shift, mask in RIGHT_SHIFTS:
+        m = opp & mask
+        t = (own >> shift) & m
+        t |= (t >> shift) & m
+        t |= (t >> shift) & m
+        t |= (t >> shift) & m
+        t |= (t >> shift) & m
+        t |= (t >> shift) & m
+        moves |= (t >> shift) & mask & empty
+    return moves
+
+
+def _build_rays():
+    """マスごとに、8方向それぞれの (盤端までの) 直線上のマスのビットマスクを作る"""
+    rays_up, rays_down = [], []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        up, down = [], []
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1), (0, -1), (-1, 0), (-1, -1), (-1, 1)):
+            ray = 0
+            r, c = row + dr, col + dc
+            while 0 <= r < ROWS and 0 <= c < COLS:
+                ray |= 1 << (r * 8 + c)
+                r += dr
+                c += dc
+            if ray:
+                # マス番号が増える方向と減る方向で、最初にぶつかる石の求め方が違うので分けておく
+                (up if dr * 8 + dc > 0 else down).append(ray)
+        rays_up.append(tuple(up))
+        rays_down.append(tuple(down))
+    return rays_up, rays_down
+
+
+RAYS_UP, RAYS_DOWN = _build_rays()
+
+
+def flips_mask(own, opp, sq):
+    """sq に打ったときにひっくり返る相手の石のビットマスクを返す (打てなければ 0)"""
+    if (own | opp) >> sq & 1:
+        return 0
+    flips = 0
+    not_opp = ~opp
+    for ray in RAYS_UP[sq]:
+        # 相手の石以外で最初にぶつかるマス (= ray 上で最下位のビット) が自分の石なら、その手前まで返る
+        blockers = ray & not_opp
+        first = blockers & -blockers
+        if first & own:
+            flips |= ray & (first - 1)
+    for ray in RAYS_DOWN[sq]:
+        # マス番号が減る方向では、最初にぶつかるマスは ray 上で最上位のビット
+        blockers = ray & not_opp
+        if blockers:
+            first = 1 << (blockers.bit_length() - 1)
+            if first & own:
+                flips |= ray & ~((first << 1) - 1)
+    return flips
+
+
+def iter_squares(mask):
+    """ビットマスクに含まれるマス番号を小さい順に返すジェネレータ"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def popcount(mask):
+    """立っているビット数を返す"""
+    return mask.bit_count()
+
+
+def square_to_notation(sq):
+    """マス番号を棋譜表記 (例: 'f5') に変換"""
+    return "abcdefgh"[sq & 7] + str((sq >> 3) + 1)
+
+
+def notation_to_square(text):
+    """棋譜表記 (例: 'f5' / 'F5') をマス番号に変換"""
+    col = "abcdefgh".index(text[0].lower())
+    row = int(text[1]) - 1
+    if not (0 <= row < ROWS):
+        raise ValueError(f"不正なマス表記です: {text}")
+    return row * 8 + col
+
+
+# --- ビットボード盤面クラス ---
+class BitBoard:
+    def __init__(self, black=INITIAL_BLACK, white=INITIAL_WHITE):
+        self.black = black
+        self.white = white
+        self._moves_cache = {} # { player: (black, white, valid_moves) }
+        self.update_score()
+
+    def invalidate_cache(self):
+        """有効な手のキャッシュを破棄する"""
+        self._moves_cache = {}
+
+    @classmethod
+    def from_grid(cls, grid):
+        """Board.board 形式 (8x8 のリスト) からビットボードを作る"""
+        black = white = 0
+        for r in range(ROWS):
+            for c in range(COLS):
+                if grid[r][c] == BLACK_PLAYER:
+                    black |= 1 << (r * 8 + c)
+                elif grid[r][c] == WHITE_PLAYER:
+                    white |= 1 << (r * 8 + c)
+        return cls(black, white)
+
+    def copy(self):
+        return self.__class__(self.black, self.white)
+
+    def to_grid(self):
+        """8x8 のリスト (Board.board と同じ形式) に変換"""
+        grid = [[EMPTY for _ in range(COLS)] for _ in range(ROWS)]
+        for sq in iter_squares(self.black):
+            grid[sq >> 3][sq & 7] = BLACK_PLAYER
+        for sq in iter_squares(self.white):
+            grid[sq >> 3][sq & 7] = WHITE_PLAYER
+        return grid
+
+    @property
+    def board(self):
+        """Board.board 互換の 8x8 リスト (参照のたびに生成するので描画ループでの多用は避ける)"""
+        return self.to_grid()
+
+    def discs(self, player):
+        """(手番側, 相手側) のビットマスクを返す"""
+        if player == BLACK_PLAYER:
+            return self.black, self.white
+        return self.white, self.black
+
+    def empties(self):
+        return ~(self.black | self.white) & FULL_MASK
+
+    def legal_moves(self, player):
+        """player の合法手のビットマスク"""
+        own, opp = self.discs(player)
+        return legal_moves_mask(own, opp)
+
+    def is_valid_move(self, player, row, col):
+        """(row, col) が player にとって有効な手か判定し、ひっくり返せる石のリストを返す"""
+        if not (0 <= row < ROWS and 0 <= col < COLS):
+            return []
+        own, opp = self.discs(player)
+        flips = flips_mask(own, opp, row * 8 + col)
+        return [(sq >> 3, sq & 7) for sq in iter_squares(flips)]
+
+    def get_valid_moves(self, player):
+        """player が打てる全ての有効な手を { (row, col): [flip_list], ... } で返す (同じ局面なら前回の結果を使う)"""
+        cached = self._moves_cache.get(player)
+        if cached is not None and cached[0] == self.black and cached[1] == self.white:
+            return dict(cached[2])
+        own, opp = self.discs(player)
+        valid_moves = {}
+        for sq in iter_squares(legal_moves_mask(own, opp)):
+            flips = flips_mask(own, opp, sq)
+            valid_moves[(sq >> 3, sq & 7)] = [(f >> 3, f & 7) for f in iter_squares(flips)]
+        self._moves_cache[player] = (self.black, self.white, valid_moves)
+        return dict(valid_moves)
+
+    def play(self, player, sq, flips=None):
+        """sq に player の石を置いてビットマスク flips の石を返す (flips 省略時は計算する)"""
+        own, opp = self.discs(player)
+        if flips is None:
+            flips = flips_mask(own, opp, sq)
+        own |= flips | (1 << sq)
+        opp &= ~flips
+        # スコアは置いた石と返した石の数だけ増減させる
+        flipped = flips.bit_count()
+        if player == BLACK_PLAYER:
+            self.black, self.white = own, opp
+            self.black_score += flipped + 1
+            self.white_score -= flipped
+        else:
+            self.white, self.black = own, opp
+            self.white_score += flipped + 1
+            self.black_score -= flipped
+        return flips
+
+    def make_move(self, player, row, col, tiles_to_flip):
+        """石を置き、指定された石をひっくり返す (Board.make_move 互換)"""
+        sq = row * 8 + col
+        if not tiles_to_flip and (self.black | self.white) & (1 << sq):
+            print(f"エラー: 無効な手が make_move に渡されました: ({row}, {col})")
+            return False
+
+        flips = 0
+        for r_flip, c_flip in tiles_to_flip:
+            flips |= 1 << (r_flip * 8 + c_flip)
+        self.play(player, sq, flips)
+        return True
+
+    def update_score(self):
+        """現在のスコアをポップカウントで更新"""
+        self.black_score = self.black.bit_count()
+        self.white_score = self.white.bit_count()
+
+    def get_score(self):
+        return self.black_score, self.white_score
@@ -0,0 +1,247 @@
+"""
+オセロの定石ブック
+
+序盤の局面と、その局面で打たれた手の統計 (打たれた回数・その後の最終石差) を記録しておき、
+序盤は探索の代わりにブックから手を選ぶ。
+
+- 局面は盤面の8通りの対称 (回転・反転) のうち最小のものに正規化し、Zobrist ハッシュをキーにする
+- ファイルはキー順に並べた固定長レコードのバイナリで、起動時に mmap して二分探索する
+  (ブック全体を Python のオブジェクトとして読み込まない)
+
+ファイル形式 (リトルエンディアン):
+    ヘッダ: マジック b"OTHBOOK1" / レコード数 (uint32) / 登録した手数 (uint32)
+    レコード: キー (uint64) / 手 (uint8, 正規化した向きでのマス番号) / 打たれた回数 (uint32) /
+              手番側から見た最終石差の合計 (int32)
+
+使い方:
+    python book.py build games.jsonl records.txt --plies 15 --output book.bin
+    python book.py probe book.bin f5d6c3
+"""
+import argparse
+import mmap
+import struct
+import sys
+
+from bitboard import (
+    BLACK_PLAYER, INITIAL_BLACK, INITIAL_WHITE, flips_mask, legal_moves_mask, opponent_of,
+    square_to_notation,
+)
+from record import parse_moves, read_records
+from search import position_hash
+
+MAGIC = b"OTHBOOK1"
+HEADER = struct.Struct("<8sII")
+RECORD = struct.Struct("<QBxxxIi")
+DEFAULT_PLIES = 15 # ブックに登録する手数 (初手から数えて)
+
+
+# --- 盤面の対称変換 ---
+_REVERSED_BYTES = bytes(int(f"{b:08b}"[::-1], 2) for b in range(256))
+
+
+def flip_vertical(x):
+    """上下反転 (row -> 7 - row)"""
+    return int.from_bytes(x.to_bytes(8, "little"), "big")
+
+
+def mirror_horizontal(x):
+    """左右反転 (col -> 7 - col)"""
+    return int.from_bytes(x.to_bytes(8, "little").translate(_REVERSED_BYTES), "little")
+
+
+def transpose(x):
+    """a1-h8 の対角線で反転 ((row, col) -> (col, row))"""
+    t = 0x0F0F0F0F00000000 & (x ^ (x << 28))
+    x ^= t ^ (t >> 28)
+    t = 0x3333000033330000 & (x ^ (x << 14))
+    x ^= t ^ (t >> 14)
+    t = 0x5500550055005500 & (x ^ (x << 7))
+    x ^= t ^ (t >> 7)
+    return x
+
+
+def symmetry(x, index):
+    """8通りの対称変換の index 番目を適用する (bit2: 対角, bit1: 左右, bit0: 上下 の順に適用)"""
+    if index & 4:
+        x = transpose(x)
+    if index & 2:
+        x = mirror_horizontal(x)
+    if index & 1:
+        x = flip_vertical(x)
+    return x
+
+
+def inverse_symmetry(x, index):
+    """symmetry(x, index) の逆変換"""
+    if index & 1:
+        x = flip_vertical(x)
+    if index & 2:
+        x = mirror_horizontal(x)
+    if index & 4:
+        x = transpose(x)
+    return x
+
+
+def canonical(own, opp):
+    """対称な8局面のうち (own, opp) が最小のものを選び、(キー, 使った変換の番号) を返す"""
+    best = None
+    best_index = 0
+    for index in range(8):
+        candidate = (symmetry(own, index), symmetry(opp, index))
+        if best is None or candidate < best:
+            best = candidate
+            best_index = index
+    return position_hash(*best), best_index
+
+
+# --- 棋譜の読み込みと再生 ---
+def read_games(path):
+    """棋譜ファイル (record.py が読める形式) から着手のリストを順に返す"""
+    for record in read_records(path):
+        yield record.moves
+
+
+def replay(moves):
+    """着手のリストを初期局面から再生し、着手ごとに (手番側, 相手側, 手番, 着手) を返す。
+    パスは自動で補う。最後に最終局面を (手番側, 相手側, 手番, None) で返す"""
+    own, opp, player = INITIAL_BLACK, INITIAL_WHITE, BLACK_PLAYER
+    for sq in moves:
+        if not legal_moves_mask(own, opp):
+            own, opp, player = opp, own, opponent_of(player) # パス
+        flips = flips_mask(own, opp, sq)
+        if not flips:
+            raise ValueError(f"不正な手です: {square_to_notation(sq)}")
+        yield own, opp, player, sq
+        own, opp, player = opp & ~flips, own | flips | (1 << sq), opponent_of(player)
+    if not legal_moves_mask(own, opp) and legal_moves_mask(opp, own):
+        own, opp, player = opp, own, opponent_of(player) # パス
+    yield own, opp, player, None
+
+
+# --- ブックの作成 ---
+def collect(games, plies=DEFAULT_PLIES):
+    """対局 (着手のリスト) の最初の plies 手から { (キー, 正規化した手): [回数, 石差の合計] } を集計する"""
+    stats = {}
+    for moves in games:
+        steps = list(replay(moves))
+        own, opp, player, _ = steps.pop()
+        black_diff = own.bit_count() - opp.bit_count()
+        if player != BLACK_PLAYER:
+            black_diff = -black_diff
+        for own, opp, player, sq in steps[:plies]:
+            key, index = canonical(own, opp)
+            move = symmetry(1 << sq, index).bit_length() - 1
+            entry = stats.setdefault((key, move), [0, 0])
+            entry[0] += 1
+            entry[1] += black_diff if player == BLACK_PLAYER else -black_diff
+    return stats
+
+
+def write_book(path, stats, plies=DEFAULT_PLIES, min_games=1):
+    """集計結果をキー順に並べてファイルに書き出し、書き出したレコード数を返す"""
+    items = sorted((key, move, count, total) for (key, move), (count, total) in stats.items()
+                   if count >= min_games)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(items), plies))
+        for item in items:
+            f.write(RECORD.pack(*item))
+    return len(items)
+
+
+# --- ブックの参照 ---
+class OpeningBook:
+    """mmap したブックファイルを二分探索で引く"""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError: # 空のファイルは mmap できない
+            self._file.close()
+            raise ValueError(f"ブックファイルが空です: {path}")
+        magic, self.count, self.plies = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or len(self._map) != HEADER.size + self.count * RECORD.size:
+            self.close()
+            raise ValueError(f"ブックファイルの形式が正しくありません: {path}")
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        return self.count
+
+    def _key_at(self, i):
+        return struct.unpack_from("<Q", self._map, HEADER.size + i * RECORD.size)[0]
+
+    def _first_index(self, key):
+        """key 以上の最初のレコードの番号 (二分探索)"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def lookup(self, own, opp):
+        """手番側 own の局面の候補手を [(マス番号, 回数, 平均石差), ...] で返す (実際の盤面の向きで)"""
+        key, index = canonical(own, opp)
+        candidates = []
+        i = self._first_index(key)
+        while i < self.count:
+            rec_key, move, count, total = RECORD.unpack_from(self._map, HEADER.size + i * RECORD.size)
+            if rec_key != key:
+                break
+            sq = inverse_symmetry(1 << move, index).bit_length() - 1
+            if legal_moves_mask(own, opp) >> sq & 1: # ハッシュの衝突に備えて合法手か確かめる
+                candidates.append((sq, count, total / count))
+            i += 1
+        return candidates
+
+    def best_move(self, own, opp, min_games=1):
+        """平均石差が最も良い手のマス番号 (min_games 回以上打たれた手に限る)。なければ None"""
+        candidates = [c for c in self.lookup(own, opp) if c[1] >= min_games]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda c: (c[2], c[1]))[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="オセロの定石ブックの作成と参照")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="棋譜からブックを作る")
+    build.add_argument("games", nargs="+", help="棋譜ファイル (record.py の形式か simulate.py の JSON Lines)")
+    build.add_argument("--plies", type=int, default=DEFAULT_PLIES, help="登録する手数")
+    build.add_argument("--min-games", type=int, default=2, help="この回数以上打たれた手だけ登録する")
+    build.add_argument("--output", required=True, help="出力するブックファイル")
+
+    probe = sub.add_parser("probe", help="棋譜の局面の候補手を表示する")
+    probe.add_argument("book", help="ブックファイル")
+    probe.add_argument("moves", nargs="?", default="", help="初期局面からの着手 (例: f5d6c3)")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        games = (moves for path in args.games for moves in read_games(path))
+        stats = collect(games, args.plies)
+        count = write_book(args.output, stats, args.plies, args.min_games)
+        print(f"{args.output}: {count} レコード ({len(stats)} 件中)")
+        return 0
+
+    book = OpeningBook(args.book)
+    try:
+        *_, (own, opp, _, _) = replay(parse_moves(args.moves))
+        candidates = sorted(book.lookup(own, opp), key=lambda c: -c[1])
+        if not candidates:
+            print("ブックに登録されていない局面です")
+        for sq, count, mean in candidates:
+            print(f"{square_to_notation(sq)}  {count:8d} 回  平均石差 {mean:+.2f}")
+    finally:
+        book.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+"""
+オセロの終盤完全読み (空きマス 20 以下を想定)
+
+終局までの全ての手を読み、双方が最善を尽くしたときの最終石差と最善手を求める。
+- 空きマスの多い局面: 置換表 + 偶数理論 (空きマスが奇数個の領域を優先) + 相手の合法手が少ない順の手の並べ替え
+- 空きマスが少ない局面 (SMALL_EMPTIES 以下): 合法手生成を使わず、空きマスのリストを直接試す専用ルーチン
+
+石差は「手番側の石数 - 相手の石数」で、終局時に残った空きマスは勝った側に加える。
+
+使い方 (ファイルの局面をまとめて解く):
+    python endgame.py positions.txt --workers 4
+
+局面ファイルは1行1局面で、64文字の盤面 (X/B/* = 黒, O/W = 白, -/. = 空き。a1, b1, ... h8 の順) と
+手番 (X/B = 黒, O/W = 白) を空白で区切って書く。# 以降はコメント。
+"""
+import argparse
+import multiprocessing
+import sys
+import time
+
+from bitboard import (
+    BLACK_PLAYER, WHITE_PLAYER, BitBoard, FULL_MASK, flips_mask, iter_squares,
+    legal_moves_mask, square_to_notation,
+)
+from search import (
+    EXACT, LOWER, UPPER, SearchTimeout, TranspositionTable, position_hash,
+)
+
+SMALL_EMPTIES = 5 # この数以下の空きマスでは専用ルーチンを使う
+TT_MIN_EMPTIES = 8 # この数以上の空きマスの局面だけ置換表に登録する
+MOBILITY_ORDERING_EMPTIES = 10 # この数以上の空きマスでは、相手の合法手が少ない順に並べる
+
+# 盤面を 4x4 の4領域に分けたマスク (偶数理論: 空きが奇数個の領域から先に打つ)
+QUADRANTS = tuple(
+    sum(1 << (r * 8 + c) for r in range(r0, r0 + 4) for c in range(c0, c0 + 4))
+    for r0 in (0, 4) for c0 in (0, 4)
+)
+QUADRANT_OF = [next(i for i, q in enumerate(QUADRANTS) if q >> sq & 1) for sq in range(64)]
+
+# 同じ偶奇の領域内では、角 -> 辺 -> それ以外 の順に試す
+_CORNERS = (0, 7, 56, 63)
+_SQUARE_PRIORITY = [
+    0 if sq in _CORNERS else 1 if (sq >> 3) in (0, 7) or (sq & 7) in (0, 7) else 2
+    for sq in range(64)
+]
+
+
+def final_disc_diff(own, opp):
+    """終局時の石差 (空きマスは勝った側に加算)"""
+    own_count = own.bit_count()
+    opp_count = opp.bit_count()
+    diff = own_count - opp_count
+    empties = 64 - own_count - opp_count
+    if diff > 0:
+        return diff + empties
+    if diff < 0:
+        return diff - empties
+    return 0
+
+
+def parity_order(squares, empty_mask):
+    """空きマスが奇数個の領域のマスを先に、同じ偶奇なら角・辺を先に並べる"""
+    odd = 0
+    for i, quadrant in enumerate(QUADRANTS):
+        if (empty_mask & quadrant).bit_count() & 1:
+            odd |= 1 << i
+    return sorted(squares, key=lambda sq: (not odd >> QUADRANT_OF[sq] & 1, _SQUARE_PRIORITY[sq]))
+
+
+class EndgameSolver:
+    def __init__(self, tt_size=1 << 20, table=None):
+        self.tt = table if table is not None else TranspositionTable(tt_size)
+        self.nodes = 0
+        self.deadline = None # time.perf_counter() の値。超えたら SearchTimeout を送出する
+
+    def solve(self, board, player, time_limit=None):
+        """board (Board / BitBoard) の player 手番の局面を解き、(最終石差, 最善手 (row, col)) を返す
+        (打てる手がなければ最善手は None)"""
+        if not isinstance(board, BitBoard):
+            board = BitBoard.from_grid(board.board)
+        own, opp = board.discs(player)
+        score, sq = self.solve_square(own, opp, time_limit)
+        return score, None if sq is None else (sq >> 3, sq & 7)
+
+    def solve_square(self, own, opp, time_limit=None):
+        """手番側 own の局面を解き、(最終石差, 最善手のマス番号) を返す。
+        time_limit 秒を超えたら SearchTimeout を送出する"""
+        self.nodes = 0
+        self.deadline = None if time_limit is None else time.perf_counter() + time_limit
+        self.tt.new_search()
+
+        moves = legal_moves_mask(own, opp)
+        if not moves:
+            if not legal_moves_mask(opp, own):
+                return final_disc_diff(own, opp), None
+            return -self._solve(opp, own, -64, 64), None # パス
+
+        alpha = -65
+        best_move = None
+        for sq in self._order_moves(own, opp, moves, -1):
+            flips = flips_mask(own, opp, sq)
+            new_own, new_opp = own | flips | (1 << sq), opp & ~flips
+            if best_move is None:
+                score = -self._solve(new_opp, new_own, -64, 64)
+            else:
+                # 2手目以降は「最善手より良いか」だけを幅0の窓で調べ、良ければ読み直す
+                score = -self._solve(new_opp, new_own, -alpha - 1, -alpha)
+                if score > alpha:
+                    score = -self._solve(new_opp, new_own, -64, -score + 1)
+            if score > alpha:
+                alpha = score
+                best_move = sq
+        return alpha, best_move
+
+    def _solve(self, own, opp, alpha, beta):
+        self.nodes += 1
+        if self.deadline is not None and not self.nodes & 0xFFF and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+
+        empty_mask = ~(own | opp) & FULL_MASK
+        empties = empty_mask.bit_count()
+        if empties <= SMALL_EMPTIES:
+            return self._solve_small(own, opp, alpha, beta, parity_order(iter_squares(empty_mask), empty_mask), False)
+
+        moves = legal_moves_mask(own, opp)
+        if not moves:
+            if not legal_moves_mask(opp, own):
+                return final_disc_diff(own, opp)
+            return -self._solve(opp, own, -beta, -alpha) # パス
+
+        key = 0
+        tt_move = -1
+        if empties >= TT_MIN_EMPTIES:
+            key = position_hash(own, opp)
+            entry = self.tt.probe(key)
+            if entry is not None:
+                _, tt_value, tt_flag, tt_move = entry
+                if tt_flag == EXACT:
+                    return tt_value
+                if tt_flag == LOWER and tt_value > alpha:
+                    alpha = tt_value
+                elif tt_flag == UPPER and tt_value < beta:
+                    beta = tt_value
+                if alpha >= beta:
+                    return tt_value
+
+        alpha_orig = alpha
+        best_score = -65
+        best_move = -1
+        for sq in self._order_moves(own, opp, moves, tt_move):
+            flips = flips_mask(own, opp, sq)
+            new_own, new_opp = own | flips | (1 << sq), opp & ~flips
+            if best_move < 0:
+                score = -self._solve(new_opp, new_own, -beta, -alpha)
+            else:
+                # PVS: 2手目以降は幅0の窓で調べ、α を超えたときだけ通常の窓で読み直す
+                score = -self._solve(new_opp, new_own, -alpha - 1, -alpha)
+                if alpha < score < beta:
+                    score = -self._solve(new_opp, new_own, -beta, -alpha)
+            if score > best_score:
+                best_score = score
+                best_move = sq
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if empties >= TT_MIN_EMPTIES:
+            if best_score <= alpha_orig:
+                flag = UPPER
+            elif best_score >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            self.tt.store(key, empties, best_score, flag, best_move)
+        return best_score
+
+    def _solve_small(self, own, opp, alpha, beta, empties, passed):
+        """空きマスが少ない局面用。empties (空きマスのリスト) を直接試し、合法手生成も置換表も使わない"""
+        self.nodes += 1
+        best_score = -65
+        for i, sq in enumerate(empties):
+            flips = flips_mask(own, opp, sq)
+            if not flips:
+                continue
+            new_own = own | flips | (1 << sq)
+            new_opp = opp & ~flips
+            if len(empties) == 1:
+                score = final_disc_diff(new_own, new_opp)
+            else:
+                rest = empties[:i] + empties[i + 1:]
+                score = -self._solve_small(new_opp, new_own, -beta, -alpha, rest, False)
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        return best_score
+
+        if best_score == -65: # 打てる手がない
+            if passed:
+                return final_disc_diff(own, opp) # 双方パス -> 終局
+            return -self._solve_small(opp, own, -beta, -alpha, empties, True)
+        return best_score
+
+    def _order_moves(self, own, opp, moves, tt_move):
+        """置換表の手 -> 相手の合法手が少ない手 (空きが多いとき) -> 偶数理論の順に並べる"""
+        empty_mask = ~(own | opp) & FULL_MASK
+        squares = parity_order(iter_squares(moves), empty_mask)
+        if empty_mask.bit_count() >= MOBILITY_ORDERING_EMPTIES:
+            def reply_count(sq):
+                flips = flips_mask(own, opp, sq)
+                return legal_moves_mask(opp & ~flips, own | flips | (1 << sq)).bit_count()
+            squares.sort(key=reply_count) # 安定ソートなので偶数理論の順は同数の中で保たれる
+        if tt_move >= 0 and moves >> tt_move & 1:
+            squares.remove(tt_move)
+            squares.insert(0, tt_move)
+        return squares
+
+
+# --- 局面ファイルの読み書き ---
+_BLACK_CHARS = "XB*"
+_WHITE_CHARS = "OW"
+_EMPTY_CHARS = "-."
+
+
+def parse_position(line):
+    """'<64文字の盤面> <手番>' を (black, white, player) に変換する"""
+    fields = line.split()
+    if len(fields) < 2 or len(fields[0]) != 64:
+        raise ValueError(f"局面の形式が正しくありません: {line!r}")
+    black = white = 0
+    for sq, ch in enumerate(fields[0].upper()):
+        if ch in _BLACK_CHARS:
+            black |= 1 << sq
+        elif ch in _WHITE_CHARS:
+            white |= 1 << sq
+        elif ch not in _EMPTY_CHARS:
+            raise ValueError(f"盤面に使えない文字です: {ch!r}")
+    side = fields[1].upper()
+    if side in _BLACK_CHARS:
+        player = BLACK_PLAYER
+    elif side in _WHITE_CHARS:
+        player = WHITE_PLAYER
+    else:
+        raise ValueError(f"手番の指定が正しくありません: {fields[1]!r}")
+    return black, white, player
+
+
+def format_position(black, white, player):
+    cells = "".join("X" if black >> sq & 1 else "O" if white >> sq & 1 else "-" for sq in range(64))
+    return f"{cells} {'X' if player == BLACK_PLAYER else 'O'}"
+
+
+def read_positions(path):
+    """局面ファイルから (行番号, black, white, player) を順に返す"""
+    with open(path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.split("#", 1)[0].strip()
+            if line:
+                yield (lineno, *parse_position(line))
+
+
+_worker_solver = None
+
+
+def _solve_task(task):
+    global _worker_solver
+    if _worker_solver is None:
+        _worker_solver = EndgameSolver()
+    lineno, black, white, player = task
+    own, opp = (black, white) if player == BLACK_PLAYER else (white, black)
+    start = time.perf_counter()
+    score, sq = _worker_solver.solve_square(own, opp)
+    return lineno, score, sq, _worker_solver.nodes, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="オセロの終盤完全読み (局面ファイルを一括で解く)")
+    parser.add_argument("positions", help="局面ファイル (1行1局面)")
+    parser.add_argument("--workers", type=int, default=1, help="並列に解くプロセス数")
+    args = parser.parse_args(argv)
+
+    tasks = list(read_positions(args.positions))
+    total_nodes = 0
+    start = time.perf_counter()
+    if args.workers > 1:
+        with multiprocessing.Pool(args.workers) as pool:
+            results = list(pool.imap(_solve_task, tasks))
+    else:
+        results = map(_solve_task, tasks)
+
+    print("line  move  score        nodes    seconds")
+    for lineno, score, sq, nodes, elapsed in results:
+        move = square_to_notation(sq) if sq is not None else "pass"
+        print(f"{lineno:4d}  {move:>4}  {score:+5d}  {nodes:11d}  {elapsed:9.3f}")
+        total_nodes += nodes
+    elapsed = time.perf_counter() - start
+    print(f"{len(tasks)} 局面, {total_nodes} ノード, {elapsed:.2f} 秒"
+          f" ({total_nodes / elapsed if elapsed > 0 else 0:.0f} ノード/秒)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
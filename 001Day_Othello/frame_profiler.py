@@ -0,0 +1,160 @@
+"""
+フレーム時間の計測 (pygame のゲーム共通)
+
+1フレームを「入力」「更新」「描画」などの区間に分けて時間を測り、直近のフレームから p50 / p95 / p99 を求める。
+画面の隅に結果を重ねて表示でき、終了時には全フレームの記録を CSV に書き出せる。
+16.6 ms (60FPS) の予算を超えたフレームで、どの区間に時間がかかっているかを調べるのに使う。
+
+使い方:
+    profiler = FrameProfiler(overlay=True, csv_path="frames.csv")
+    while running:
+        profiler.begin_frame()
+        with profiler.phase("input"):
+            ...
+        with profiler.phase("update"):
+            ...
+        with profiler.phase("draw"):
+            ...
+            rect = profiler.draw_overlay(screen)   # 重ねて表示した範囲 (部分更新に加える)
+        profiler.end_frame()
+    profiler.close()   # CSV を書き出して集計を表示する
+"""
+import csv
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import pygame
+
+BUDGET_MS = 1000 / 60  # 60FPS の1フレームの予算
+OVERLAY_REFRESH = 0.25  # 表示を作り直す間隔 (秒)
+
+
+def percentile(sorted_values, fraction):
+    """昇順に並んだ値の fraction (0-1) の位置の値 (最も近い順位の値)"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class FrameProfiler:
+    def __init__(self, enabled=True, window=600, budget_ms=BUDGET_MS, overlay=False, csv_path=None):
+        """window: p50 / p95 / p99 を求める直近のフレーム数 / overlay: draw_overlay で表示するか /
+        csv_path: close() で全フレームの記録を書き出すファイル"""
+        self.enabled = enabled
+        self.budget_ms = budget_ms
+        self.overlay = enabled and overlay
+        self.csv_path = csv_path if enabled else None
+        self.phases = []  # 区間の名前 (最初に使われた順)
+        self.recent = {"frame": deque(maxlen=window), "work": deque(maxlen=window)}  # 区間の名前 -> 直近の ms
+        self.trace = []   # CSV 用の全フレームの記録 (フレーム番号, 開始時刻, frame, work, 各区間)
+        self.frames = 0
+        self.over_budget = 0
+        self.started = time.perf_counter()
+        self.frame_start = None
+        self.current = {}
+        self.overlay_surface = None
+        self.overlay_updated = 0.0
+        self.font = None
+
+    # --- 計測 ---
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self.recent["frame"].append((now - self.frame_start) * 1000)  # 前のフレームの開始からの間隔
+        self.frame_start = now
+        self.current = {}
+
+    def phase(self, name):
+        """with で囲んだ区間の時間を、このフレームの name に足す"""
+        if not self.enabled:
+            return nullcontext()
+        return self._measure(name)
+
+    @contextmanager
+    def _measure(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            if name not in self.recent:
+                self.phases.append(name)
+                self.recent[name] = deque(maxlen=self.recent["work"].maxlen)
+            self.current[name] = self.current.get(name, 0.0) + elapsed
+
+    def end_frame(self):
+        """フレームの処理 (待ち時間を除く) を記録する"""
+        if not self.enabled or self.frame_start is None:
+            return
+        work = (time.perf_counter() - self.frame_start) * 1000
+        self.frames += 1
+        if work > self.budget_ms:
+            self.over_budget += 1
+        self.recent["work"].append(work)
+        for name in self.phases:
+            self.recent[name].append(self.current.get(name, 0.0))
+        frame = self.recent["frame"][-1] if self.recent["frame"] else 0.0
+        if self.csv_path:
+            self.trace.append((self.frames, self.frame_start - self.started, frame, work,
+                               [self.current.get(name, 0.0) for name in self.phases]))
+
+    def percentiles(self, name="work"):
+        """name の直近の (p50, p95, p99) (ms)"""
+        values = sorted(self.recent.get(name, ()))
+        return percentile(values, 0.50), percentile(values, 0.95), percentile(values, 0.99)
+
+    # --- 表示と出力 ---
+    def summary_lines(self, ascii_only=False):
+        """集計の行。ascii_only=True なら英語だけにする (標準フォントには日本語の字形がないので重ねて表示するとき用)"""
+        lines = []
+        for name in ["frame", "work"] + self.phases:
+            p50, p95, p99 = self.percentiles(name)
+            lines.append(f"{name:<7} p50 {p50:6.2f}  p95 {p95:6.2f}  p99 {p99:6.2f} ms")
+        if ascii_only:
+            lines.append(f"over {self.budget_ms:.1f} ms budget: {self.over_budget} / {self.frames} frames")
+        else:
+            lines.append(f"予算 {self.budget_ms:.1f} ms 超え: {self.over_budget} / {self.frames} フレーム")
+        return lines
+
+    def draw_overlay(self, screen, position=(5, 5), anchor="topleft"):
+        """集計を screen に重ねて描き、描いた範囲を返す (overlay=False なら None)"""
+        if not self.overlay:
+            return None
+        now = time.perf_counter()
+        if self.overlay_surface is None or now - self.overlay_updated >= OVERLAY_REFRESH:
+            if self.font is None:
+                self.font = pygame.font.Font(None, 18)
+            lines = [self.font.render(line, True, (255, 255, 0)) for line in self.summary_lines(ascii_only=True)]
+            width = max(line.get_width() for line in lines) + 8
+            height = sum(line.get_height() for line in lines) + 8
+            self.overlay_surface = pygame.Surface((width, height))
+            self.overlay_surface.fill((0, 0, 0))
+            y = 4
+            for line in lines:
+                self.overlay_surface.blit(line, (4, y))
+                y += line.get_height()
+            self.overlay_updated = now
+        rect = self.overlay_surface.get_rect(**{anchor: position})
+        return screen.blit(self.overlay_surface, rect)
+
+    def write_csv(self, path):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "time_s", "frame_ms", "work_ms"] + [f"{name}_ms" for name in self.phases])
+            for number, start, frame, work, phases in self.trace:
+                phases = phases + [0.0] * (len(self.phases) - len(phases))  # 後から増えた区間は 0
+                writer.writerow([number, f"{start:.4f}", f"{frame:.3f}", f"{work:.3f}"]
+                                + [f"{value:.3f}" for value in phases])
+
+    def close(self):
+        """CSV を書き出し、集計を標準エラーに表示する"""
+        if not self.enabled or not self.frames:
+            return
+        if self.csv_path:
+            self.write_csv(self.csv_path)
+        print("\n".join(self.summary_lines()), file=sys.stderr)
@@ -1,6 +1,12 @@
+import argparse
 import pygame
 import sys
 
+from bitboard import BitBoard, iter_squares
+from frame_profiler import FrameProfiler
+from record import GameRecord, RecordWriter
+from search import ComputerPlayer
+
 # --- 定数 ---
 # 画面サイズ
 WIDTH = 520 # マスサイズ * マス数 + 余白など
@@ -24,6 +30,18 @@ EMPTY = 0
 BLACK_PLAYER = 1
 WHITE_PLAYER = 2
 
+# 各マスと同じ行・列・斜めの線上にあるマス (自分自身を含む) のビットマスク (ビット番号 = row * COLS + col)
+# あるマスの石が変わると、この線上のマスの「ひっくり返せる石」だけが変わりうる
+LINE_MASKS = [
+    [
+        sum(1 << (r * COLS + c) for r in range(ROWS) for c in range(COLS)
+            if r == row or c == col or r - c == row - col or r + c == row + col)
+        for col in range(COLS)
+    ]
+    for row in range(ROWS)
+]
+ALL_SQUARES_MASK = (1 << (ROWS * COLS)) - 1
+
 # --- ゲーム盤クラス ---
 class Board:
     def __init__(self):
@@ -35,6 +53,13 @@ class Board:
         self.board[4][4] = WHITE_PLAYER
         self.black_score = 2
         self.white_score = 2
+        self.invalidate_cache()
+
+    def invalidate_cache(self):
+        """有効な手のキャッシュを破棄する (self.board を直接書き換えたときに呼ぶ)"""
+        # プレイヤーごとに { (row, col): flip_list } (有効な手のみ) と、再計算が必要なマスのビットマスクを持つ
+        self._valid_cache = {BLACK_PLAYER: {}, WHITE_PLAYER: {}}
+        self._dirty = {BLACK_PLAYER: ALL_SQUARES_MASK, WHITE_PLAYER: ALL_SQUARES_MASK}
 
     def draw_squares(self, screen):
         """盤面のマス目を描画"""
@@ -85,14 +110,17 @@ class Board:
         return tiles_to_flip # ひっくり返せる石がなければ空リストが返る
 
     def get_valid_moves(self, player):
-        """player が打てる全ての有効な手のリストを返す"""
-        valid_moves = {} # { (row, col): [flip_list], ... }
-        for r in range(ROWS):
-            for c in range(COLS):
-                flip_list = self.is_valid_move(player, r, c)
-                if flip_list: # 空リストでなければ有効な手
-                    valid_moves[(r, c)] = flip_list
-        return valid_moves
+        """player が打てる全ての有効な手のリストを返す (前回から変わりうるマスだけ再計算する)"""
+        valid_moves = self._valid_cache[player] # { (row, col): [flip_list], ... }
+        for sq in iter_squares(self._dirty[player]):
+            r, c = divmod(sq, COLS)
+            flip_list = self.is_valid_move(player, r, c)
+            if flip_list: # 空リストでなければ有効な手
+                valid_moves[(r, c)] = flip_list
+            else:
+                valid_moves.pop((r, c), None)
+        self._dirty[player] = 0
+        return dict(valid_moves)
 
     def make_move(self, player, row, col, tiles_to_flip):
         """石を置き、指定された石をひっくり返す"""
@@ -101,13 +129,25 @@ class Board:
              return False
 
         self.board[row][col] = player
+        changed = LINE_MASKS[row][col]
         for r_flip, c_flip in tiles_to_flip:
             self.board[r_flip][c_flip] = player
-        self.update_score()
+            changed |= LINE_MASKS[r_flip][c_flip]
+        self._dirty[BLACK_PLAYER] |= changed
+        self._dirty[WHITE_PLAYER] |= changed
+
+        # スコアは置いた石と返した石の数だけ増減させる (盤面全体は数え直さない)
+        flipped = len(tiles_to_flip)
+        if player == BLACK_PLAYER:
+            self.black_score += flipped + 1
+            self.white_score -= flipped
+        else:
+            self.white_score += flipped + 1
+            self.black_score -= flipped
         return True
 
     def update_score(self):
-        """現在のスコアを計算し更新"""
+        """盤面全体を数え直してスコアを更新"""
         self.black_score = 0
         self.white_score = 0
         for r in range(ROWS):
@@ -120,12 +160,118 @@ class Board:
     def get_score(self):
         return self.black_score, self.white_score
 
+# --- ビットボード版ゲーム盤クラス ---
+class FastBoard(BitBoard):
+    """BitBoard に描画メソッドを付けたもの。Board と同じ API で OthelloGame から使える"""
+    draw_squares = Board.draw_squares
+
+    def draw_pieces(self, screen):
+        """盤面の石を描画 (石のあるマスだけを走査)"""
+        radius = SQUARE_SIZE // 2 - 5
+        for player_bits, color in ((self.black, BLACK), (self.white, WHITE)):
+            for sq in iter_squares(player_bits):
+                center_x = BOARD_OFFSET_X + (sq & 7) * SQUARE_SIZE + SQUARE_SIZE // 2
+                center_y = BOARD_OFFSET_Y + (sq >> 3) * SQUARE_SIZE + SQUARE_SIZE // 2
+                pygame.draw.circle(screen, color, (center_x, center_y), radius)
+
+# --- 差分描画クラス ---
+class BoardRenderer:
+    """前フレームから変化したマスとステータス欄だけを描き直し、pygame.display.update(rects) で部分更新する"""
+    def __init__(self, screen):
+        self.screen = screen
+        # マスの見た目は (石, 有効な手の印) の4通りしかないので、あらかじめ描いておく
+        self.tiles = {
+            key: self._make_tile(*key)
+            for key in ((EMPTY, False), (EMPTY, True), (BLACK_PLAYER, False), (WHITE_PLAYER, False))
+        }
+        board_bottom = BOARD_OFFSET_Y + ROWS * SQUARE_SIZE
+        self.status_rect = pygame.Rect(0, board_bottom, WIDTH, HEIGHT - board_bottom)
+        self.overlay_rect = None # 前のフレームでフレーム時間の表示を重ねた範囲
+        self.invalidate()
+
+    def _make_tile(self, piece, is_hint):
+        """1マス分の画像 (背景・枠線・石または有効な手の印) を作る"""
+        tile = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE))
+        tile.fill(GREEN)
+        pygame.draw.rect(tile, BLACK, tile.get_rect(), 1)
+        center = (SQUARE_SIZE // 2, SQUARE_SIZE // 2)
+        if piece == BLACK_PLAYER:
+            pygame.draw.circle(tile, BLACK, center, SQUARE_SIZE // 2 - 5)
+        elif piece == WHITE_PLAYER:
+            pygame.draw.circle(tile, WHITE, center, SQUARE_SIZE // 2 - 5)
+        elif is_hint:
+            pygame.draw.circle(tile, GOLD, center, SQUARE_SIZE // 8)
+        return tile
+
+    def invalidate(self):
+        """次のフレームで画面全体を描き直す (ウィンドウが隠れて戻ったときなど)"""
+        self._square_keys = [[None] * COLS for _ in range(ROWS)]
+        self._status_key = None
+        self._full_redraw = True
+
+    def render(self, game, profiler=None):
+        """game の状態を描画する。何も変わっていなければ画面には触れない
+        (profiler を渡すとフレーム時間の表示を重ねる。その下のマスは毎フレーム描き直す)"""
+        dirty_rects = []
+        if self._full_redraw:
+            self.screen.fill(GREEN)
+        elif self.overlay_rect is not None:
+            self._erase_overlay(dirty_rects)
+
+        grid = game.board.board
+        hints = game.valid_moves if not game.game_over else {}
+        for r in range(ROWS):
+            keys = self._square_keys[r]
+            for c in range(COLS):
+                key = (grid[r][c], (r, c) in hints)
+                if key != keys[c]:
+                    keys[c] = key
+                    pos = (BOARD_OFFSET_X + c * SQUARE_SIZE, BOARD_OFFSET_Y + r * SQUARE_SIZE)
+                    dirty_rects.append(self.screen.blit(self.tiles[key], pos))
+
+        status_key = (game.board.get_score(), game.current_player, game.game_over, game.winner,
+                      game.is_computer_turn())
+        if status_key != self._status_key:
+            self._status_key = status_key
+            self.screen.fill(GREEN, self.status_rect)
+            game.draw_status()
+            dirty_rects.append(self.status_rect)
+
+        if profiler is not None:
+            self.overlay_rect = profiler.draw_overlay(self.screen)
+            if self.overlay_rect is not None:
+                dirty_rects.append(self.overlay_rect)
+
+        if self._full_redraw:
+            self._full_redraw = False
+            pygame.display.flip()
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
+
+    def _erase_overlay(self, dirty_rects):
+        """前のフレームで重ねた表示を消し、その下のマスとステータス欄を次の描画で描き直させる"""
+        rect = self.overlay_rect
+        self.screen.fill(GREEN, rect)
+        dirty_rects.append(rect)
+        for r in range(ROWS):
+            for c in range(COLS):
+                square = pygame.Rect(BOARD_OFFSET_X + c * SQUARE_SIZE, BOARD_OFFSET_Y + r * SQUARE_SIZE,
+                                     SQUARE_SIZE, SQUARE_SIZE)
+                if square.colliderect(rect):
+                    self._square_keys[r][c] = None
+        if self.status_rect.colliderect(rect):
+            self._status_key = None
+        self.overlay_rect = None
+
 # --- ゲーム管理クラス ---
 class OthelloGame:
-    def __init__(self, screen):
+    def __init__(self, screen, board_class=FastBoard, computer=None, profiler=None):
         self.screen = screen
-        self.board = Board()
+        self.profiler = profiler or FrameProfiler(enabled=False) # フレーム時間の計測 (既定では無効)
+        self.board = board_class() # Board (リスト版) か FastBoard (ビットボード版)
+        self.computer = computer # ComputerPlayer (None なら人間同士の対戦)
         self.current_player = BLACK_PLAYER # 黒から開始
+        self.history = [] # 打たれた手のマス番号 (row * COLS + col) の列。パスは含めない
         self.valid_moves = self.board.get_valid_moves(self.current_player)
         self.game_over = False
         self.winner = None
@@ -143,6 +289,16 @@ class OthelloGame:
              # フォールバックとしてデフォルトを使う (文字化けする可能性あり)
              self.font = pygame.font.Font(None, 20)
              self.small_font = pygame.font.Font(None, 10)
+        self._text_cache = {} # { (font, text, color): Surface }
+        self.renderer = BoardRenderer(screen)
+
+    def render_text(self, font, text, color):
+        """文字列を描画した Surface を返す (同じ文字列は2回目以降キャッシュを使う)"""
+        key = (id(font), text, color)
+        surf = self._text_cache.get(key)
+        if surf is None:
+            surf = self._text_cache[key] = font.render(text, True, color)
+        return surf
 
     def switch_player(self):
         """プレイヤーを交代する"""
@@ -176,7 +332,7 @@ class OthelloGame:
 
     def handle_click(self, pos):
         """クリックイベントを処理"""
-        if self.game_over:
+        if self.game_over or self.is_computer_turn():
             return
 
         # 画面座標から盤面座標へ変換
@@ -184,10 +340,33 @@ class OthelloGame:
         row = (pos[1] - BOARD_OFFSET_Y) // SQUARE_SIZE
 
         if (row, col) in self.valid_moves:
-            tiles_to_flip = self.valid_moves[(row, col)]
-            if self.board.make_move(self.current_player, row, col, tiles_to_flip):
-                self.switch_player()
+            self.play_move(row, col)
+
+    def play_move(self, row, col):
+        """手番のプレイヤーが (row, col) に打ち、棋譜に記録して手番を交代する"""
+        if self.board.make_move(self.current_player, row, col, self.valid_moves[(row, col)]):
+            self.history.append(row * COLS + col)
+            self.switch_player()
 
+    def record(self):
+        """ここまでの棋譜を GameRecord で返す (終局していれば石数も入れる)"""
+        if not self.game_over:
+            return GameRecord(self.history)
+        b_score, w_score = self.board.get_score()
+        return GameRecord(self.history, b_score, w_score)
+
+
+    def is_computer_turn(self):
+        return self.computer is not None and self.current_player == self.computer.player
+
+    def update_computer(self):
+        """コンピュータの手番なら探索を開始し、結果が出ていれば石を置く (描画ループは待たせない)"""
+        if self.game_over or not self.is_computer_turn():
+            return
+        self.computer.start(self.board)
+        move = self.computer.poll()
+        if move is not None and move in self.valid_moves:
+            self.play_move(*move)
 
     def draw_valid_moves(self):
         """有効な手を小さな円で表示"""
@@ -201,13 +380,15 @@ class OthelloGame:
         """スコア、ターン、結果などを描画"""
         b_score, w_score = self.board.get_score()
         score_text = f"黒: {b_score}  白: {w_score}"
-        score_surf = self.font.render(score_text, True, BLACK)
+        score_surf = self.render_text(self.font, score_text, BLACK)
         score_rect = score_surf.get_rect(center=(WIDTH // 2, HEIGHT - 60))
         self.screen.blit(score_surf, score_rect)
 
         if not self.game_over:
             turn_text = f"ターン: {'黒' if self.current_player == BLACK_PLAYER else '白'}"
-            turn_surf = self.font.render(turn_text, True, BLACK if self.current_player == BLACK_PLAYER else WHITE)
+            if self.is_computer_turn():
+                turn_text += " (コンピュータ思考中)"
+            turn_surf = self.render_text(self.font, turn_text, BLACK if self.current_player == BLACK_PLAYER else WHITE)
             turn_rect = turn_surf.get_rect(center=(WIDTH // 2, HEIGHT - 30))
             # 背景色を設定して文字を見やすくする（オプション）
             text_bg_rect = turn_rect.inflate(10, 5) # 少し大きめの背景矩形
@@ -216,7 +397,7 @@ class OthelloGame:
 
             # パスに関する注意書き (簡易版)
             pass_info = "打てる場所がない場合は自動でパスにはなりません (相手がクリックしてください)"
-            pass_surf = self.small_font.render(pass_info, True, RED)
+            pass_surf = self.render_text(self.small_font, pass_info, RED)
             pass_rect = pass_surf.get_rect(center=(WIDTH // 2, HEIGHT - 10))
             # self.screen.blit(pass_surf, pass_rect) # 必要ならコメント解除
 
@@ -229,40 +410,71 @@ class OthelloGame:
                 result_text = "白の勝ち！"
             else:
                 result_text = "引き分け"
-            result_surf = self.font.render(result_text, True, RED)
+            result_surf = self.render_text(self.font, result_text, RED)
             result_rect = result_surf.get_rect(center=(WIDTH // 2, HEIGHT - 30))
             self.screen.blit(result_surf, result_rect)
 
-    def run(self):
-        """メインループを実行"""
+    def run(self, record_path=None):
+        """メインループを実行 (record_path を渡すと、終了時に棋譜をそのファイルに追記する)"""
         running = True
         clock = pygame.time.Clock()
 
+        profiler = self.profiler
         while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    self.handle_click(event.pos)
-
-            # 描画処理
-            self.board.draw_squares(self.screen)
-            self.board.draw_pieces(self.screen)
-            if not self.game_over:
-                 self.draw_valid_moves()
-            self.draw_status()
-
-            # 画面更新
-            pygame.display.flip()
-            clock.tick(60) # FPS
-
+            profiler.begin_frame()
+            with profiler.phase("input"):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        running = False
+                    if event.type == pygame.MOUSEBUTTONDOWN:
+                        self.handle_click(event.pos)
+                    if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                        self.renderer.invalidate() # ウィンドウが再表示されたら全体を描き直す
+
+            # コンピュータの手番 (探索は別プロセスなので、ここでは結果を確認するだけ)
+            with profiler.phase("update"):
+                self.update_computer()
+
+            # 描画処理 (変化したマスとステータス欄だけを描き直して部分更新)
+            with profiler.phase("draw"):
+                self.renderer.render(self, profiler if profiler.overlay else None)
+            profiler.end_frame()
+            clock.tick(60) # FPS (待ち時間はフレーム時間の計測に含めない)
+
+        profiler.close()
+
+        if self.computer is not None:
+            self.computer.close()
+        if record_path and self.history:
+            with RecordWriter(record_path, append=True) as writer:
+                writer.write(self.record())
         pygame.quit()
         sys.exit()
 
 # --- メイン処理 ---
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="シンプルオセロ")
+    parser.add_argument("--cpu", choices=["none", "black", "white"], default="none",
+                        help="コンピュータが担当する色 (既定: none = 人間同士)")
+    parser.add_argument("--time", type=float, default=1.0, help="コンピュータの1手あたりの思考時間 (秒)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="コンピュータの探索に使うプロセス数 (2 以上で並列探索)")
+    parser.add_argument("--book", help="コンピュータが使う定石ブック (book.py で作成したファイル)")
+    parser.add_argument("--record", help="終了時に棋譜を追記するファイル (拡張子 .rec ならバイナリ)")
+    parser.add_argument("--profile", action="store_true", help="フレーム時間 (入力・更新・描画) を画面に表示する")
+    parser.add_argument("--profile-csv", help="終了時にフレームごとの時間を書き出す CSV ファイル")
+    args = parser.parse_args()
+
+    computer = None
+    if args.cpu != "none":
+        computer = ComputerPlayer(BLACK_PLAYER if args.cpu == "black" else WHITE_PLAYER, time_limit=args.time,
+                                  workers=args.workers, book=args.book)
+
     pygame.init()
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("シンプルオセロ")
-    game = OthelloGame(screen)
-    game.run()
\ No newline at end of file
+    profiler = None
+    if args.profile or args.profile_csv:
+        profiler = FrameProfiler(overlay=args.profile, csv_path=args.profile_csv)
+    game = OthelloGame(screen, computer=computer, profiler=profiler)
+    game.run(args.record)
\ No newline at end of file
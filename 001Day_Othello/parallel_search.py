@@ -0,0 +1,272 @@
+"""
+オセロ AI の並列探索 (Lazy SMP)
+
+複数のワーカープロセスが同じ局面を同時に探索し、共有メモリ上の置換表で結果を共有する。
+ワーカーどうしは置換表以外でやりとりしない。
+- ワーカー 0 (メイン) の結果を最善手として使う。メインが終わったら他のワーカーも打ち切る
+- 定石ブックは親プロセスで引く。ブックに手があればワーカーには探索させない
+- 置換表の世代は親プロセスが実際に探索するときだけ進め、局面と一緒にワーカーへ送る
+- 他のワーカー (ヘルパー) は反復深化を 1 段深い所から始めるなど、開始深さをずらして探索木の別の部分を埋める
+- 置換表のエントリは (キー XOR データ, データ) の 64bit x 2 で書き込み、読むときにキーを復元して確かめる
+  (ロックを使わないので、別のプロセスの書き込みと重なって壊れたエントリは単に見つからなかったことになる)
+
+使い方:
+    python parallel_search.py --workers 4 --time 2.0 --positions 5
+"""
+import argparse
+import multiprocessing
+import os
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+from bitboard import BitBoard, legal_moves_mask
+from book import OpeningBook
+from search import SearchEngine, SearchTimeout
+
+ENTRY = struct.Struct("<QQ") # (キー XOR データ, データ)
+VALUE_BIAS = 1 << 31 # 評価値を符号なしでデータに詰めるためのゲタ
+
+
+# --- 共有メモリ上の置換表 ---
+class SharedTranspositionTable:
+    """search.TranspositionTable と同じ probe / store / new_search を持つ、プロセス間で共有できる置換表。
+    name を渡すと、他のプロセスが作った置換表に接続する"""
+
+    def __init__(self, size=1 << 20, name=None):
+        size = 1 << (max(size, 1).bit_length() - 1) # 2 のべき乗に切り下げ
+        self.mask = size - 1
+        self.generation = 0
+        self._owner = name is None
+        if self._owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=size * ENTRY.size)
+        else:
+            try: # Python 3.13 以降は接続側をリソーストラッカーに登録しない (終了時に消されないように)
+                self._shm = shared_memory.SharedMemory(name=name, track=False)
+            except TypeError:
+                self._shm = shared_memory.SharedMemory(name=name)
+        self.name = self._shm.name
+        self._buf = self._shm.buf
+
+    def new_search(self):
+        """探索ごとに世代を進める。接続側では何もしない (世代は ParallelSearch が局面と一緒に送る)"""
+        if self._owner:
+            self.generation = (self.generation + 1) & 0xFF
+
+    def clear(self):
+        self._buf[:] = bytes(len(self._buf))
+
+    def probe(self, key):
+        """(depth, value, flag, move) を返す。見つからなければ None"""
+        check, data = ENTRY.unpack_from(self._buf, (key & self.mask) * ENTRY.size)
+        if not data or check ^ data != key:
+            return None
+        return (data >> 32 & 0xFF, (data & 0xFFFFFFFF) - VALUE_BIAS,
+                data >> 40 & 0xFF, (data >> 48 & 0xFF) - 1)
+
+    def store(self, key, depth, value, flag, move):
+        offset = (key & self.mask) * ENTRY.size
+        check, old = ENTRY.unpack_from(self._buf, offset)
+        if (not old or check ^ old == key or old >> 56 != self.generation
+                or depth >= (old >> 32 & 0xFF)):
+            data = ((value + VALUE_BIAS) | depth << 32 | flag << 40 | (move + 1) << 48
+                    | self.generation << 56)
+            ENTRY.pack_into(self._buf, offset, key ^ data, data)
+
+    def close(self):
+        """共有メモリを切り離す (作ったプロセスでは共有メモリも削除する)"""
+        self._buf.release()
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+# --- ワーカープロセス ---
+def _worker_main(worker_id, conn, table_name, table_size, stop_event, engine_options):
+    table = SharedTranspositionTable(table_size, name=table_name)
+    engine = SearchEngine(table=table, depth_offset=worker_id % 2, stop_event=stop_event,
+                          **engine_options)
+    try:
+        while True:
+            task = conn.recv()
+            if task is None:
+                break
+            own, opp, table.generation = task
+            try:
+                move = engine.search_square(own, opp)
+            except SearchTimeout:
+                move = None
+            conn.send((move, engine.last_info))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        table.close()
+
+
+# --- 並列探索 ---
+class ParallelSearch:
+    """workers 個のプロセスで Lazy SMP 探索を行う。
+    search / search_square は結果が出るまで待つ。submit / poll は描画ループなどから待たずに使う
+    (poll はまだ結果を返していないヘルパーを待たない。残りは次の submit か close で受け取って捨てる)"""
+
+    def __init__(self, workers=None, time_limit=1.0, tt_size=1 << 20, book=None, **engine_options):
+        self.workers = workers or os.cpu_count() or 1
+        self.table = SharedTranspositionTable(tt_size)
+        self.book = OpeningBook(book) if isinstance(book, str) else book # ファイル名か OpeningBook
+        self._owns_book = isinstance(book, str)
+        self.last_info = {}
+        self._start = None
+        self._book_move = None
+        self._unfinished = [] # 打ち切った後、まだ結果を受け取っていないヘルパーの Connection
+        self._stop = multiprocessing.Event()
+        self._conns = []
+        self._processes = []
+        engine_options["time_limit"] = time_limit
+        for worker_id in range(self.workers):
+            options = dict(engine_options)
+            if worker_id > 0:
+                options["endgame_empties"] = 0 # 終盤完全読みはメインだけが使う
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_worker_main, daemon=True,
+                args=(worker_id, child, self.table.name, self.table.mask + 1, self._stop, options))
+            process.start()
+            child.close()
+            self._conns.append(parent)
+            self._processes.append(process)
+
+    @property
+    def thinking(self):
+        return self._start is not None
+
+    def _drain(self, timeout=None):
+        """前の探索で受け取っていないヘルパーの結果を捨てる (打ち切り済みなので長くは待たない)"""
+        for conn in self._unfinished:
+            if conn.poll(timeout):
+                conn.recv()
+        self._unfinished = []
+
+    def submit(self, own, opp):
+        """手番側 own の局面の探索を全ワーカーで開始する (定石ブックに手があれば探索しない)"""
+        if self._start is not None:
+            return
+        self._start = time.perf_counter()
+        if self.book is not None and (own | opp).bit_count() - 4 < self.book.plies:
+            self._book_move = self.book.best_move(own, opp)
+            if self._book_move is not None:
+                return
+        self._drain()
+        self._stop.clear()
+        self.table.new_search()
+        for conn in self._conns:
+            conn.send((own, opp, self.table.generation))
+
+    def poll(self):
+        """メインの探索が終わっていれば最善手のマス番号を返す。まだなら None"""
+        if self._start is None:
+            return None
+        if self._book_move is not None:
+            move, self._book_move, self._start = self._book_move, None, None
+            self.last_info = {"depth": 0, "score": 0, "exact": False, "book": True,
+                              "nodes": 0, "time": 0.0, "nps": 0, "workers": []}
+            return move
+        if not self._conns[0].poll():
+            return None
+        move, main_info = self._conns[0].recv()
+        self._stop.set() # ヘルパーを打ち切る。もう結果を返しているものだけ集計に入れる
+        infos = [main_info]
+        for conn in self._conns[1:]:
+            if conn.poll():
+                infos.append(conn.recv()[1])
+            else:
+                self._unfinished.append(conn)
+        elapsed = time.perf_counter() - self._start
+        self._start = None
+        nodes = sum(info.get("nodes", 0) for info in infos)
+        self.last_info = dict(main_info)
+        self.last_info.update({
+            "nodes": nodes,
+            "time": elapsed,
+            "nps": int(nodes / elapsed) if elapsed > 0 else 0,
+            "workers": [
+                {"id": i, "depth": info.get("depth", 0), "nodes": info.get("nodes", 0),
+                 "nps": info.get("nps", 0)}
+                for i, info in enumerate(infos)
+            ],
+        })
+        return move
+
+    def search_square(self, own, opp):
+        """手番側 own の最善手のマス番号を返す。打てる手がなければ None"""
+        if not legal_moves_mask(own, opp):
+            return None
+        self.submit(own, opp)
+        if self._book_move is None:
+            self._conns[0].poll(None)
+            self._stop.set() # 待ってよいので、ヘルパーの結果もそろえてから集計する
+            for conn in self._conns[1:]:
+                conn.poll(None)
+        return self.poll()
+
+    def search(self, board, player):
+        """board (Board / BitBoard) の player の最善手 (row, col) を返す。打てる手がなければ None"""
+        if not isinstance(board, BitBoard):
+            board = BitBoard.from_grid(board.board)
+        sq = self.search_square(*board.discs(player))
+        return None if sq is None else (sq >> 3, sq & 7)
+
+    def close(self):
+        self._stop.set()
+        self._drain(timeout=1.0)
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+        self.table.close()
+        if self._owns_book:
+            self.book.close()
+
+
+def main(argv=None):
+    from benchmark import sample_positions # ベンチマークと同じ局面を使う
+
+    parser = argparse.ArgumentParser(description="Lazy SMP 並列探索の速度比較")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="ワーカープロセス数 (既定: CPU コア数)")
+    parser.add_argument("--time", type=float, default=1.0, help="1局面あたりの思考時間 (秒)")
+    parser.add_argument("--positions", type=int, default=3, help="局面数 (序盤・中盤・終盤の順に使う)")
+    args = parser.parse_args(argv)
+
+    positions = []
+    seed = 0
+    while len(positions) < args.positions:
+        positions.extend(sample_positions(seed).values())
+        seed += 1
+    positions = positions[:args.positions]
+
+    single = SearchEngine(time_limit=args.time, endgame_empties=0)
+    parallel = ParallelSearch(args.workers, time_limit=args.time, endgame_empties=0)
+    try:
+        for black, white, player in positions:
+            board = BitBoard(black, white)
+            single.search(board, player)
+            parallel.search(board, player)
+            s, p = single.last_info, parallel.last_info
+            print(f"空き {64 - (black | white).bit_count():2d}: "
+                  f"1 プロセス 深さ {s['depth']:2d} {s['nps']:>9,} nps / "
+                  f"{args.workers} プロセス 深さ {p['depth']:2d} {p['nps']:>9,} nps")
+            for worker in p["workers"]:
+                print(f"    ワーカー {worker['id']:2d}: 深さ {worker['depth']:2d}, "
+                      f"{worker['nodes']:>9,} ノード, {worker['nps']:>9,} nps")
+    finally:
+        parallel.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""
+オセロの棋譜 (記録形式・読み書き・再生)
+
+棋譜は着手のマス番号の列だけを持つ (パスは記録しない。打てる手がなければ自動でパスとみなす)。
+局面は必要になったときに初期局面から再生して求めるので、大量の棋譜を扱っても盤面を溜め込まない。
+
+テキスト形式 (1行1局):
+    f5d6c3d3c4f4 ... 36-28        着手の列と、終局していれば 黒の石数-白の石数
+    simulate.py の JSON Lines ({"moves": "...", "black_discs": .., "white_discs": ..}) も読める
+
+バイナリ形式:
+    ヘッダ: マジック b"OTHREC01"
+    1局ごと: 手数 (uint8) / 黒の石数 (uint8) / 白の石数 (uint8) / 着手のマス番号 (uint8 x 手数)
+    石数が両方 0 のときは結果なし (途中の棋譜)
+
+使い方:
+    python record.py convert games.jsonl games.rec        (拡張子 .rec ならバイナリで書く)
+    python record.py stats games.rec
+    python record.py show games.rec --game 3 --ply 20
+    python record.py analyze games.rec --engine depth:4 --output analysis.jsonl
+"""
+import argparse
+import json
+import struct
+import sys
+
+from bitboard import (
+    BLACK_PLAYER, BitBoard, INITIAL_BLACK, INITIAL_WHITE, flips_mask, legal_moves_mask,
+    notation_to_square, opponent_of, square_to_notation,
+)
+
+MAGIC = b"OTHREC01"
+RECORD_HEADER = struct.Struct("<BBB")
+BINARY_SUFFIX = ".rec" # この拡張子のファイルはバイナリ形式で書く
+CHECKPOINT_INTERVAL = 8 # Replay が途中局面を覚えておく間隔 (手数)
+
+
+# --- 棋譜 ---
+class GameRecord:
+    """1局分の棋譜 (着手のマス番号のリストと、終局していれば石数)"""
+
+    def __init__(self, moves=None, black_discs=None, white_discs=None):
+        self.moves = list(moves or [])
+        self.black_discs = black_discs
+        self.white_discs = white_discs
+
+    def __len__(self):
+        return len(self.moves)
+
+    @property
+    def finished(self):
+        return self.black_discs is not None
+
+    def to_text(self):
+        text = "".join(square_to_notation(sq) for sq in self.moves)
+        if self.finished:
+            text += f" {self.black_discs}-{self.white_discs}"
+        return text
+
+    @classmethod
+    def from_text(cls, line):
+        """テキスト形式か simulate.py の JSON Lines の1行から作る"""
+        line = line.strip()
+        if line.startswith("{"):
+            data = json.loads(line)
+            return cls(parse_moves(data["moves"]), data.get("black_discs"), data.get("white_discs"))
+        moves, _, result = line.partition(" ")
+        if result:
+            black, white = (int(n) for n in result.strip().split("-"))
+            return cls(parse_moves(moves), black, white)
+        return cls(parse_moves(moves))
+
+    def to_bytes(self):
+        black, white = (self.black_discs, self.white_discs) if self.finished else (0, 0)
+        return RECORD_HEADER.pack(len(self.moves), black, white) + bytes(self.moves)
+
+    def replay(self):
+        return Replay(self.moves)
+
+
+def parse_moves(text):
+    """'f5d6c3...' 形式の着手の列をマス番号のリストに変換する"""
+    text = text.strip()
+    return [notation_to_square(text[i:i + 2]) for i in range(0, len(text), 2)]
+
+
+# --- 読み込み (1局ずつ返すジェネレータ) ---
+def iter_text(f):
+    """テキスト形式のファイルオブジェクトから GameRecord を1局ずつ返す (空行と # で始まる行は飛ばす)"""
+    for line in f:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield GameRecord.from_text(line)
+
+
+def iter_binary(f):
+    """バイナリ形式のファイルオブジェクト (マジックの後ろから) から GameRecord を1局ずつ返す"""
+    while True:
+        header = f.read(RECORD_HEADER.size)
+        if not header:
+            return
+        if len(header) < RECORD_HEADER.size:
+            raise ValueError("棋譜ファイルが途中で切れています")
+        count, black, white = RECORD_HEADER.unpack(header)
+        moves = f.read(count)
+        if len(moves) < count:
+            raise ValueError("棋譜ファイルが途中で切れています")
+        if black or white:
+            yield GameRecord(moves, black, white)
+        else:
+            yield GameRecord(moves)
+
+
+def read_records(path):
+    """棋譜ファイルから GameRecord を1局ずつ返す (形式は先頭のマジックで判定する)"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) == MAGIC:
+            yield from iter_binary(f)
+            return
+    with open(path, encoding="utf-8") as f:
+        yield from iter_text(f)
+
+
+# --- 書き込み ---
+class RecordWriter:
+    """棋譜を1局ずつ書き出す。with 文で使う"""
+
+    def __init__(self, path, binary=None, append=False):
+        if binary is None:
+            binary = path.endswith(BINARY_SUFFIX)
+        self.binary = binary
+        self.count = 0
+        if binary:
+            self._file = open(path, "ab" if append else "wb")
+            if self._file.tell() == 0:
+                self._file.write(MAGIC)
+        else:
+            self._file = open(path, "a" if append else "w", encoding="utf-8")
+
+    def write(self, record):
+        if self.binary:
+            self._file.write(record.to_bytes())
+        else:
+            self._file.write(record.to_text() + "\n")
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- 再生 ---
+class Replay:
+    """着手の列から局面を必要になったときに再生する。
+    position(ply) は ply 手目を打つ前の局面 (黒, 白, 手番) を返す (ply == len(moves) なら最終局面)"""
+
+    def __init__(self, moves):
+        self.moves = moves
+        # 計算済みの局面: CHECKPOINT_INTERVAL 手ごとの途中局面と、最後に求めた局面
+        self._checkpoints = {0: (INITIAL_BLACK, INITIAL_WHITE, BLACK_PLAYER)}
+        self._cursor = (0, self._checkpoints[0])
+
+    def __len__(self):
+        return len(self.moves)
+
+    def position(self, ply):
+        if not 0 <= ply <= len(self.moves):
+            raise IndexError(f"手数が範囲外です: {ply}")
+        start, state = self._cursor
+        if ply < start: # 戻るときは手前の途中局面からやり直す
+            start = ply - ply % CHECKPOINT_INTERVAL
+            state = self._checkpoints[start]
+        black, white, player = state
+        for i in range(start, ply):
+            black, white, player = _play(black, white, player, self.moves[i])
+            if (i + 1) % CHECKPOINT_INTERVAL == 0:
+                self._checkpoints[i + 1] = (black, white, player)
+        self._cursor = (ply, (black, white, player))
+        return black, white, player
+
+    def board(self, ply):
+        """ply 手目を打つ前の局面を BitBoard で返す"""
+        black, white, _ = self.position(ply)
+        return BitBoard(black, white)
+
+    def __iter__(self):
+        """(黒, 白, 手番, 着手) を初手から順に返す (最後は着手 None で最終局面)"""
+        black, white, player = INITIAL_BLACK, INITIAL_WHITE, BLACK_PLAYER
+        for sq in self.moves:
+            yield black, white, player, sq
+            black, white, player = _play(black, white, player, sq)
+        yield black, white, player, None
+
+
+def _play(black, white, player, sq):
+    """player が sq に打った後の (黒, 白, 次の手番) を返す (次の手番が打てなければパスして手番を戻す)"""
+    own, opp = (black, white) if player == BLACK_PLAYER else (white, black)
+    flips = flips_mask(own, opp, sq)
+    if not flips:
+        raise ValueError(f"不正な手です: {square_to_notation(sq)}")
+    own, opp = own | flips | (1 << sq), opp & ~flips
+    black, white = (own, opp) if player == BLACK_PLAYER else (opp, own)
+    if legal_moves_mask(opp, own) or not legal_moves_mask(own, opp):
+        player = opponent_of(player)
+    return black, white, player
+
+
+# --- 解析 ---
+def analyze(records, engine, output):
+    """各局面でエンジンの手を求め、棋譜の手と比べた結果を1手1行の JSON Lines で書き出す"""
+    for game_id, record in enumerate(records):
+        for ply, (black, white, player, sq) in enumerate(Replay(record.moves)):
+            if sq is None:
+                break
+            own, opp = (black, white) if player == BLACK_PLAYER else (white, black)
+            best = engine.search_square(own, opp)
+            output.write(json.dumps({
+                "game": game_id,
+                "ply": ply,
+                "player": player,
+                "move": square_to_notation(sq),
+                "best": square_to_notation(best),
+                "score": engine.last_info.get("score"),
+                "depth": engine.last_info.get("depth"),
+            }, separators=(",", ":")) + "\n")
+
+
+def print_board(black, white, player):
+    print("  a b c d e f g h")
+    for row in range(8):
+        cells = []
+        for col in range(8):
+            bit = 1 << (row * 8 + col)
+            cells.append("X" if black & bit else "O" if white & bit else ".")
+        print(row + 1, " ".join(cells))
+    print(f"手番: {'黒 (X)' if player == BLACK_PLAYER else '白 (O)'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="オセロの棋譜の変換・集計・再生")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    convert = sub.add_parser("convert", help="棋譜の形式を変換する")
+    convert.add_argument("input", help="入力ファイル (テキスト / JSON Lines / バイナリ)")
+    convert.add_argument("output", help=f"出力ファイル (拡張子 {BINARY_SUFFIX} ならバイナリ)")
+
+    stats = sub.add_parser("stats", help="局数・平均手数・勝敗を集計する")
+    stats.add_argument("input")
+
+    show = sub.add_parser("show", help="棋譜の途中局面を表示する")
+    show.add_argument("input")
+    show.add_argument("--game", type=int, default=0, help="何局目か (0 から)")
+    show.add_argument("--ply", type=int, default=None, help="何手目を打つ前の局面か (既定: 最終局面)")
+
+    analyze_parser = sub.add_parser("analyze", help="各局面をエンジンで解析する")
+    analyze_parser.add_argument("input")
+    analyze_parser.add_argument("--engine", default="depth:4", help="simulate.py と同じエンジン指定 (search / depth)")
+    analyze_parser.add_argument("--output", help="出力先 (JSON Lines, 省略時は標準出力)")
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        with RecordWriter(args.output) as writer:
+            for record in read_records(args.input):
+                writer.write(record)
+        print(f"{args.output}: {writer.count} 局")
+    elif args.command == "stats":
+        games = plies = black_wins = white_wins = draws = 0
+        for record in read_records(args.input):
+            games += 1
+            plies += len(record)
+            if record.finished:
+                if record.black_discs > record.white_discs:
+                    black_wins += 1
+                elif record.black_discs < record.white_discs:
+                    white_wins += 1
+                else:
+                    draws += 1
+        print(f"{games} 局, 平均 {plies / games if games else 0:.1f} 手")
+        print(f"黒の勝ち {black_wins} / 白の勝ち {white_wins} / 引き分け {draws}")
+    elif args.command == "show":
+        for game_id, record in enumerate(read_records(args.input)):
+            if game_id == args.game:
+                break
+        else:
+            print(f"{args.game} 局目はありません")
+            return 1
+        replay = record.replay()
+        ply = len(replay) if args.ply is None else args.ply
+        print(record.to_text())
+        print_board(*replay.position(ply))
+    else:
+        from simulate import make_engine # 探索エンジンは解析のときだけ読み込む
+
+        engine = make_engine(args.engine)
+        if not hasattr(engine, "engine"):
+            parser.error("analyze には search / depth エンジンを指定してください")
+        output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        try:
+            analyze(read_records(args.input), engine.engine, output)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,386 @@
+"""
+オセロ AI (反復深化 negamax + αβ 枝刈り + 置換表)
+
+- 盤面は bitboard.py のビットボード (手番側 own / 相手側 opp の 64bit 整数) で扱う
+- 置換表は Zobrist ハッシュをキーにしたサイズ固定のテーブル (深さ優先 + 世代で置き換え)
+- 1手あたりの持ち時間 (秒) を使い切るまで深さを1ずつ増やして探索する
+- 空きマスが ENDGAME_EMPTIES 以下になったら endgame.py の終盤完全読みに切り替える
+- 定石ブック (book.py) を渡すと、ブックに載っている序盤の局面では探索せずにブックの手を打つ
+- ComputerPlayer は探索を別プロセスで行うので、pygame の描画ループを止めない
+"""
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bitboard import BitBoard, flips_mask, iter_squares, legal_moves_mask
+
+# --- 評価関数 ---
+# マスごとの重み (角は高く、角の隣は低く)
+SQUARE_WEIGHTS = (
+    100, -20,  10,   5,   5,  10, -20, 100,
+    -20, -50,  -2,  -2,  -2,  -2, -50, -20,
+     10,  -2,  -1,  -1,  -1,  -1,  -2,  10,
+      5,  -2,  -1,  -1,  -1,  -1,  -2,   5,
+      5,  -2,  -1,  -1,  -1,  -1,  -2,   5,
+     10,  -2,  -1,  -1,  -1,  -1,  -2,  10,
+    -20, -50,  -2,  -2,  -2,  -2, -50, -20,
+    100, -20,  10,   5,   5,  10, -20, 100,
+)
+MOBILITY_WEIGHT = 10
+DISC_SCORE = 10000 # 終局時の石差1個あたりの評価値 (評価関数の値より必ず大きくする)
+INFINITY = 64 * DISC_SCORE + 1
+
+# 置換表エントリの種類
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# この深さ以上のノードでは、相手の合法手数が少ない順 (fastest-first) に並べる
+MOBILITY_ORDERING_DEPTH = 3
+
+# 空きマスがこの数以下になったら終盤完全読み (endgame.py) に切り替える
+ENDGAME_EMPTIES = 12
+# 完全読みに使う持ち時間の割合 (読み切れなければ残りの時間で通常の探索を行う)
+ENDGAME_TIME_SHARE = 0.5
+
+
+def _byte_tables(values, combine):
+    """マスごとの値から、8バイト x 256通りの参照テーブルを作る"""
+    tables = []
+    for i in range(8):
+        table = [0] * 256
+        for byte in range(256):
+            acc = 0
+            for k in range(8):
+                if byte >> k & 1:
+                    acc = combine(acc, values[i * 8 + k])
+            table[byte] = acc
+        tables.append(table)
+    return tables
+
+
+_WEIGHT_TABLES = _byte_tables(SQUARE_WEIGHTS, lambda a, b: a + b)
+
+# Zobrist ハッシュ用の乱数 (手番側 / 相手側の石ごと)。再現性のため seed 固定
+_rng = random.Random(0x0DE110)
+ZOBRIST_OWN = [_rng.getrandbits(64) for _ in range(64)]
+ZOBRIST_OPP = [_rng.getrandbits(64) for _ in range(64)]
+_ZOBRIST_OWN_TABLES = _byte_tables(ZOBRIST_OWN, lambda a, b: a ^ b)
+_ZOBRIST_OPP_TABLES = _byte_tables(ZOBRIST_OPP, lambda a, b: a ^ b)
+
+# 静的な手の優先順 (重みの大きいマスから)
+_SQUARE_RANK = [0] * 64
+for _rank, _sq in enumerate(sorted(range(64), key=lambda s: -SQUARE_WEIGHTS[s])):
+    _SQUARE_RANK[_sq] = _rank
+
+
+def weighted_sum(mask):
+    """mask に含まれるマスの重みの合計"""
+    t = _WEIGHT_TABLES
+    return (t[0][mask & 0xFF] + t[1][mask >> 8 & 0xFF] + t[2][mask >> 16 & 0xFF]
+            + t[3][mask >> 24 & 0xFF] + t[4][mask >> 32 & 0xFF] + t[5][mask >> 40 & 0xFF]
+            + t[6][mask >> 48 & 0xFF] + t[7][mask >> 56 & 0xFF])
+
+
+def position_hash(own, opp):
+    """手番側から見た局面の Zobrist ハッシュ (各マスの乱数の XOR をバイト単位の表で計算)"""
+    a = _ZOBRIST_OWN_TABLES
+    b = _ZOBRIST_OPP_TABLES
+    h = 0
+    for i in range(8):
+        shift = i * 8
+        h ^= a[i][own >> shift & 0xFF] ^ b[i][opp >> shift & 0xFF]
+    return h
+
+
+def evaluate(own, opp, own_moves=None):
+    """手番側から見た静的評価値 (マスの重み + 合法手数の差)。own_moves は計算済みなら渡す"""
+    if own_moves is None:
+        own_moves = legal_moves_mask(own, opp)
+    mobility = own_moves.bit_count() - legal_moves_mask(opp, own).bit_count()
+    return weighted_sum(own) - weighted_sum(opp) + MOBILITY_WEIGHT * mobility
+
+
+def final_score(own, opp):
+    """終局時の評価値 (石差ベース。空きマスは勝った側に加算)"""
+    diff = own.bit_count() - opp.bit_count()
+    empties = 64 - own.bit_count() - opp.bit_count()
+    if diff > 0:
+        diff += empties
+    elif diff < 0:
+        diff -= empties
+    return diff * DISC_SCORE
+
+
+class SearchTimeout(Exception):
+    """持ち時間切れで探索を打ち切るときに送出する"""
+
+
+# --- 置換表 ---
+class TranspositionTable:
+    """サイズ固定の置換表。同じスロットが埋まっていたら、古い世代か深さが浅い方を置き換える"""
+
+    def __init__(self, size=1 << 18):
+        size = 1 << (max(size, 1).bit_length() - 1) # 2 のべき乗に切り下げ
+        self.mask = size - 1
+        self.slots = [None] * size
+        self.generation = 0
+
+    def new_search(self):
+        """探索ごとに世代を進める (前の手の探索結果は置き換えられやすくなる)"""
+        self.generation = (self.generation + 1) & 0xFF
+
+    def clear(self):
+        self.slots = [None] * (self.mask + 1)
+
+    def probe(self, key):
+        """(depth, value, flag, move) を返す。見つからなければ None"""
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry[1:5]
+        return None
+
+    def store(self, key, depth, value, flag, move):
+        index = key & self.mask
+        old = self.slots[index]
+        if (old is None or old[0] == key or old[5] != self.generation or depth >= old[1]):
+            self.slots[index] = (key, depth, value, flag, move, self.generation)
+
+
+# --- 探索エンジン ---
+class SearchEngine:
+    def __init__(self, time_limit=1.0, max_depth=60, tt_size=1 << 18, table=None,
+                 endgame_empties=ENDGAME_EMPTIES, book=None, depth_offset=0, stop_event=None):
+        # endgame.py / book.py がこのモジュールを import するので、ここで読み込む
+        from book import OpeningBook
+        from endgame import EndgameSolver
+
+        self.time_limit = time_limit # 1手あたりの持ち時間 (秒)
+        self.max_depth = max_depth
+        self.tt = table if table is not None else TranspositionTable(tt_size)
+        self.endgame_empties = endgame_empties # 0 なら完全読みを使わない
+        self.endgame = EndgameSolver(tt_size) # 評価値の尺度が違うので置換表は別に持つ
+        self.book = OpeningBook(book) if isinstance(book, str) else book # ファイル名か OpeningBook
+        # 並列探索 (parallel_search.py) 用: 反復深化を depth_offset だけ深い段から始める / stop_event が立ったら打ち切る
+        self.depth_offset = depth_offset
+        self.stop_event = stop_event
+        self.nodes = 0
+        self.last_info = {}
+        self._deadline = 0.0
+
+    def search(self, board, player):
+        """board (Board / BitBoard) の player の最善手 (row, col) を返す。打てる手がなければ None"""
+        if not isinstance(board, BitBoard):
+            board = BitBoard.from_grid(board.board)
+        own, opp = board.discs(player)
+        sq = self.search_square(own, opp)
+        return None if sq is None else (sq >> 3, sq & 7)
+
+    def search_square(self, own, opp):
+        """手番側 own の最善手のマス番号を返す。打てる手がなければ None"""
+        moves = legal_moves_mask(own, opp)
+        if not moves:
+            return None
+
+        if self.book is not None and (own | opp).bit_count() - 4 < self.book.plies:
+            sq = self.book.best_move(own, opp)
+            if sq is not None:
+                self.last_info = {"depth": 0, "score": 0, "exact": False, "book": True,
+                                  "nodes": 0, "time": 0.0, "nps": 0}
+                return sq
+
+        start = time.perf_counter()
+        self._deadline = start + self.time_limit
+        self.nodes = 0
+        self.tt.new_search()
+        ordered = self._order_moves(own, opp, moves, -1, 0)
+        best_move, best_score, completed = ordered[0], 0, 0
+        empties = 64 - (own | opp).bit_count()
+        exact = False
+
+        if moves & (moves - 1) and empties <= self.endgame_empties:
+            try:
+                disc_diff, best_move = self.endgame.solve_square(
+                    own, opp, self.time_limit * ENDGAME_TIME_SHARE)
+            except SearchTimeout:
+                pass # 読み切れなかったので通常の探索に任せる
+            else:
+                best_score, completed, exact = disc_diff * DISC_SCORE, empties, True
+            self.nodes += self.endgame.nodes
+
+        if moves & (moves - 1) and not exact: # 合法手が1つだけなら探索しない
+            max_depth = min(self.max_depth, empties)
+            for depth in range(min(1 + self.depth_offset, max_depth), max_depth + 1):
+                try:
+                    best_score, best_move = self._search_root(own, opp, depth, ordered, best_move)
+                except SearchTimeout:
+                    break
+                completed = depth
+
+        elapsed = time.perf_counter() - start
+        self.last_info = {
+            "depth": completed,
+            "score": best_score,
+            "exact": exact, # True なら終盤完全読みの結果 (score は石差 x DISC_SCORE)
+            "book": False,
+            "nodes": self.nodes,
+            "time": elapsed,
+            "nps": int(self.nodes / elapsed) if elapsed > 0 else 0,
+        }
+        return best_move
+
+    def _search_root(self, own, opp, depth, ordered, previous_best):
+        """ルート局面を深さ depth で探索し (評価値, 最善手) を返す"""
+        moves = [previous_best] + [sq for sq in ordered if sq != previous_best]
+        alpha, beta = -INFINITY, INFINITY
+        best_move = previous_best
+        for sq in moves:
+            flips = flips_mask(own, opp, sq)
+            new_own = own | flips | (1 << sq)
+            new_opp = opp & ~flips
+            score = -self._negamax(new_opp, new_own, depth - 1, -beta, -alpha)
+            if score > alpha:
+                alpha = score
+                best_move = sq
+        self.tt.store(position_hash(own, opp), depth, alpha, EXACT, best_move)
+        return alpha, best_move
+
+    def _negamax(self, own, opp, depth, alpha, beta):
+        self.nodes += 1
+        if not self.nodes & 0x3FF and (time.perf_counter() > self._deadline
+                                       or self.stop_event is not None and self.stop_event.is_set()):
+            raise SearchTimeout
+
+        moves = legal_moves_mask(own, opp)
+        if not moves:
+            if not legal_moves_mask(opp, own):
+                return final_score(own, opp)
+            return -self._negamax(opp, own, depth, -beta, -alpha) # パス
+        if depth <= 0:
+            return evaluate(own, opp, moves)
+
+        key = position_hash(own, opp)
+        entry = self.tt.probe(key)
+        tt_move = -1
+        if entry is not None:
+            tt_depth, tt_value, tt_flag, tt_move = entry
+            if tt_depth >= depth:
+                if tt_flag == EXACT:
+                    return tt_value
+                if tt_flag == LOWER and tt_value > alpha:
+                    alpha = tt_value
+                elif tt_flag == UPPER and tt_value < beta:
+                    beta = tt_value
+                if alpha >= beta:
+                    return tt_value
+
+        alpha_orig = alpha
+        best_score = -INFINITY
+        best_move = -1
+        for sq in self._order_moves(own, opp, moves, tt_move, depth):
+            flips = flips_mask(own, opp, sq)
+            new_own = own | flips | (1 << sq)
+            new_opp = opp & ~flips
+            score = -self._negamax(new_opp, new_own, depth - 1, -beta, -alpha)
+            if score > best_score:
+                best_score = score
+                best_move = sq
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, best_score, flag, best_move)
+        return best_score
+
+    def _order_moves(self, own, opp, moves, tt_move, depth):
+        """置換表の手 -> (深いノードでは) 相手の合法手が少ない手 -> 重みの大きいマスの順に並べる"""
+        squares = list(iter_squares(moves))
+        if depth >= MOBILITY_ORDERING_DEPTH:
+            def key(sq):
+                flips = flips_mask(own, opp, sq)
+                reply = legal_moves_mask(opp & ~flips, own | flips | (1 << sq))
+                return reply.bit_count() * 64 + _SQUARE_RANK[sq]
+            squares.sort(key=key)
+        else:
+            squares.sort(key=_SQUARE_RANK.__getitem__)
+        if tt_move >= 0 and moves >> tt_move & 1:
+            squares.remove(tt_move)
+            squares.insert(0, tt_move)
+        return squares
+
+
+# --- 別プロセスで探索するコンピュータプレイヤー ---
+_worker_engine = None
+
+
+def _init_worker(engine_options):
+    """探索用プロセスの初期化 (置換表は手をまたいで使い回す)"""
+    global _worker_engine
+    _worker_engine = SearchEngine(**engine_options)
+
+
+def _search_in_worker(black, white, player):
+    move = _worker_engine.search(BitBoard(black, white), player)
+    return move, _worker_engine.last_info
+
+
+class ComputerPlayer:
+    """探索を別プロセスで実行するコンピュータプレイヤー。start() で開始し、poll() で結果を受け取る。
+    workers に 2 以上を渡すと parallel_search.py の並列探索 (Lazy SMP) を使う"""
+
+    def __init__(self, player, time_limit=1.0, workers=1, **engine_options):
+        self.player = player
+        self.last_info = {}
+        self._future = None
+        self._parallel = None
+        self._executor = None
+        if workers > 1:
+            from parallel_search import ParallelSearch # parallel_search.py がこのモジュールを import する
+
+            self._parallel = ParallelSearch(workers, time_limit=time_limit, **engine_options)
+            return
+        engine_options["time_limit"] = time_limit
+        self._executor = ProcessPoolExecutor(
+            max_workers=1, initializer=_init_worker, initargs=(engine_options,))
+
+    @property
+    def thinking(self):
+        if self._parallel is not None:
+            return self._parallel.thinking
+        return self._future is not None
+
+    def start(self, board):
+        """board の局面で探索を開始する (すでに探索中なら何もしない)"""
+        if self.thinking:
+            return
+        if not isinstance(board, BitBoard):
+            board = BitBoard.from_grid(board.board)
+        if self._parallel is not None:
+            self._parallel.submit(*board.discs(self.player))
+            return
+        self._future = self._executor.submit(_search_in_worker, board.black, board.white, self.player)
+
+    def poll(self):
+        """探索が終わっていれば最善手 (row, col) を返す。まだなら None"""
+        if self._parallel is not None:
+            sq = self._parallel.poll()
+            if sq is None:
+                return None
+            self.last_info = self._parallel.last_info
+            return sq >> 3, sq & 7
+        if self._future is None or not self._future.done():
+            return None
+        move, self.last_info = self._future.result()
+        self._future = None
+        return move
+
+    def close(self):
+        if self._parallel is not None:
+            self._parallel.close()
+        else:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,231 @@
+"""
+ヘッドレス対局シミュレータ (pygame 不要)
+
+2つのエンジンで N 局を自己対局させ、1局1行の棋譜 (JSON Lines) と勝敗の集計、
+1秒あたりの対局数を出力する。対局はプロセスプールに分配するので、コア数に比例して速くなる。
+
+使い方:
+    python simulate.py --engine-a search:0.05 --engine-b greedy --games 1000 --workers 8 --output games.jsonl
+
+エンジン指定:
+    random        ランダムに打つ
+    greedy        ひっくり返せる石が最も多い手
+    weighted      マスの重みが最も大きい手
+    search[:秒]   反復深化 αβ 探索 (1手あたりの持ち時間。既定 0.1 秒)
+    depth:N       深さ N 固定の αβ 探索 (持ち時間なし。対局ごとに置換表を空にするので再現性がある)
+
+--book に定石ブック (book.py で作成) を渡すと、search / depth エンジンが序盤にブックを使う。
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from bitboard import (
+    BLACK_PLAYER, WHITE_PLAYER, flips_mask, iter_squares, legal_moves_mask,
+    INITIAL_BLACK, INITIAL_WHITE, square_to_notation,
+)
+from search import SQUARE_WEIGHTS, SearchEngine
+
+
+# --- エンジン ---
+# どのエンジンも select(own, opp) で手番側 own の打つマス番号を返す (合法手がある局面でのみ呼ばれる)
+class RandomEngine:
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def select(self, own, opp):
+        return self.rng.choice(list(iter_squares(legal_moves_mask(own, opp))))
+
+
+class GreedyEngine:
+    def select(self, own, opp):
+        return max(iter_squares(legal_moves_mask(own, opp)),
+                   key=lambda sq: flips_mask(own, opp, sq).bit_count())
+
+
+class WeightedEngine:
+    def select(self, own, opp):
+        return max(iter_squares(legal_moves_mask(own, opp)), key=SQUARE_WEIGHTS.__getitem__)
+
+
+class SearchEngineAdapter:
+    def __init__(self, engine):
+        self.engine = engine
+
+    def select(self, own, opp):
+        return self.engine.search_square(own, opp)
+
+    def new_game(self):
+        """置換表を空にする (前の対局の探索結果で手が変わらないように、対局ごとに呼ぶ)"""
+        for table in (self.engine.tt, self.engine.endgame.tt):
+            table.clear()
+            table.generation = 0
+
+
+def make_engine(spec, seed=None, book=None):
+    """エンジン指定文字列からエンジンを作る (book は search / depth エンジンが使う定石ブック)"""
+    name, _, arg = spec.partition(":")
+    if name == "random":
+        return RandomEngine(seed)
+    if name == "greedy":
+        return GreedyEngine()
+    if name == "weighted":
+        return WeightedEngine()
+    if name == "search":
+        return SearchEngineAdapter(SearchEngine(time_limit=float(arg) if arg else 0.1, book=book))
+    if name == "depth":
+        return SearchEngineAdapter(SearchEngine(time_limit=float("inf"), max_depth=int(arg), book=book))
+    raise ValueError(f"不明なエンジン指定です: {spec}")
+
+
+# --- 1局の対局 ---
+def play_game(black_engine, white_engine):
+    """1局対局して (着手のマス番号のリスト, 黒の石数, 白の石数) を返す。パスは着手リストに含めない"""
+    discs = {BLACK_PLAYER: INITIAL_BLACK, WHITE_PLAYER: INITIAL_WHITE}
+    engines = {BLACK_PLAYER: black_engine, WHITE_PLAYER: white_engine}
+    player = BLACK_PLAYER
+    opponent = WHITE_PLAYER
+    moves = []
+    passed = False
+    while True:
+        own, opp = discs[player], discs[opponent]
+        if legal_moves_mask(own, opp):
+            sq = engines[player].select(own, opp)
+            flips = flips_mask(own, opp, sq)
+            discs[player] = own | flips | (1 << sq)
+            discs[opponent] = opp & ~flips
+            moves.append(sq)
+            passed = False
+        elif passed:
+            break # 両者とも打てない -> 終局
+        else:
+            passed = True
+        player, opponent = opponent, player
+    return moves, discs[BLACK_PLAYER].bit_count(), discs[WHITE_PLAYER].bit_count()
+
+
+# --- ワーカープロセス ---
+_worker_state = {}
+
+
+def _init_worker(engine_a, engine_b, seed, book=None):
+    _worker_state["specs"] = (engine_a, engine_b)
+    _worker_state["seed"] = seed
+    _worker_state["book"] = book
+    _worker_state["engines"] = {}
+
+
+def _worker_engine(spec, game_id):
+    # random はゲームごとに seed を変える。それ以外はプロセス内で使い回す (定石ブックの読み込みは1度だけ)
+    if spec.startswith("random"):
+        return make_engine(spec, seed=_worker_state["seed"] * 1000003 + game_id)
+    engines = _worker_state["engines"]
+    if spec not in engines:
+        engines[spec] = make_engine(spec, book=_worker_state["book"])
+    engine = engines[spec]
+    if spec.startswith("depth"):
+        engine.new_game() # 置換表を引き継ぐと、同じワーカーで前に打った対局によって手が変わる
+    return engine
+
+
+def _play_one(task):
+    game_id, swap = task
+    engine_a, engine_b = _worker_state["specs"]
+    black_spec, white_spec = (engine_b, engine_a) if swap else (engine_a, engine_b)
+    moves, black_discs, white_discs = play_game(
+        _worker_engine(black_spec, game_id), _worker_engine(white_spec, game_id))
+    return swap, {
+        "game": game_id,
+        "black": black_spec,
+        "white": white_spec,
+        "moves": "".join(square_to_notation(sq) for sq in moves),
+        "black_discs": black_discs,
+        "white_discs": white_discs,
+    }
+
+
+# --- 集計 ---
+def summarize(records, engine_a, engine_b, elapsed):
+    """(A が白番か, 黒の石数, 白の石数) のリストから、エンジン A から見た勝敗と石差、対局速度を集計する"""
+    wins = losses = draws = 0
+    diff_total = 0
+    for a_is_white, black_discs, white_discs in records:
+        diff = black_discs - white_discs
+        if a_is_white:
+            diff = -diff
+        diff_total += diff
+        if diff > 0:
+            wins += 1
+        elif diff < 0:
+            losses += 1
+        else:
+            draws += 1
+    games = len(records)
+    return {
+        "engine_a": engine_a,
+        "engine_b": engine_b,
+        "games": games,
+        "a_wins": wins,
+        "b_wins": losses,
+        "draws": draws,
+        "a_score": (wins + 0.5 * draws) / games if games else 0.0,
+        "mean_disc_diff": diff_total / games if games else 0.0,
+        "elapsed": elapsed,
+        "games_per_second": games / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def run_simulation(engine_a, engine_b, games, workers=None, swap=True, seed=0, output=None, book=None):
+    """N 局をプロセスプールで対局させ、集計結果を返す。output を渡すと1局ずつ JSON Lines で書き出す"""
+    workers = workers or os.cpu_count() or 1
+    tasks = [(i, swap and i % 2 == 1) for i in range(games)]
+    chunksize = max(1, games // (workers * 8))
+    records = []
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(engine_a, engine_b, seed, book)) as pool:
+        for swapped, rec in pool.imap_unordered(_play_one, tasks, chunksize):
+            records.append((swapped, rec["black_discs"], rec["white_discs"]))
+            if output is not None:
+                output.write(json.dumps(rec, separators=(",", ":")) + "\n")
+    elapsed = time.perf_counter() - start
+    return summarize(records, engine_a, engine_b, elapsed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="オセロのヘッドレス自己対局シミュレータ")
+    parser.add_argument("--engine-a", default="search:0.1", help="エンジン A (偶数番目の対局で黒番)")
+    parser.add_argument("--engine-b", default="random", help="エンジン B (偶数番目の対局で白番)")
+    parser.add_argument("--games", type=int, default=100, help="対局数")
+    parser.add_argument("--workers", type=int, default=None, help="プロセス数 (既定: CPU コア数)")
+    parser.add_argument("--no-swap", action="store_true", help="先後を入れ替えない (既定では1局ごとに入れ替える)")
+    parser.add_argument("--seed", type=int, default=0, help="random エンジンの乱数 seed")
+    parser.add_argument("--output", help="棋譜の出力先 (JSON Lines)")
+    parser.add_argument("--book", help="search / depth エンジンが使う定石ブック")
+    args = parser.parse_args(argv)
+
+    for spec in (args.engine_a, args.engine_b):
+        make_engine(spec) # 指定ミスは対局開始前に検出する
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    try:
+        stats = run_simulation(args.engine_a, args.engine_b, args.games, args.workers,
+                               swap=not args.no_swap, seed=args.seed, output=output,
+                               book=args.book)
+    finally:
+        if output is not None:
+            output.close()
+
+    print(f"{stats['engine_a']} vs {stats['engine_b']}: {stats['games']} 局")
+    print(f"  A の勝ち {stats['a_wins']} / B の勝ち {stats['b_wins']} / 引き分け {stats['draws']}"
+          f" (A の勝率 {stats['a_score']:.3f}, 平均石差 {stats['mean_disc_diff']:+.2f})")
+    print(f"  {stats['elapsed']:.2f} 秒, {stats['games_per_second']:.1f} 局/秒")
+    json.dump(stats, sys.stdout)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
 import sys
 import os
 import random
-import math
 import time # 点滅のために time.sleep は使わず QTimer を使う
 
 # PySide6 (Qt for Python) モジュールのインポート
@@ -15,29 +14,8 @@ from PySide6.QtGui import QFont, QPalette, QColor, QWheelEvent
 # サウンド再生のための pygame モジュールのインポート
 import pygame
 
-# --- Helper Function: Get Divisors ---
-def get_divisors(n):
-    """指定された正の整数の全ての正の約数をリストで返す"""
-    if n <= 0:
-        return []
-    divs = set()
-    for i in range(1, int(math.sqrt(n)) + 1):
-        if n % i == 0:
-            divs.add(i)
-            divs.add(n // i)
-    return sorted(list(divs))
-
-# --- Helper Function: is_prime ---
-def is_prime(n):
-    """素数判定関数"""
-    if n <= 1: return False
-    if n <= 3: return True
-    if n % 2 == 0 or n % 3 == 0: return False
-    i = 5
-    while i * i <= n:
-        if n % i == 0 or n % (i + 2) == 0: return False
-        i += 6
-    return True
+# 素数判定・約数のヒント用の表
+from numeric import get_table
 
 # --- メインアプリケーションクラス ---
 class NumberGuessApp(QWidget):
@@ -222,6 +200,7 @@ class NumberGuessApp(QWidget):
     def start_new_game(self):
         """新しいゲームを開始する"""
         self.target_number = random.randint(self.lower_bound, self.upper_bound)
+        self.number_table = get_table(self.upper_bound) # 範囲分の表は最初のゲームで1度だけ作る
         self.guesses_left = self.max_guesses
         self.turn = 1
         self.hint3_range_delta = 50
@@ -293,19 +272,13 @@ class NumberGuessApp(QWidget):
                 num_cd = -1
                 while num_cd == -1 or num_cd == self.target_number:
                     num_cd = random.randint(self.lower_bound, self.upper_bound)
-                common_divisor_val = math.gcd(self.target_number, num_cd)
-                if common_divisor_val > 1:
-                    all_divs_of_gcd = get_divisors(common_divisor_val)
-                    possible_hints = [d for d in all_divs_of_gcd if d > 1]
-                    if possible_hints:
-                        chosen_hint_divisor = random.choice(possible_hints)
-                        hint_text += f"{chosen_hint_divisor} は、正解の数と {num_cd} の公約数です。"
-                    else:
-                         hint_text += f"正解の数と {num_cd} の最大公約数は {common_divisor_val} です。(内部エラー?)"
+                _, chosen_hint_divisor = self.number_table.common_divisor_hint(self.target_number, num_cd)
+                if chosen_hint_divisor is not None:
+                    hint_text += f"{chosen_hint_divisor} は、正解の数と {num_cd} の公約数です。"
                 else:
                     hint_text += f"正解の数と {num_cd} は、1以外に公約数を持ちません（互いに素です）。"
         elif hint_type == 2:
-            if is_prime(self.target_number):
+            if self.number_table.is_prime(self.target_number):
                 hint_text += "正解の数は素数です。"
             else:
                 hint_text += "正解の数は素数ではありません。"
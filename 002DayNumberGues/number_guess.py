@@ -1,31 +1,9 @@
 import random
-import math
 import sys
 import datetime
 import pytz
 
-# --- Helper Function: Get Divisors ---
-def get_divisors(n):
-    """指定された正の整数の全ての正の約数をリストで返す"""
-    if n <= 0:
-        return []
-    divs = set()
-    for i in range(1, int(math.sqrt(n)) + 1):
-        if n % i == 0:
-            divs.add(i)
-            divs.add(n // i)
-    return sorted(list(divs)) # ソートして返す
-
-# --- Helper Function: is_prime (変更なし) ---
-def is_prime(n):
-    if n <= 1: return False
-    if n <= 3: return True
-    if n % 2 == 0 or n % 3 == 0: return False
-    i = 5
-    while i * i <= n:
-        if n % i == 0 or n % (i + 2) == 0: return False
-        i += 6
-    return True
+from numeric import get_table
 
 # --- Main Game Function (Ver.4) ---
 def play_game_v4():
@@ -40,6 +18,7 @@ def play_game_v4():
     lower_bound = 1
     upper_bound = 1000
     target_number = random.randint(lower_bound, upper_bound)
+    table = get_table(upper_bound) # 素数判定・約数のヒント用の表 (範囲分を1度だけ作る)
 
     max_guesses = 5
     guesses_left = max_guesses
@@ -83,23 +62,17 @@ def play_game_v4():
                     while num_cd == -1 or num_cd == target_number:
                         num_cd = random.randint(lower_bound, upper_bound)
 
-                    common_divisor_val = math.gcd(target_number, num_cd)
-
-                    if common_divisor_val > 1:
-                        all_divs_of_gcd = get_divisors(common_divisor_val)
-                        # 1以外の約数リスト
-                        possible_hints = [d for d in all_divs_of_gcd if d > 1]
-                        if possible_hints:
-                            chosen_hint_divisor = random.choice(possible_hints)
-                            print(f"ヒント1: {chosen_hint_divisor} は、正解の数と {num_cd} の公約数です。")
-                        else: # GCD>1 なのに 1以外の約数がない? (通常発生しないはず)
-                             print(f"ヒント1: 正解の数と {num_cd} の最大公約数は {common_divisor_val} です。(内部エラー?)")
+                    # 最大公約数の1以外の約数から1つ選ぶ (互いに素なら None)
+                    _, chosen_hint_divisor = table.common_divisor_hint(target_number, num_cd)
+
+                    if chosen_hint_divisor is not None:
+                        print(f"ヒント1: {chosen_hint_divisor} は、正解の数と {num_cd} の公約数です。")
                     else: # gcd == 1
                         print(f"ヒント1: 正解の数と {num_cd} は、1以外に公約数を持ちません（互いに素です）。")
 
             elif hint_choice == '2':
                 # ヒント2: 素数ヒント (変更なし)
-                if is_prime(target_number):
+                if table.is_prime(target_number):
                     print("ヒント2: 正解の数は素数です。")
                 else:
                     print("ヒント2: 正解の数は素数ではありません。")
@@ -0,0 +1,150 @@
+"""
+数当てゲームのヒント用の整数の表 (最小素因数の篩)
+
+1 から上限までの各整数の最小素因数を array('I') に1度だけ作っておき、
+素数判定・素因数分解・約数の列挙を、割り算を繰り返さずに表を引くだけで求める (素因数分解は O(log n))。
+1要素 4 バイトなので、上限 10^7 でも約 40MB で作れる。
+
+使い方 (表の作成時間と、割り算による方法との照合):
+    python numeric.py --limit 10000000
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from array import array
+
+
+def trial_is_prime(n):
+    """割り算による素数判定 (表の範囲外の数と照合に使う)"""
+    if n <= 1: return False
+    if n <= 3: return True
+    if n % 2 == 0 or n % 3 == 0: return False
+    i = 5
+    while i * i <= n:
+        if n % i == 0 or n % (i + 2) == 0: return False
+        i += 6
+    return True
+
+
+def trial_divisors(n):
+    """割り算による約数の列挙 (表の範囲外の数と照合に使う)"""
+    if n <= 0:
+        return []
+    divs = set()
+    for i in range(1, math.isqrt(n) + 1):
+        if n % i == 0:
+            divs.add(i)
+            divs.add(n // i)
+    return sorted(divs)
+
+
+class NumberTable:
+    """1 から limit までの最小素因数の表。spf[n] が 0 の n (2 以上) は素数"""
+
+    def __init__(self, limit):
+        self.limit = max(limit, 1)
+        size = self.limit + 1
+        root = math.isqrt(self.limit)
+
+        # まずエラトステネスの篩で √limit 以下の素数を求める
+        composite = bytearray(root + 1)
+        primes = []
+        for p in range(2, root + 1):
+            if not composite[p]:
+                primes.append(p)
+                composite[p * p::p] = b"\x01" * len(range(p * p, root + 1, p))
+
+        # 大きい素数から順に倍数へ書き込み、小さい素数で上書きする (最後に残るのが最小素因数)
+        self.spf = array("I", [0]) * size
+        for p in reversed(primes):
+            self.spf[p * p::p] = array("I", [p]) * len(range(p * p, size, p))
+
+    def __contains__(self, n):
+        return 1 <= n <= self.limit
+
+    def is_prime(self, n):
+        if n not in self:
+            return trial_is_prime(n)
+        return n >= 2 and self.spf[n] == 0
+
+    def smallest_prime_factor(self, n):
+        return self.spf[n] or n
+
+    def factorize(self, n):
+        """素因数分解を [(素数, 指数), ...] (素数の小さい順) で返す"""
+        if n not in self:
+            raise ValueError(f"{n} は表の範囲 (1-{self.limit}) の外です")
+        factors = []
+        while n > 1:
+            p = self.spf[n] or n
+            exponent = 0
+            while n % p == 0:
+                n //= p
+                exponent += 1
+            factors.append((p, exponent))
+        return factors
+
+    def divisors(self, n):
+        """正の約数を小さい順のリストで返す (表の範囲外なら割り算で求める)"""
+        if n <= 0:
+            return []
+        if n not in self:
+            return trial_divisors(n)
+        divs = [1]
+        for p, exponent in self.factorize(n):
+            divs = [d * p ** k for d in divs for k in range(exponent + 1)]
+        divs.sort()
+        return divs
+
+    def common_divisor_hint(self, a, b, rng=random):
+        """a と b の 1 より大きい公約数を1つ選んで (最大公約数, 選んだ公約数) を返す。互いに素なら (1, None)"""
+        g = math.gcd(a, b)
+        if g <= 1:
+            return g, None
+        return g, rng.choice(self.divisors(g)[1:])
+
+
+_tables = {}
+
+
+def get_table(limit):
+    """limit 以上の範囲を持つ表 (同じプロセスでは作った表を使い回す)"""
+    for size, table in _tables.items():
+        if size >= limit:
+            return table
+    table = _tables[limit] = NumberTable(limit)
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="最小素因数の表の作成時間と照合")
+    parser.add_argument("--limit", type=int, default=10_000_000, help="表の上限")
+    parser.add_argument("--samples", type=int, default=2000, help="割り算による方法と照合する数の個数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    table = NumberTable(args.limit)
+    build = time.perf_counter() - start
+    print(f"上限 {args.limit}: 作成 {build:.2f} 秒, {table.spf.itemsize * len(table.spf) / 1e6:.1f} MB")
+
+    rng = random.Random(args.seed)
+    samples = [rng.randint(1, args.limit) for _ in range(args.samples)]
+    start = time.perf_counter()
+    fast = [(table.is_prime(n), table.divisors(n)) for n in samples]
+    fast_time = time.perf_counter() - start
+    start = time.perf_counter()
+    slow = [(trial_is_prime(n), trial_divisors(n)) for n in samples]
+    slow_time = time.perf_counter() - start
+    print(f"{args.samples} 個の素数判定と約数: 表 {fast_time * 1e6 / args.samples:.1f} µs/個, "
+          f"割り算 {slow_time * 1e6 / args.samples:.1f} µs/個")
+    if fast != slow:
+        print("割り算による結果と一致しません", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
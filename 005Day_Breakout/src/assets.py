@@ -0,0 +1,131 @@
+"""
+アセット (サウンド・フォント・画像) の管理と効果音の再生
+
+- Assets: ファイルを1度だけ読み込んでキャッシュし、Game・Paddle・Ball・Brick で共有する
+- SoundPlayer: 予約したミキサーのチャンネルで効果音を鳴らす。物理のステップからは play() でキューに積むだけで、
+  フレームの終わりに flush() でまとめて鳴らす。空いているチャンネルがなければ一番古い音を止めて使う (ボイススティール)
+"""
+import os
+import sys
+from collections import deque
+
+import pygame
+
+ASSET_DIR = os.path.join(os.path.dirname(__file__), "assets")
+
+SOUNDS = {
+    "bounce": "sounds/bounce.wav",
+    "brick_break": "sounds/brick_break.wav",
+}
+FONTS = {
+    "info": "fonts/NotoSansJP-Regular.ttf",
+}
+
+
+class NullSound:
+    """音を鳴らさないサウンド (ヘッドレスで動かすとき、オーディオデバイスがなくても使える)"""
+
+    def play(self, *args, **kwargs):
+        pass
+
+
+class Assets:
+    def __init__(self, base_path=ASSET_DIR):
+        self.base_path = base_path
+        self.sounds = {}
+        self.fonts = {}
+        self.images = {}
+
+    def path(self, name):
+        return os.path.join(self.base_path, name)
+
+    def sound(self, name):
+        """SOUNDS の名前かファイル名からサウンドを返す。ミキサーが使えなければ NullSound"""
+        if name not in self.sounds:
+            if pygame.mixer.get_init() is None:
+                self.sounds[name] = NullSound()
+            else:
+                self.sounds[name] = pygame.mixer.Sound(self.path(SOUNDS.get(name, name)))
+        return self.sounds[name]
+
+    def font(self, name, size):
+        """FONTS の名前かファイル名のフォント。ファイルがなければ pygame の標準フォントを使う"""
+        key = (name, size)
+        if key not in self.fonts:
+            path = self.path(FONTS.get(name, name)) if name else None
+            if path is not None and not os.path.exists(path):
+                print(f"フォントが見つからないため標準フォントを使います: {path}", file=sys.stderr)
+                path = None
+            self.fonts[key] = pygame.font.Font(path, size)
+        return self.fonts[key]
+
+    def image(self, name):
+        """画像を読み込む (ウィンドウがあれば画面と同じ形式に変換しておく)"""
+        if name not in self.images:
+            image = pygame.image.load(self.path(name))
+            if pygame.display.get_surface() is not None:
+                image = image.convert_alpha()
+            self.images[name] = image
+        return self.images[name]
+
+    def preload(self, sounds=(), fonts=(), images=()):
+        """ゲームが始まる前に読み込んでおく。fonts は (名前, サイズ) の並び"""
+        for name in sounds:
+            self.sound(name)
+        for name, size in fonts:
+            self.font(name, size)
+        for name in images:
+            self.image(name)
+
+
+_shared = None
+
+
+def get_assets():
+    """プロセス全体で共有する Assets"""
+    global _shared
+    if _shared is None:
+        _shared = Assets()
+    return _shared
+
+
+class SoundPlayer:
+    """予約したチャンネルで効果音を鳴らす。enabled=False (ヘッドレスなど) なら何もしない"""
+
+    def __init__(self, assets=None, channels=8, max_per_flush=4, enabled=True):
+        self.assets = assets or get_assets()
+        self.enabled = enabled and pygame.mixer.get_init() is not None
+        self.queue = deque()
+        self.max_per_flush = max_per_flush  # 1フレームで鳴らす数の上限 (連続でブロックを壊したとき)
+        self.channels = []
+        self.started = []  # チャンネルごとに鳴らし始めた順番
+        self.counter = 0
+        if self.enabled:
+            pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), channels))
+            pygame.mixer.set_reserved(channels)  # Sound.play() が勝手に使わないように予約する
+            self.channels = [pygame.mixer.Channel(i) for i in range(channels)]
+            self.started = [0] * channels
+
+    def play(self, name):
+        """効果音をキューに積む (すぐには鳴らさないので、物理の更新を止めない)"""
+        if self.enabled:
+            self.queue.append(name)
+
+    def _channel(self):
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                return i
+        return min(range(len(self.channels)), key=self.started.__getitem__)  # 一番古い音を止めて使う
+
+    def flush(self):
+        """キューの効果音を鳴らす (1フレームに1回呼ぶ)。同じフレームの同じ音は1回だけ鳴らす"""
+        played = set()
+        while self.queue:
+            name = self.queue.popleft()
+            if name in played or len(played) >= self.max_per_flush:
+                continue
+            played.add(name)
+            i = self._channel()
+            self.counter += 1
+            self.started[i] = self.counter
+            self.channels[i].play(self.assets.sound(name))
@@ -1,9 +1,16 @@
+import pygame
+
+from assets import get_assets
+
+
 class Ball:
-    def __init__(self, x, y, radius, color):
+    def __init__(self, x, y, radius, color, image=None):
+        """image に画像のファイル名を渡すと円の代わりに描く (読み込みは全インスタンスで共有)"""
         self.x = x
         self.y = y
         self.radius = radius
         self.color = color
+        self.image = get_assets().image(image) if image else None
         self.speed_x = 5
         self.speed_y = -5
 
@@ -26,4 +33,7 @@ class Ball:
             self.bounce()
 
     def draw(self, screen):
-        pygame.draw.circle(screen, self.color, (self.x, self.y), self.radius)
\ No newline at end of file
+        if self.image is not None:
+            screen.blit(self.image, self.image.get_rect(center=(self.x, self.y)))
+        else:
+            pygame.draw.circle(screen, self.color, (self.x, self.y), self.radius)
@@ -0,0 +1,238 @@
+"""
+ヘッドレスのブロック崩し環境 (強化学習やベンチマーク用)
+
+ウィンドウもオーディオデバイスも使わずに Game を固定ステップで進める。Gym に似た reset / step の API を持つ。
+
+- 行動: 0 = 左, 1 = 停止, 2 = 右
+- 観測: (ボールの x, ボールの y, ボールの x 速度, ボールの y 速度, パドルの x, 残りのブロック数, ライフ)
+- 報酬: 壊したブロックの数 - 落としたボールの数
+- render() で画面を NumPy 配列 (高さ, 幅, 3) として得られる (NumPy が必要)
+
+VectorEnv は複数の環境をまとめて進める。workers を指定すると環境を子プロセスに分けて並列に動かす。
+
+使い方 (ベンチマーク):
+    python breakout_env.py --envs 8 --workers 4 --steps 20000
+"""
+import argparse
+import multiprocessing
+import random
+import time
+
+import pygame
+
+from game import PADDLE_SPEED, Game
+
+ACTIONS = (-1, 0, 1)  # 行動の番号 -> パドルの移動方向
+
+
+class BreakoutEnv:
+    def __init__(self, max_steps=10000, frame_skip=1, level=None, seed=None):
+        """max_steps: 1エピソードのステップ数の上限 / frame_skip: 1回の step で同じ行動を続けるステップ数 /
+        level: 遊ぶステージ (levels.Level。省略すると元の 5x10。1エピソードは1ステージ)
+        """
+        pygame.font.init()
+        self.game = Game(headless=True)
+        self.rng = random.Random(seed)  # seed があればエピソードごとにボールを打ち出す向きを乱数にする
+        self.seeded = seed is not None
+        self.max_steps = max_steps
+        self.frame_skip = frame_skip
+        self.level = level
+        self.steps = 0
+
+    def observation(self):
+        game = self.game
+        return (game.ball_pos[0], game.ball_pos[1], float(game.ball_speed[0]), float(game.ball_speed[1]),
+                float(game.paddle.x), float(len(game.bricks)), float(game.lives))
+
+    def reset(self, seed=None):
+        """新しいエピソードを始めて (観測, 情報) を返す"""
+        game = self.game
+        if seed is not None:
+            self.rng.seed(seed)
+            self.seeded = True
+        if self.seeded:
+            game.seed = self.rng.getrandbits(32)
+        game.score = 0
+        game.lives = 3
+        game.initialize(self.level)
+        self.steps = 0
+        return self.observation(), {"score": 0}
+
+    def step(self, action):
+        """行動を frame_skip ステップ続けて (観測, 報酬, 終了, 打ち切り, 情報) を返す"""
+        game = self.game
+        game.paddle_direction = ACTIONS[action]
+        reward = 0.0
+        terminated = False
+        for _ in range(self.frame_skip):
+            score, lives = game.score, game.lives
+            game.update()
+            self.steps += 1
+            reward += (game.score - score) / 10
+            if game.lives < lives:
+                reward -= 1.0
+            terminated = game.lives <= 0 or not game.bricks
+            if terminated:
+                break
+        truncated = not terminated and self.steps >= self.max_steps
+        return self.observation(), reward, terminated, truncated, {"score": game.score}
+
+    def render(self):
+        """現在の画面を NumPy 配列 (高さ, 幅, 3) で返す"""
+        self.game.full_redraw = True
+        self.game.draw(self.game.screen)
+        return pygame.surfarray.array3d(self.game.screen).swapaxes(0, 1)
+
+    def close(self):
+        """Game が持つステージの読み込み用のスレッドとファイルを閉じる"""
+        self.game.close()
+
+
+def track_ball(observation):
+    """ボールの真下にパドルを動かすだけの制御 (ベンチマーク用)"""
+    ball_center = observation[0] + 5
+    paddle_center = observation[4] + 50
+    if ball_center < paddle_center - PADDLE_SPEED:
+        return 0
+    if ball_center > paddle_center + PADDLE_SPEED:
+        return 2
+    return 1
+
+
+# --- 複数の環境 ---
+def _step_all(envs, actions):
+    """各環境を1回進める。終わった環境は最後の観測を info に残して自動でリセットする"""
+    results = []
+    for env, action in zip(envs, actions):
+        observation, reward, terminated, truncated, info = env.step(action)
+        if terminated or truncated:
+            info["final_observation"] = observation
+            observation, _ = env.reset()
+        results.append((observation, reward, terminated, truncated, info))
+    return results
+
+
+def _worker_main(conn, count, options):
+    envs = [BreakoutEnv(**options) for _ in range(count)]
+    try:
+        while True:
+            command, data = conn.recv()
+            if command == "reset":
+                conn.send([env.reset(None if data is None else data + i) for i, env in enumerate(envs)])
+            elif command == "step":
+                conn.send(_step_all(envs, data))
+            elif command == "render":
+                conn.send([env.render() for env in envs])
+            elif command == "close":
+                break
+    finally:
+        for env in envs:
+            env.close()
+        conn.close()
+
+
+class VectorEnv:
+    """num_envs 個の BreakoutEnv をまとめて進める。workers > 0 なら環境を子プロセスに分ける"""
+
+    def __init__(self, num_envs, workers=0, **options):
+        self.num_envs = num_envs
+        self.envs = []
+        self.connections = []
+        self.processes = []
+        self.chunks = []
+        if workers <= 0:
+            self.envs = [BreakoutEnv(**options) for _ in range(num_envs)]
+            return
+        workers = min(workers, num_envs)
+        for i in range(workers):
+            count = num_envs // workers + (1 if i < num_envs % workers else 0)
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_worker_main, args=(child, count, options), daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+            self.chunks.append(count)
+
+    def _gather(self, command, per_worker):
+        for conn, data in zip(self.connections, per_worker):
+            conn.send((command, data))
+        results = []
+        for conn in self.connections:
+            results.extend(conn.recv())
+        return results
+
+    def reset(self, seed=None):
+        """全ての環境をリセットして (観測のリスト, 情報のリスト) を返す。環境 i の seed は seed + i"""
+        if self.envs:
+            results = [env.reset(None if seed is None else seed + i) for i, env in enumerate(self.envs)]
+        else:
+            starts = [sum(self.chunks[:i]) for i in range(len(self.chunks))]
+            results = self._gather("reset", [None if seed is None else seed + start for start in starts])
+        observations, infos = zip(*results)
+        return list(observations), list(infos)
+
+    def step(self, actions):
+        """各環境を1回進めて (観測, 報酬, 終了, 打ち切り, 情報) をそれぞれリストで返す"""
+        if self.envs:
+            results = _step_all(self.envs, actions)
+        else:
+            per_worker = []
+            start = 0
+            for count in self.chunks:
+                per_worker.append(actions[start:start + count])
+                start += count
+            results = self._gather("step", per_worker)
+        return tuple(list(values) for values in zip(*results))
+
+    def render(self):
+        if self.envs:
+            return [env.render() for env in self.envs]
+        return self._gather("render", [None] * len(self.connections))
+
+    def close(self):
+        for env in self.envs:
+            env.close()
+        self.envs = []
+        for conn in self.connections:
+            conn.send(("close", None))
+            conn.close()
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ヘッドレスのブロック崩し環境のベンチマーク")
+    parser.add_argument("--envs", type=int, default=8, help="環境の数")
+    parser.add_argument("--workers", type=int, default=0, help="子プロセスの数 (0 なら同じプロセスで動かす)")
+    parser.add_argument("--steps", type=int, default=20000, help="全環境の合計ステップ数")
+    parser.add_argument("--frame-skip", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with VectorEnv(args.envs, args.workers, frame_skip=args.frame_skip) as env:
+        observations, _ = env.reset(args.seed)
+        episodes = 0
+        total_reward = 0.0
+        start = time.perf_counter()
+        for _ in range(max(1, args.steps // args.envs)):
+            observations, rewards, terminated, truncated, _ = env.step([track_ball(obs) for obs in observations])
+            total_reward += sum(rewards)
+            episodes += sum(1 for t, u in zip(terminated, truncated) if t or u)
+        elapsed = time.perf_counter() - start
+    steps = max(1, args.steps // args.envs) * args.envs * args.frame_skip
+    print(f"環境 {args.envs} 個, 子プロセス {args.workers}: {steps} ステップ, {elapsed:.2f} 秒, "
+          f"{steps / elapsed:.0f} ステップ/秒")
+    print(f"終わったエピソード {episodes}, 報酬の合計 {total_reward:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,21 @@
+import pygame
+
+from assets import get_assets
+
+
 class Brick:
-    def __init__(self, x, y, width, height):
+    def __init__(self, x, y, width, height, image=None):
+        """image に画像のファイル名を渡すと矩形の代わりに描く (読み込みは全インスタンスで共有)"""
         self.rect = pygame.Rect(x, y, width, height)
         self.is_hit = False
+        self.image = get_assets().image(image) if image else None
 
     def draw(self, surface):
-        if not self.is_hit:
+        if self.is_hit:
+            return
+        if self.image is not None:
+            surface.blit(self.image, self.rect)
+        else:
             pygame.draw.rect(surface, (255, 0, 0), self.rect)
 
     def check_collision(self, ball):
@@ -12,4 +23,4 @@ class Brick:
             self.is_hit = True
             ball.reverse_direction()
             return True
-        return False
\ No newline at end of file
+        return False
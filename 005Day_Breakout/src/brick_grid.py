@@ -0,0 +1,112 @@
+"""
+ブロックの空間インデックス (一様グリッド)
+
+画面を一定の大きさのセルに分け、セルごとにそこに重なるブロックの番号を持つ。
+ボールの近くのセルだけを調べればよいので、ブロックが何千個あっても1ステップの判定の量はほぼ変わらない。
+ブロックの削除も、そのブロックが重なるセルから番号を消すだけで済む (リストの remove のような O(n) にならない)。
+
+使い方 (ベンチマーク):
+    python brick_grid.py --bricks 5000
+"""
+import argparse
+import random
+import time
+
+import pygame
+
+CELL_WIDTH = 80
+CELL_HEIGHT = 30
+
+
+class BrickGrid:
+    """ブロック (pygame.Rect) の集合。番号で削除でき、矩形に重なるブロックを近くのセルだけから探せる"""
+
+    def __init__(self, bricks=(), cell_width=CELL_WIDTH, cell_height=CELL_HEIGHT):
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.bricks = {}  # 番号 -> Rect (追加した順)
+        self.cells = {}   # (列, 行) -> そのセルに重なるブロックの番号の集合
+        self.next_id = 0
+        for rect in bricks:
+            self.add(rect)
+
+    def __len__(self):
+        return len(self.bricks)
+
+    def __iter__(self):
+        return iter(self.bricks.values())
+
+    def _cell_range(self, rect):
+        """rect が重なるセルの (列, 行)"""
+        left, right = rect.left // self.cell_width, (rect.right - 1) // self.cell_width
+        top, bottom = rect.top // self.cell_height, (rect.bottom - 1) // self.cell_height
+        for row in range(top, bottom + 1):
+            for col in range(left, right + 1):
+                yield col, row
+
+    def add(self, rect):
+        """ブロックを追加して番号を返す"""
+        brick_id = self.next_id
+        self.next_id += 1
+        self.bricks[brick_id] = pygame.Rect(rect)
+        for cell in self._cell_range(self.bricks[brick_id]):
+            self.cells.setdefault(cell, set()).add(brick_id)
+        return brick_id
+
+    def remove(self, brick_id):
+        """番号のブロックを削除して、その Rect を返す"""
+        rect = self.bricks.pop(brick_id)
+        for cell in self._cell_range(rect):
+            ids = self.cells[cell]
+            ids.discard(brick_id)
+            if not ids:
+                del self.cells[cell]
+        return rect
+
+    def query(self, rect):
+        """rect に重なるブロックを [(番号, Rect)] で返す"""
+        found = set()
+        for cell in self._cell_range(rect):
+            ids = self.cells.get(cell)
+            if ids:
+                found.update(ids)
+        return [(brick_id, self.bricks[brick_id]) for brick_id in found
+                if rect.colliderect(self.bricks[brick_id])]
+
+
+# --- ベンチマーク ---
+def random_bricks(count, width=800, height=400, seed=0):
+    """画面の上部に count 個の小さなブロックを敷き詰める (ベンチマーク用)"""
+    rng = random.Random(seed)
+    cols = max(1, int((count * width / height) ** 0.5))
+    rows = (count + cols - 1) // cols
+    brick_width, brick_height = width // cols, max(1, height // rows)
+    bricks = [pygame.Rect(col * brick_width, row * brick_height, max(1, brick_width - 2), max(1, brick_height - 2))
+              for row in range(rows) for col in range(cols)][:count]
+    probes = [pygame.Rect(rng.randrange(width), rng.randrange(height), 14, 14) for _ in range(1000)]
+    return bricks, probes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ブロックの当たり判定: リストの全件走査とグリッドの比較")
+    parser.add_argument("--bricks", type=int, default=5000, help="ブロックの数")
+    args = parser.parse_args(argv)
+
+    bricks, probes = random_bricks(args.bricks)
+    grid = BrickGrid(bricks)
+
+    start = time.perf_counter()
+    linear = [sorted(probe.collidelistall(bricks)) for probe in probes]
+    linear_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [sorted(brick_id for brick_id, _ in grid.query(probe)) for probe in probes]
+    grid_time = time.perf_counter() - start
+
+    assert linear == indexed, "グリッドとリストの結果が一致しません"
+    print(f"ブロック {len(bricks)} 個, 判定 {len(probes)} 回")
+    print(f"リスト: {linear_time * 1e6 / len(probes):.1f} µs/回, グリッド: {grid_time * 1e6 / len(probes):.1f} µs/回")
+
+
+if __name__ == "__main__":
+    main()
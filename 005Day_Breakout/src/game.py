@@ -1,145 +1,350 @@
-import os
+import random
+
 import pygame
 
+from assets import SoundPlayer, get_assets
+from brick_grid import BrickGrid
+from frame_profiler import FrameProfiler
+from levels import LevelLoader, LevelPack, PreparedLevel, brick_color
+from physics import sweep_rect, sweep_walls
+
+SCREEN_WIDTH, SCREEN_HEIGHT = 800, 600
+
+# シミュレーションは描画のフレームレートと無関係に、1秒に STEP_RATE 回の固定ステップで進める
+# (速度はすべて「1ステップあたりのピクセル数」。60 ステップ/秒で元の 60FPS と同じ速さになる)
+STEP_RATE = 60
+STEP_TIME = 1.0 / STEP_RATE
+MAX_FRAME_TIME = 0.25  # 1フレームで進める時間の上限 (処理が追いつかないときに無限に溜めないため)
+MAX_HITS_PER_STEP = 4  # 1ステップ内で跳ね返りを処理する回数の上限
+PADDLE_SPEED = 5
+PADDLE_WIDTH, WIDE_PADDLE_WIDTH = 100, 150
+MAX_LIVES = 5
+
+
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False, levels=None, seed=None):
+        """headless=True ならウィンドウもオーディオデバイスも使わない (描画先はメモリ上のサーフェス)。
+        levels はステージファイルのパス (省略すると元の 5x10 の1ステージ)。
+        seed を渡すとボールを打ち出す向きを乱数で決める (省略すると元と同じく常に右上)
+        """
+        self.headless = headless
+        self.levels_path = levels
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.recorder = None  # replay.Recorder を設定すると、ステップごとの入力を記録する
+        self.profiler = FrameProfiler(enabled=False)  # 有効にすると run() のフレームごとの時間を測る
         self.running = True
         self.score = 0
         self.lives = 3
-        self.bricks = []
+        self.bricks = BrickGrid()
+        self.hit_points = []  # ブロックの番号 -> 残りの耐久力
+        self.powerups = []    # ブロックの番号 -> 壊したときのパワーアップ (なければ None)
+        self.loader = LevelLoader(LevelPack(levels))
+        self.level_index = 0
+        self.single_level = False
         self.paddle = None
         self.ball = None
-        self.screen = pygame.display.set_mode((800, 600))  # Initialize screen
+        self.paddle_direction = 0  # -1: 左 / 0: 停止 / 1: 右 (入力は1フレームごと、移動は1ステップごと)
+        if headless:
+            self.screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        else:
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))  # Initialize screen
 
-        # サウンドの読み込み
-        base_path = os.path.join(os.path.dirname(__file__), "assets")
-        self.bounce_sound = pygame.mixer.Sound(os.path.join(base_path, "sounds/bounce.wav"))
-        self.brick_break_sound = pygame.mixer.Sound(os.path.join(base_path, "sounds/brick_break.wav"))
+        # サウンドとフォントの読み込み (共有の Assets に1度だけ読み込む)
+        self.assets = get_assets()
+        if not headless:
+            self.assets.preload(sounds=("bounce", "brick_break"))
+        self.sounds = SoundPlayer(self.assets, enabled=not headless)
+        self.info_font = self.assets.font("info", 20)  # フォントサイズ20
+        self.score_font = self.assets.font(None, 36)
 
-        # フォントの読み込み
-        self.font_path = os.path.join(base_path, "fonts/NotoSansJP-Regular.ttf")
-        self.info_font = pygame.font.Font(self.font_path, 20)  # フォントサイズ20
+        # 変わらない文字は最初に1度だけ描いておく
+        self.info_text = self.info_font.render("パドルの弾く音はOtoLogicの素材を使用している", True, (255, 255, 255))
+        self.score_cache = (None, None)  # (描いたときのスコア, サーフェス)
+        self.background = None
+        self.drawn_rects = []  # 前のフレームで動く物 (パドル・ボール・スコア・ライフ) を描いた範囲
+        self.dirty_rects = []  # 前のフレームから背景が変わった範囲
+        self.full_redraw = True
 
-    def initialize(self):
+    def initialize(self, level=None):
+        """最初のステージから始める。level (levels.Level) を渡すとステージファイルの代わりにそのステージだけを遊ぶ"""
         # パドルの初期化
-        self.paddle = pygame.Rect(350, 550, 100, 10)  # x, y, width, height
+        self.paddle = pygame.Rect(350, 550, PADDLE_WIDTH, 10)  # x, y, width, height
 
         # ボールの初期化
         self.ball = pygame.Rect(390, 540, 10, 10)  # x, y, width, height
-        self.ball_speed = [4, -4]  # x方向とy方向の速度
+        self.ball_speed = [4, -4]  # x方向とy方向の速度 (1ステップあたり)
+        self.ball_pos = [float(self.ball.x), float(self.ball.y)]  # 小数で持つ位置 (Rect は整数に丸めたもの)
+        self.save_previous()
+
+        # ブロックの初期化 (次のステージはこのステージを遊んでいる間に準備しておく)
+        self.rng.seed(self.seed)  # 同じ seed なら同じ展開になるように
+        self.level_index = 0
+        self.single_level = level is not None  # 渡されたステージだけなら次のステージはない
+        if level is None:
+            self.start_level(self.loader.get(0))
+            self.loader.prefetch(1)
+        else:
+            self.start_level(PreparedLevel(level))
+
+    def start_level(self, prepared):
+        """準備したステージ (levels.PreparedLevel) を始める"""
+        self.bricks = prepared.grid  # ボールの近くだけを調べられるグリッド
+        self.hit_points = prepared.hit_points
+        self.powerups = prepared.powerups
+        self.paddle.width = PADDLE_WIDTH
+        self.build_background(prepared.layer)
+        self.reset()
+
+    def next_level(self):
+        """次のステージがあれば始めて True を返す"""
+        if self.single_level or self.level_index + 1 >= len(self.loader):
+            return False
+        self.level_index += 1
+        self.start_level(self.loader.get(self.level_index))
+        self.loader.prefetch(self.level_index + 1)
+        return True
 
-        # ブロックの初期化
-        self.bricks = []
-        for row in range(5):  # 5行
-            for col in range(10):  # 10列
-                brick = pygame.Rect(10 + col * 78, 10 + row * 30, 70, 20)  # x, y, width, height
-                self.bricks.append(brick)
+    def save_previous(self):
+        """描画の補間用に、ステップ前のボールとパドルの位置を覚えておく"""
+        self.prev_ball_pos = tuple(self.ball_pos)
+        self.prev_paddle_x = self.paddle.x
 
     def update(self):
-        # ボールの移動
-        self.ball.x += self.ball_speed[0]
-        self.ball.y += self.ball_speed[1]
-
-        # 壁との衝突判定
-        if self.ball.left <= 0 or self.ball.right >= 800:
-            self.ball_speed[0] = -self.ball_speed[0]  # x方向の反転
-        if self.ball.top <= 0:
-            self.ball_speed[1] = -self.ball_speed[1]  # y方向の反転
-        if self.ball.bottom >= 600:
+        """シミュレーションを1ステップ進める"""
+        self.save_previous()
+
+        # パドルの移動
+        if self.paddle_direction < 0 and self.paddle.left > 0:
+            self.paddle.x = max(0, self.paddle.x - PADDLE_SPEED)
+        if self.paddle_direction > 0 and self.paddle.right < SCREEN_WIDTH:
+            self.paddle.x = min(SCREEN_WIDTH - self.paddle.width, self.paddle.x + PADDLE_SPEED)
+
+        # パドルが横から重なってきたときは、元と同じく上に跳ね返す
+        if self.ball.colliderect(self.paddle) and self.ball_speed[1] > 0:
+            self.ball_speed[1] = -self.ball_speed[1]
+            self.ball_pos[1] = self.paddle.top - self.ball.height
+            self.sounds.play("bounce")  # サウンドを再生 (フレームの終わりに鳴らす)
+
+        self.move_ball()
+
+        if self.ball.bottom >= SCREEN_HEIGHT:
             self.lives -= 1  # ライフを減らす
             self.reset()  # リセット
 
-        # パドルとの衝突判定
-        if self.ball.colliderect(self.paddle):
-            self.ball_speed[1] = -self.ball_speed[1]  # y方向の反転
-            self.bounce_sound.play()  # サウンドを再生
+    def move_ball(self):
+        """ボールを1ステップ分動かす。移動中に最初にぶつかる物を順に求め、その時点で跳ね返す"""
+        remaining = 1.0
+        for _ in range(MAX_HITS_PER_STEP):
+            x, y = self.ball_pos
+            dx, dy = self.ball_speed[0] * remaining, self.ball_speed[1] * remaining
+            width, height = self.ball.width, self.ball.height
 
-        # ブロックとの衝突判定
-        for brick in self.bricks[:]:
-            if self.ball.colliderect(brick):
-                self.bricks.remove(brick)  # ブロックを削除
-                self.ball_speed[1] = -self.ball_speed[1]  # y方向の反転
-                self.score += 10  # スコアを加算
-                self.brick_break_sound.play()  # サウンドを再生
+            hit = sweep_walls(x, y, width, height, dx, dy, SCREEN_WIDTH)
+            target = None  # None: 壁 / "paddle" / ブロックの番号
+            candidates = [("paddle", self.paddle)] if dy > 0 else []
+            candidates.extend(self.bricks_near(x, y, width, height, dx, dy))
+            for key, rect in candidates:
+                result = sweep_rect(x, y, width, height, dx, dy, rect)
+                if result is not None and (hit is None or result[0] < hit[0]):
+                    hit, target = result, key
+            if hit is None:
+                # 残りの移動では何にもぶつからない
+                self.ball_pos = [x + dx, y + dy]
                 break
 
-    def draw(self, screen):
-        # パドルを描画
-        pygame.draw.rect(screen, (255, 255, 255), self.paddle)
+            t, axis = hit
+            self.ball_pos = [x + dx * t, y + dy * t]
+            if axis == "x":
+                self.ball_speed[0] = -self.ball_speed[0]  # x方向の反転
+            else:
+                self.ball_speed[1] = -self.ball_speed[1]  # y方向の反転
+            if target == "paddle":
+                self.sounds.play("bounce")  # サウンドを再生 (フレームの終わりに鳴らす)
+            elif target is not None:
+                self.hit_brick(target)  # 耐久力を減らす (0 になったらグリッドから番号を消すだけ)
+            remaining *= 1.0 - t
+        self.sync_ball()
 
-        # ボールを描画
-        pygame.draw.ellipse(screen, (255, 255, 255), self.ball)
+    def bricks_near(self, x, y, width, height, dx, dy):
+        """移動範囲 (ボールの通り道を囲む矩形) に重なるブロックを [(番号, Rect)] で返す"""
+        sweep = pygame.Rect(int(min(x, x + dx)) - 1, int(min(y, y + dy)) - 1,
+                            int(abs(dx)) + width + 3, int(abs(dy)) + height + 3)
+        return self.bricks.query(sweep)
 
-        # ブロックを描画
-        for brick in self.bricks:
-            pygame.draw.rect(screen, (255, 0, 0), brick)
+    def sync_ball(self):
+        self.ball.x = round(self.ball_pos[0])
+        self.ball.y = round(self.ball_pos[1])
+
+    # --- 描画 ---
+    def build_background(self, layer):
+        """背景とブロックを描いた layer に素材表記を重ねて背景にする (ブロックが変わったときだけ部分的に描き直す)"""
+        self.background = layer if self.headless else layer.convert()  # 画面と同じ形式にして blit を速くする
+        self.background.blit(self.info_text, (10, 570))  # 画面下部に表示
+        self.full_redraw = True
+
+    def draw_brick(self, brick_id, rect):
+        pygame.draw.rect(self.background, brick_color(self.hit_points[brick_id], self.powerups[brick_id]), rect)
+
+    def hit_brick(self, brick_id):
+        """ブロックの耐久力を減らし、0 になったら削除する。背景はそのブロックの所だけを描き直す"""
+        self.hit_points[brick_id] -= 1
+        if self.hit_points[brick_id] > 0:
+            rect = self.bricks.bricks[brick_id]
+            self.draw_brick(brick_id, rect)
+            self.dirty_rects.append(rect)
+            return
+        rect = self.bricks.remove(brick_id)
+        pygame.draw.rect(self.background, (0, 0, 0), rect)
+        for other_id, brick in self.bricks.query(rect):  # 重なっていたブロックを描き直す
+            self.draw_brick(other_id, brick)
+        self.dirty_rects.append(rect)
+        self.score += 10  # スコアを加算
+        self.sounds.play("brick_break")  # サウンドを再生 (フレームの終わりに鳴らす)
+        if self.powerups[brick_id]:
+            self.apply_powerup(self.powerups[brick_id])
+
+    def apply_powerup(self, powerup):
+        if powerup == "wide":  # このステージの間パドルが広がる
+            center = self.paddle.centerx
+            self.paddle.width = WIDE_PADDLE_WIDTH
+            self.paddle.centerx = center
+            self.paddle.clamp_ip(pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+        elif powerup == "life":
+            self.lives = min(self.lives + 1, MAX_LIVES)
+        elif powerup == "slow":  # 次にボールを落とすまで遅くなる
+            self.ball_speed = [3 if v > 0 else -3 for v in self.ball_speed]
+
+    def score_surface(self):
+        """スコアの文字はスコアが変わったときだけ描き直す"""
+        if self.score_cache[0] != self.score:
+            self.score_cache = (self.score, self.score_font.render(f"Score: {self.score}", True, (255, 255, 255)))
+        return self.score_cache[1]
+
+    def draw(self, screen, alpha=1.0):
+        """alpha (0-1) は前のステップから現在のステップまでの補間の割合。
+
+        前のフレームで動く物を描いた所と消えたブロックの所だけ背景で塗り直すので、screen には前のフレームの
+        画面が残っていること。戻り値はこのフレームで変わった範囲 (pygame.display.update にそのまま渡せる)。
+        """
+        if self.full_redraw:
+            screen.blit(self.background, (0, 0))
+        else:
+            for rect in self.drawn_rects + self.dirty_rects:
+                screen.blit(self.background, rect, rect)
+
+        # パドルを描画 (前のステップの位置との間を補間)
+        paddle = self.paddle.copy()
+        paddle.x = round(self.prev_paddle_x + (self.paddle.x - self.prev_paddle_x) * alpha)
+        pygame.draw.rect(screen, (255, 255, 255), paddle)
+
+        # ボールを描画
+        ball = self.ball.copy()
+        ball.x = round(self.prev_ball_pos[0] + (self.ball_pos[0] - self.prev_ball_pos[0]) * alpha)
+        ball.y = round(self.prev_ball_pos[1] + (self.ball_pos[1] - self.prev_ball_pos[1]) * alpha)
+        pygame.draw.ellipse(screen, (255, 255, 255), ball)
 
         # スコアを描画
-        font = pygame.font.Font(None, 36)
-        score_text = font.render(f"Score: {self.score}", True, (255, 255, 255))
-        screen.blit(score_text, (10, 10))
+        score_rect = screen.blit(self.score_surface(), (10, 10))
 
         # ライフを描画
         for i in range(self.lives):  # ライフの数だけ描画
             pygame.draw.rect(screen, (0, 255, 0), (700 + i * 30, 10, 20, 20))  # x, y, width, height
+        lives_rect = pygame.Rect(700, 10, 30 * max(self.lives, 3), 20)
 
-        # OtoLogicの素材利用表記を描画
-        info_text = self.info_font.render("パドルの弾く音はOtoLogicの素材を使用している", True, (255, 255, 255))
-        screen.blit(info_text, (10, 570))  # 画面下部に表示
+        drawn = [paddle, ball, score_rect, lives_rect]
+        if self.full_redraw:
+            updated = [screen.get_rect()]
+        else:
+            updated = self.drawn_rects + self.dirty_rects + drawn
+        self.drawn_rects = drawn
+        self.dirty_rects = []
+        self.full_redraw = False
+        return updated
 
     def handle_input(self):
-        # Handle user input for paddle movement
-        pass
+        # 押されているキーからパドルの移動方向を決める
+        keys = pygame.key.get_pressed()
+        self.paddle_direction = 0
+        if keys[pygame.K_LEFT]:
+            self.paddle_direction -= 1
+        if keys[pygame.K_RIGHT]:
+            self.paddle_direction += 1
 
     def reset(self):
         # ボールとパドルを初期位置に戻す
         self.ball.x, self.ball.y = 390, 540
-        self.ball_speed = [4, -4]
+        self.ball_pos = [float(self.ball.x), float(self.ball.y)]
+        self.ball_speed = [self.serve_direction() * 4, -4]
         self.paddle.x = 350
+        self.save_previous()  # リセット前の位置から補間しない
+
+    def serve_direction(self):
+        """ボールを打ち出す左右の向き (1: 右 / -1: 左)"""
+        if self.seed is None:
+            return 1
+        return self.rng.choice((-1, 1))
 
     def check_game_over(self):
         if self.lives <= 0:  # ライフが0になった場合
-            font = pygame.font.Font(None, 72)
+            font = self.assets.font(None, 72)
             text = font.render("Game Over", True, (255, 0, 0))
             self.screen.blit(text, (300, 250))
             pygame.display.flip()
             pygame.time.wait(3000)  # 3秒間待機
             self.running = False
-        elif not self.bricks:  # ブロックがすべて消えた場合
-            font = pygame.font.Font(None, 72)
+        elif not self.bricks and not self.next_level():  # 最後のステージのブロックがすべて消えた場合
+            font = self.assets.font(None, 72)
             text = font.render("You Win!", True, (255, 255, 255))
             self.screen.blit(text, (300, 250))
             pygame.display.flip()
             pygame.time.wait(3000)  # 3秒間待機
             self.running = False
 
-    def run(self):
+    def close(self):
+        self.loader.close()
+
+    def run(self, fps=60):
+        """fps は描画のフレームレート (0 なら制限なし)。シミュレーションの速さは fps によらない"""
         self.initialize()  # ゲームの初期化
         clock = pygame.time.Clock()  # フレームレート制御用のClockオブジェクトを作成
+        accumulator = 0.0
 
         while self.running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
+            # 前のフレームからの経過時間 (フレームレートの制限で待つ時間は計測に含めない)
+            accumulator += min(clock.tick(fps) / 1000.0, MAX_FRAME_TIME)
+            self.profiler.begin_frame()
 
             # 入力処理
-            keys = pygame.key.get_pressed()
-            if keys[pygame.K_LEFT] and self.paddle.left > 0:
-                self.paddle.x -= 5  # 移動速度を 3 に変更
-            if keys[pygame.K_RIGHT] and self.paddle.right < 800:
-                self.paddle.x += 5  # 移動速度を 3 に変更
-
-            # ゲーム状態の更新
-            self.update()
-            self.check_game_over()
-
-            # 描画
-            self.screen.fill((0, 0, 0))  # 背景を黒で塗りつぶす
-            self.draw(self.screen)
-            pygame.display.flip()
+            with self.profiler.phase("input"):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        self.running = False
+                self.handle_input()
+
+            # ゲーム状態の更新 (経過時間の分だけ固定ステップを進める)
+            with self.profiler.phase("update"):
+                while accumulator >= STEP_TIME and self.running:
+                    if self.recorder is not None:
+                        self.recorder.record(self.paddle_direction)
+                    self.update()
+                    accumulator -= STEP_TIME
+                    self.check_game_over()
+                self.sounds.flush()  # このフレームで積んだ効果音を鳴らす
 
-            # フレームレートを制限 (例: 60FPS)
-            clock.tick(60)
+            # 描画 (余った時間の割合でステップ間を補間し、変わった範囲だけ画面に反映する)
+            with self.profiler.phase("draw"):
+                rects = self.draw(self.screen, accumulator / STEP_TIME)
+                overlay = self.profiler.draw_overlay(self.screen, (SCREEN_WIDTH - 5, 40), "topright")
+                if overlay is not None:
+                    rects.append(overlay)
+                    self.drawn_rects.append(overlay)  # 次のフレームで背景に戻す
+                pygame.display.update(rects)
+            self.profiler.end_frame()
+        if self.recorder is not None:
+            self.recorder.save(self)
+        self.profiler.close()
+        self.close()
 
 def main():
     pygame.init()
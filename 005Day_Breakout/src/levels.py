@@ -0,0 +1,319 @@
+"""
+ブロック崩しのステージ (記録形式・読み込み・先読み)
+
+1つのステージはブロックの並び (位置・大きさ・耐久力・パワーアップ) を持つ。
+ステージファイルには複数のステージを順に入れる。読み込むのは遊ぶ直前のステージだけで、
+次のステージは今のステージを遊んでいる間に別スレッドで当たり判定のグリッドとブロックの画像まで作っておく。
+
+テキスト形式:
+    # コメント
+    level 最初のステージ               ステージの始まり (名前)
+    cell 78 30 70 20 10 10             格子の間隔 (横, 縦)・ブロックの大きさ (幅, 高さ)・左上の位置 (x, y)
+    1111111111                         格子の1行。. は空き、1-9 は耐久力、W / L / S はパワーアップ付き (耐久力 1)
+    brick 100 300 70 20 2 W            格子に乗らないブロック (x y 幅 高さ 耐久力 [パワーアップ])
+    値はバイナリ形式に収まる範囲に限る (位置 -32768-32767、幅と高さ 1-65535、耐久力 1-255)。外れていれば何行目かを示すエラー
+
+バイナリ形式:
+    ヘッダ: マジック b"BRKLVL01" / ステージ数 (uint32) / 各ステージの位置 (uint32 x ステージ数)
+    1ステージごと: 名前の長さ (uint8) / 名前 (UTF-8) / ブロック数 (uint32) /
+                  ブロック (x, y: int16 / 幅, 高さ: uint16 / 耐久力: uint8 / パワーアップ: uint8) x ブロック数
+
+使い方:
+    python levels.py convert levels.txt levels.lvl     (拡張子 .lvl ならバイナリで書く)
+    python levels.py info levels.lvl
+"""
+import argparse
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from brick_grid import BrickGrid
+
+MAGIC = b"BRKLVL01"
+HEADER = struct.Struct("<8sI")
+OFFSET = struct.Struct("<I")
+BRICK = struct.Struct("<hhHHBB")
+BINARY_SUFFIX = ".lvl"  # この拡張子のファイルはバイナリ形式で書く
+
+SCREEN_SIZE = (800, 600)
+DEFAULT_CELL = (78, 30, 70, 20, 10, 10)
+
+# パワーアップ (テキストの文字, 番号)
+POWERUPS = {"W": "wide", "L": "life", "S": "slow"}  # W: パドルが広がる / L: ライフが増える / S: ボールが遅くなる
+POWERUP_CODES = {None: 0, "wide": 1, "life": 2, "slow": 3}
+POWERUP_NAMES = {code: name for name, code in POWERUP_CODES.items()}
+POWERUP_LETTERS = {name: letter for letter, name in POWERUPS.items()}
+
+# バイナリ形式に収まる値の範囲 (BRICK の各欄)
+COORD_RANGE = (-(1 << 15), (1 << 15) - 1)  # x, y: int16
+SIZE_RANGE = (1, (1 << 16) - 1)  # 幅, 高さ: uint16
+HP_RANGE = (1, 255)  # 耐久力: uint8
+
+# 元のゲームと同じ 5 行 x 10 列のステージ
+DEFAULT_LEVELS = """\
+level 1
+1111111111
+1111111111
+1111111111
+1111111111
+1111111111
+"""
+
+
+def brick_color(hp, powerup=None):
+    """ブロックの色 (パワーアップの種類か、耐久力で変える)"""
+    if powerup == "wide":
+        return (0, 128, 255)
+    if powerup == "life":
+        return (0, 200, 0)
+    if powerup == "slow":
+        return (255, 255, 0)
+    if hp >= 3:
+        return (160, 0, 200)
+    if hp == 2:
+        return (255, 128, 0)
+    return (255, 0, 0)
+
+
+def check_brick(x, y, w, h, hp):
+    """ブロックの値がバイナリ形式に収まるか調べる。収まらなければ ValueError"""
+    for label, values, (low, high) in (("位置", (x, y), COORD_RANGE), ("大きさ", (w, h), SIZE_RANGE),
+                                       ("耐久力", (hp,), HP_RANGE)):
+        for value in values:
+            if not low <= value <= high:
+                raise ValueError(f"ブロックの{label}が範囲 ({low}-{high}) の外です: {value}")
+
+
+# --- ステージ ---
+class Level:
+    """1ステージ分のブロック。bricks は (x, y, 幅, 高さ, 耐久力, パワーアップ名か None) のリスト"""
+
+    def __init__(self, name="", bricks=None):
+        self.name = name
+        self.bricks = list(bricks or [])
+
+    def __len__(self):
+        return len(self.bricks)
+
+    @classmethod
+    def from_rects(cls, rects, name=""):
+        """Rect (か x, y, 幅, 高さ の並び) から耐久力 1 のステージを作る"""
+        return cls(name, [(*pygame.Rect(rect), 1, None) for rect in rects])
+
+    @classmethod
+    def from_text(cls, lines, first_line=1):
+        """テキスト形式の1ステージ分の行 ("level" の行から) を読む。first_line はエラーで示す最初の行の番号"""
+        level = cls()
+        pitch_x, pitch_y, width, height, left, top = DEFAULT_CELL
+        row = 0
+        for number, line in enumerate(lines, first_line):
+            line = line.rstrip("\n")
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            keyword, _, rest = line.strip().partition(" ")
+            try:
+                if keyword == "level":
+                    level.name = rest.strip()
+                elif keyword == "cell":
+                    pitch_x, pitch_y, width, height, left, top = (int(n) for n in rest.split())
+                elif keyword == "brick":
+                    values = rest.split()
+                    x, y, w, h, hp = (int(n) for n in values[:5])
+                    if len(values) > 5 and values[5] not in POWERUPS:
+                        raise ValueError(f"不明なパワーアップです: {values[5]!r}")
+                    check_brick(x, y, w, h, hp)
+                    level.bricks.append((x, y, w, h, hp, POWERUPS[values[5]] if len(values) > 5 else None))
+                else:
+                    for col, char in enumerate(line):
+                        if char in ". ":
+                            continue
+                        if char.isdigit() and char != "0":
+                            hp, powerup = int(char), None
+                        elif char in POWERUPS:
+                            hp, powerup = 1, POWERUPS[char]
+                        else:
+                            raise ValueError(f"不明な文字があります: {char!r}")
+                        x, y = left + col * pitch_x, top + row * pitch_y
+                        check_brick(x, y, width, height, hp)
+                        level.bricks.append((x, y, width, height, hp, powerup))
+                    row += 1
+            except ValueError as e:  # int() の失敗や値の数の違いも含めて、何行目かを付けて知らせる
+                raise ValueError(f"{number} 行目 (ステージ {level.name!r}): {e}") from None
+        return level
+
+    def to_text(self):
+        lines = [f"level {self.name}"]
+        for x, y, w, h, hp, powerup in self.bricks:
+            lines.append(f"brick {x} {y} {w} {h} {hp}" + (f" {POWERUP_LETTERS[powerup]}" if powerup else ""))
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def from_bytes(cls, data):
+        name_length = data[0]
+        name = bytes(data[1:1 + name_length]).decode("utf-8")
+        offset = 1 + name_length
+        (count,) = OFFSET.unpack_from(data, offset)
+        offset += OFFSET.size
+        bricks = []
+        for x, y, w, h, hp, code in BRICK.iter_unpack(data[offset:offset + count * BRICK.size]):
+            bricks.append((x, y, w, h, hp, POWERUP_NAMES[code]))
+        return cls(name, bricks)
+
+    def to_bytes(self):
+        for x, y, w, h, hp, _ in self.bricks:
+            try:
+                check_brick(x, y, w, h, hp)
+            except ValueError as e:
+                raise ValueError(f"ステージ {self.name!r}: {e}") from None
+        name = self.name.encode("utf-8")[:255]
+        parts = [bytes([len(name)]), name, OFFSET.pack(len(self.bricks))]
+        parts.extend(BRICK.pack(x, y, w, h, hp, POWERUP_CODES[powerup]) for x, y, w, h, hp, powerup in self.bricks)
+        return b"".join(parts)
+
+
+class LevelPack:
+    """ステージファイル。開いたときは各ステージの位置だけを調べ、ステージの中身は取り出すときに読む"""
+
+    def __init__(self, path=None, text=None):
+        self.path = path
+        self.file = None
+        self.offsets = []
+        self.lines = []
+        if path is not None:
+            self.file = open(path, "rb")
+            head = self.file.read(HEADER.size)
+            if head[:len(MAGIC)] == MAGIC:
+                _, count = HEADER.unpack(head)
+                self.offsets = [offset for (offset,) in OFFSET.iter_unpack(self.file.read(OFFSET.size * count))]
+                self.offsets.append(None)
+            else:
+                self.file.seek(0)
+                text = self.file.read().decode("utf-8")
+                self.file.close()
+                self.file = None
+        if self.file is None:
+            self.lines = (text if text is not None else DEFAULT_LEVELS).splitlines()
+            self.offsets = [i for i, line in enumerate(self.lines) if line.strip().startswith("level")]
+            self.offsets.append(len(self.lines))
+        if not len(self):
+            self.close()
+            raise ValueError(f"ステージが1つもありません: {path if path is not None else '(テキスト)'}")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        if self.file is None:
+            start = self.offsets[index]
+            return Level.from_text(self.lines[start:self.offsets[index + 1]], first_line=start + 1)
+        start, end = self.offsets[index], self.offsets[index + 1]
+        self.file.seek(start)
+        return Level.from_bytes(self.file.read() if end is None else self.file.read(end - start))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def write_levels(path, levels):
+    """ステージのリストを書き出す (拡張子 .lvl ならバイナリ、それ以外はテキスト)"""
+    if not path.endswith(BINARY_SUFFIX):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(level.to_text() for level in levels))
+        return
+    blobs = [level.to_bytes() for level in levels]
+    offset = HEADER.size + OFFSET.size * len(blobs)
+    offsets = []
+    for blob in blobs:
+        offsets.append(offset)
+        offset += len(blob)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(blobs)))
+        f.write(b"".join(OFFSET.pack(offset) for offset in offsets))
+        f.write(b"".join(blobs))
+
+
+# --- 遊ぶための準備 ---
+class PreparedLevel:
+    """すぐに遊べる状態のステージ (当たり判定のグリッド・耐久力・パワーアップ・ブロックを描いた背景)"""
+
+    def __init__(self, level):
+        self.name = level.name
+        self.grid = BrickGrid(pygame.Rect(x, y, w, h) for x, y, w, h, _, _ in level.bricks)
+        self.hit_points = [hp for _, _, _, _, hp, _ in level.bricks]  # ブロックの番号 -> 残りの耐久力
+        self.powerups = [powerup for _, _, _, _, _, powerup in level.bricks]
+        self.layer = pygame.Surface(SCREEN_SIZE)
+        self.layer.fill((0, 0, 0))
+        for (x, y, w, h, hp, powerup) in level.bricks:
+            pygame.draw.rect(self.layer, brick_color(hp, powerup), (x, y, w, h))
+
+
+class LevelLoader:
+    """ステージを順に準備する。prefetch した次のステージは別スレッドで準備しておく"""
+
+    def __init__(self, pack):
+        self.pack = pack
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending = {}  # ステージの番号 -> Future
+
+    def __len__(self):
+        return len(self.pack)
+
+    def prefetch(self, index):
+        if 0 <= index < len(self.pack) and index not in self.pending:
+            self.pending[index] = self.executor.submit(lambda: PreparedLevel(self.pack[index]))
+
+    def get(self, index):
+        """準備したステージを返す (まだなら終わるまで待つ)。返したものは遊ぶと変わるので、同じ番号は作り直す"""
+        if not 0 <= index < len(self.pack):
+            raise IndexError(f"ステージの番号が範囲外です: {index} (ステージは {len(self.pack)} 個)")
+        self.prefetch(index)
+        return self.pending.pop(index).result()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.pack.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ブロック崩しのステージファイル")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert = sub.add_parser("convert", help="テキスト形式とバイナリ形式を変換する")
+    convert.add_argument("source")
+    convert.add_argument("output")
+    info = sub.add_parser("info", help="ステージの一覧を表示する")
+    info.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        pack = LevelPack(args.source)
+        try:
+            levels = list(pack)
+            write_levels(args.output, levels)
+        except ValueError as e:
+            print(f"{args.source}: {e}", file=sys.stderr)
+            return 1
+        finally:
+            pack.close()
+        print(f"{len(levels)} ステージを書き出しました: {args.output}")
+    else:
+        pack = LevelPack(args.path)
+        for index, level in enumerate(pack):
+            hit_points = sum(hp for _, _, _, _, hp, _ in level.bricks)
+            powerups = sum(1 for brick in level.bricks if brick[5])
+            print(f"{index + 1}: {level.name} ブロック {len(level)} 個, 耐久力の合計 {hit_points}, パワーアップ {powerups}")
+        pack.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
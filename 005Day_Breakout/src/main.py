@@ -1,10 +1,27 @@
+import argparse
 import pygame
+from frame_profiler import FrameProfiler
 from game import Game
+from replay import Recorder
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ブロック崩し")
+    parser.add_argument("--fps", type=int, default=60,
+                        help="描画のフレームレート (0 で制限なし。ゲームの速さは変わらない)")
+    parser.add_argument("--levels", help="ステージファイル (テキストか .lvl。省略すると元の 5x10 の1ステージ)")
+    parser.add_argument("--seed", type=int, help="ボールを打ち出す向きの乱数の seed (省略すると常に右上)")
+    parser.add_argument("--record", help="遊んだ内容をリプレイとして保存するファイル (.rpl)")
+    parser.add_argument("--profile", action="store_true", help="フレーム時間 (入力・更新・描画) を画面に表示する")
+    parser.add_argument("--profile-csv", help="終了時にフレームごとの時間を書き出す CSV ファイル")
+    args = parser.parse_args(argv)
 
-def main():
     pygame.init()
-    game = Game()
-    game.run()
+    game = Game(levels=args.levels, seed=args.seed)
+    if args.record:
+        game.recorder = Recorder(args.record)
+    if args.profile or args.profile_csv:
+        game.profiler = FrameProfiler(overlay=args.profile, csv_path=args.profile_csv)
+    game.run(args.fps)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,7 +1,15 @@
+import pygame
+
+from assets import get_assets
+from game import SCREEN_WIDTH
+
+
 class Paddle:
-    def __init__(self, x, y, width, height):
+    def __init__(self, x, y, width, height, image=None):
+        """image に画像のファイル名を渡すと矩形の代わりに描く (読み込みは全インスタンスで共有)"""
         self.rect = pygame.Rect(x, y, width, height)
         self.speed = 10
+        self.image = get_assets().image(image) if image else None
 
     def move_left(self):
         self.rect.x -= self.speed
@@ -14,4 +22,7 @@ class Paddle:
             self.rect.x = SCREEN_WIDTH - self.rect.width
 
     def draw(self, screen):
-        pygame.draw.rect(screen, (255, 255, 255), self.rect)
\ No newline at end of file
+        if self.image is not None:
+            screen.blit(self.image, self.rect)
+        else:
+            pygame.draw.rect(screen, (255, 255, 255), self.rect)
@@ -0,0 +1,100 @@
+"""
+連続的な衝突判定 (スイープ判定)
+
+1ステップの移動を線分として扱い、移動中に最初にぶつかる時刻を求める。
+フレームごとに位置だけを見る判定と違い、速いボールがブロックをすり抜けない。
+
+使い方 (境界の場合の確認):
+    python physics.py
+"""
+import sys
+
+import pygame
+
+OVERLAP_EPSILON = 1e-6  # これより浅い重なりは丸め誤差とみなす (ピクセル)
+
+
+def sweep_rect(x, y, width, height, dx, dy, target):
+    """(x, y, width, height) の矩形が (dx, dy) だけ動くとき、target (pygame.Rect) に最初に触れる時刻を求める。
+
+    戻り値は (t, 法線の軸) で、t は 0 以上 1 以下の移動の割合、軸は "x" (左右の面) か "y" (上下の面)。
+    ぶつからなければ None。動き始めにすでに重なっていて、さらに奥へ進む場合は t = 0 とする。
+    跳ね返った直後で丸め誤差だけ重なっているとき (すぐに抜け出す場合) はぶつからないものとする。
+    """
+    # target を矩形の大きさだけ広げ、矩形の左上の点が動く線分との交差を調べる (スラブ法)
+    left, right = target.left - width, target.right
+    top, bottom = target.top - height, target.bottom
+
+    if dx > 0:
+        entry_x, exit_x = (left - x) / dx, (right - x) / dx
+    elif dx < 0:
+        entry_x, exit_x = (right - x) / dx, (left - x) / dx
+    elif left < x < right:
+        entry_x, exit_x = float("-inf"), float("inf")
+    else:
+        return None
+
+    if dy > 0:
+        entry_y, exit_y = (top - y) / dy, (bottom - y) / dy
+    elif dy < 0:
+        entry_y, exit_y = (bottom - y) / dy, (top - y) / dy
+    elif top < y < bottom:
+        entry_y, exit_y = float("-inf"), float("inf")
+    else:
+        return None
+
+    entry = max(entry_x, entry_y)
+    exit_ = min(exit_x, exit_y)
+    if entry >= exit_ or entry > 1 or exit_ <= 0:
+        return None
+    if entry < 0:
+        # 重なりから抜け出すまでの距離が丸め誤差ほどなら、遠ざかっている途中なのでぶつからない
+        depth_x = exit_x * abs(dx) if dx else float("inf")
+        depth_y = exit_y * abs(dy) if dy else float("inf")
+        if min(depth_x, depth_y) <= OVERLAP_EPSILON:
+            return None
+    axis = "x" if entry_x > entry_y else "y"
+    return max(entry, 0.0), axis
+
+
+def sweep_walls(x, y, width, height, dx, dy, screen_width):
+    """左右と上の壁に最初に触れる (t, 軸)。触れなければ None (下は壁ではなくミスになる)"""
+    hits = []
+    if dx < 0 and x + dx < 0:
+        hits.append((max(-x / dx, 0.0), "x"))
+    elif dx > 0 and x + width + dx > screen_width:
+        hits.append((max((screen_width - width - x) / dx, 0.0), "x"))
+    if dy < 0 and y + dy < 0:
+        hits.append((max(-y / dy, 0.0), "y"))
+    return min(hits) if hits else None
+
+
+# --- 境界の場合の確認 ---
+# (x, y, dx, dy, 期待する結果)。ブロックは Rect(100, 100, 60, 20)、ボールは 10x10
+CASES = [
+    (90.0, 105.0, -4, 4, None),                      # 左の面にちょうど接していて遠ざかる
+    (90.00000000000001, 105.0, -4, 4, None),         # 丸め誤差だけ重なっていて遠ざかる
+    (89.99999999999999, 105.0, -4, 4, None),
+    (90.0, 105.0, 4, 4, (0.0, "x")),                 # 左の面にちょうど接していて近づく
+    (90.00000000000001, 105.0, 4, 4, (0.0, "x")),
+    (120.0, 80.0, 0, 10, (1.0, "y")),                # 上の面にちょうど届く
+    (120.0, 120.0, 3, -5, (0.0, "y")),               # 下の面に接して上へ進む
+    (120.0, 120.00000000000001, 3, 5, None),         # 下の面から丸め誤差だけ重なって離れる
+    (150.0, 110.0, 2, 0, (0.0, "x")),                # 深く重なって奥へ進む
+]
+
+
+def main():
+    target = pygame.Rect(100, 100, 60, 20)
+    failures = 0
+    for x, y, dx, dy, expected in CASES:
+        actual = sweep_rect(x, y, 10, 10, dx, dy, target)
+        if actual != expected:
+            failures += 1
+            print(f"不一致: sweep_rect({x!r}, {y!r}, dx={dx}, dy={dy}) = {actual}, 期待 {expected}", file=sys.stderr)
+    print(f"{len(CASES)} 件中 {len(CASES) - failures} 件一致")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""
+ブロック崩しのリプレイ (入力の記録と、ヘッドレスでの再シミュレーション)
+
+ゲームは固定ステップで進み、乱数は seed から作るので、seed・ステージファイル・ステップごとのパドルの入力が
+あれば同じ展開を再現できる。リプレイには終局時のスコア・ライフ・状態のハッシュも入れておき、
+再シミュレーションの結果と照合する (物理を変えたときの回帰テストに使う)。
+ステージファイルは絶対パスとデータのハッシュを記録し、再現するときにファイルの中身が違えばエラーにする。
+
+ファイル形式 (バイナリ):
+    ヘッダ: マジック b"BRKRPL02" / seed (int64, -1 は seed なし) / ステップ数 (uint32) / スコア (uint32) /
+            ライフ (int32) / ステージの番号 (uint32) / 状態のハッシュ (uint64) / ステージのデータのハッシュ (uint64) /
+            ステージファイルのパスの長さ (uint16)
+    ステージファイルの絶対パス (UTF-8。空なら既定のステージ)
+    入力: 1バイトに (同じ入力が続くステップ数 - 1) << 2 | (パドルの移動方向 + 1)。続くステップ数は 1-64
+
+使い方:
+    python main.py --record game.rpl                                 (遊んだ内容を記録する)
+    python replay.py info game.rpl
+    python replay.py verify replays/ --workers 4                     (ディレクトリ内の .rpl をすべて照合する)
+    python replay.py render game.rpl --start 600 --end 660 --output frames/
+    python replay.py bot --output replays/bot_0001.rpl --seed 1      (自動操作で記録を作る)
+"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import random
+import struct
+import sys
+import time
+
+import pygame
+
+from game import STEP_RATE, Game
+from levels import DEFAULT_LEVELS
+
+MAGIC = b"BRKRPL02"
+HEADER = struct.Struct("<8sqIIiIQQH")
+REPLAY_SUFFIX = ".rpl"
+MAX_RUN = 64
+
+
+def state_hash(game):
+    """ゲームの状態 (スコア・ライフ・ボール・パドル・残りのブロックと耐久力) の 64 ビットのハッシュ"""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(struct.pack("<iiIddiiii", game.score, game.lives, game.level_index, *game.ball_pos,
+                              *game.ball_speed, game.paddle.x, game.paddle.width))
+    for brick_id in sorted(game.bricks.bricks):
+        digest.update(struct.pack("<Ii", brick_id, game.hit_points[brick_id]))
+    return int.from_bytes(digest.digest(), "little")
+
+
+def levels_hash(path):
+    """ステージのデータ (path が None なら既定のステージ) の 64 ビットのハッシュ"""
+    if path is None:
+        data = DEFAULT_LEVELS.encode("utf-8")
+    else:
+        with open(path, "rb") as f:
+            data = f.read()
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+# --- リプレイ ---
+class Replay:
+    """1回分のゲームの記録"""
+
+    def __init__(self, seed=None, levels=None, events=b"", steps=0, score=0, lives=0, level_index=0, digest=0,
+                 levels_digest=0):
+        self.seed = seed
+        self.levels = levels  # ステージファイルの絶対パス (None なら既定のステージ)
+        self.levels_digest = levels_digest  # 記録したときのステージのデータのハッシュ
+        self.events = bytes(events)
+        self.steps = steps
+        self.score = score
+        self.lives = lives
+        self.level_index = level_index
+        self.digest = digest
+
+    def directions(self):
+        """ステップごとのパドルの移動方向"""
+        for byte in self.events:
+            direction = (byte & 3) - 1
+            for _ in range((byte >> 2) + 1):
+                yield direction
+
+    def to_bytes(self):
+        path = (self.levels or "").encode("utf-8")
+        return HEADER.pack(MAGIC, -1 if self.seed is None else self.seed, self.steps, self.score, self.lives,
+                           self.level_index, self.digest, self.levels_digest, len(path)) + path + self.events
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, seed, steps, score, lives, level_index, digest, levels_digest, length = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("リプレイのファイルではありません")
+        path = data[HEADER.size:HEADER.size + length].decode("utf-8")
+        return cls(None if seed < 0 else seed, path or None, data[HEADER.size + length:],
+                   steps, score, lives, level_index, digest, levels_digest)
+
+    def check_levels(self):
+        """ステージのデータが記録したときと同じか確かめる。違えば ValueError"""
+        if self.levels is not None and not os.path.exists(self.levels):
+            raise ValueError(f"ステージファイルが見つかりません: {self.levels}")
+        if levels_hash(self.levels) != self.levels_digest:
+            raise ValueError(f"ステージのデータが記録したときと違います: {self.levels or '(既定のステージ)'}")
+
+    @classmethod
+    def read(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def write(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+
+class Recorder:
+    """ステップごとの入力を、同じ入力が続く長さにまとめて記録する (Game.recorder に設定する)"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.events = bytearray()
+        self.direction = None
+        self.run = 0
+        self.steps = 0
+
+    def record(self, direction):
+        self.steps += 1
+        if direction == self.direction and self.run < MAX_RUN:
+            self.run += 1
+            return
+        self._flush()
+        self.direction, self.run = direction, 1
+
+    def _flush(self):
+        if self.run:
+            self.events.append((self.run - 1) << 2 | (self.direction + 1))
+            self.run = 0
+
+    def finish(self, game):
+        """記録を終えて Replay を返す"""
+        self._flush()
+        self.direction = None
+        levels = None if game.levels_path is None else os.path.abspath(game.levels_path)
+        return Replay(game.seed, levels, self.events, self.steps, game.score, game.lives,
+                      game.level_index, state_hash(game), levels_hash(levels))
+
+    def save(self, game):
+        replay = self.finish(game)
+        if self.path:
+            replay.write(self.path)
+        return replay
+
+
+# --- 再シミュレーション ---
+def simulate(replay, frames=None, output=None, every=1):
+    """リプレイをヘッドレスで再現し、終わった時点の Game を返す。
+
+    frames に (開始, 終了) のステップの範囲を渡すと、その範囲の画面を output に PNG で保存する (every ステップごと)。
+    ステージのデータが記録したときと違えば ValueError を送出する。
+    """
+    replay.check_levels()
+    pygame.font.init()
+    game = Game(headless=True, levels=replay.levels, seed=replay.seed)
+    game.initialize()
+    if frames:
+        os.makedirs(output, exist_ok=True)
+    for step, direction in enumerate(replay.directions()):
+        game.paddle_direction = direction
+        game.update()
+        if frames and frames[0] <= step < frames[1] and (step - frames[0]) % every == 0:
+            game.full_redraw = True
+            game.draw(game.screen)
+            pygame.image.save(game.screen, os.path.join(output, f"frame_{step:07d}.png"))
+        # Game.check_game_over と同じ順で終わりを判定する
+        if game.lives <= 0:
+            break
+        if not game.bricks and not game.next_level():
+            break
+    game.close()
+    return game
+
+
+def verify(path):
+    """リプレイを再現して記録と照合した結果 (dict) を返す"""
+    replay = Replay.read(path)
+    expected = {"score": replay.score, "lives": replay.lives, "level": replay.level_index, "hash": replay.digest}
+    start = time.perf_counter()
+    try:
+        game = simulate(replay)
+    except ValueError as e:
+        return {"path": path, "ok": False, "steps": 0, "seconds": 0.0, "expected": expected, "error": str(e)}
+    seconds = time.perf_counter() - start
+    actual = {"score": game.score, "lives": game.lives, "level": game.level_index, "hash": state_hash(game)}
+    return {"path": path, "ok": actual == expected, "steps": replay.steps, "seconds": seconds,
+            "expected": expected, "actual": actual}
+
+
+def record_bot(path, seed=0, levels=None, max_steps=60 * 60 * STEP_RATE):
+    """ボールを追いかける自動操作で1ゲーム遊び、リプレイとして保存する (回帰テスト用の記録を作る)"""
+    pygame.font.init()
+    rng = random.Random(seed)
+    game = Game(headless=True, levels=levels, seed=seed)
+    game.initialize()
+    recorder = Recorder(path)
+    aim = 0
+    for step in range(max_steps):
+        if step % 30 == 0:
+            aim = rng.randint(-60, 60)  # パドルのどこで受けるかを時々変える
+        target = game.ball.centerx + aim
+        game.paddle_direction = -1 if target < game.paddle.centerx - 5 else 1 if target > game.paddle.centerx + 5 else 0
+        recorder.record(game.paddle_direction)
+        game.update()
+        if game.lives <= 0 or (not game.bricks and not game.next_level()):
+            break
+    replay = recorder.save(game)
+    game.close()
+    return replay
+
+
+def _expand(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(REPLAY_SUFFIX):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ブロック崩しのリプレイ")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info = sub.add_parser("info", help="リプレイの内容を表示する")
+    info.add_argument("path")
+    check = sub.add_parser("verify", help="リプレイを再現して記録と照合する")
+    check.add_argument("paths", nargs="+", help="リプレイのファイルかディレクトリ")
+    check.add_argument("--workers", type=int, default=1, help="並列に動かすプロセス数")
+    render = sub.add_parser("render", help="指定した範囲の画面を PNG で保存する")
+    render.add_argument("path")
+    render.add_argument("--start", type=int, default=0, help="最初のステップ")
+    render.add_argument("--end", type=int, default=STEP_RATE, help="最後のステップ (含まない)")
+    render.add_argument("--every", type=int, default=1, help="何ステップごとに保存するか")
+    render.add_argument("--output", default="frames")
+    bot = sub.add_parser("bot", help="自動操作で1ゲーム遊んで記録する")
+    bot.add_argument("--output", required=True)
+    bot.add_argument("--seed", type=int, default=0)
+    bot.add_argument("--levels", help="ステージファイル")
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        replay = Replay.read(args.path)
+        print(f"seed: {replay.seed}, ステージファイル: {replay.levels or '(既定)'}")
+        print(f"ステップ: {replay.steps} ({replay.steps / STEP_RATE:.1f} 秒), 入力のバイト数: {len(replay.events)}")
+        print(f"スコア: {replay.score}, ライフ: {replay.lives}, ステージ: {replay.level_index + 1}, "
+              f"ハッシュ: {replay.digest:016x}")
+    elif args.command == "verify":
+        paths = list(_expand(args.paths))
+        start = time.perf_counter()
+        if args.workers > 1:
+            with multiprocessing.Pool(args.workers) as pool:
+                results = pool.map(verify, paths)
+        else:
+            results = [verify(path) for path in paths]
+        elapsed = time.perf_counter() - start
+        failures = [result for result in results if not result["ok"]]
+        for result in failures:
+            if "error" in result:
+                print(f"再現できません: {result['path']} {result['error']}", file=sys.stderr)
+            else:
+                print(f"不一致: {result['path']} 記録 {result['expected']} / 再現 {result['actual']}", file=sys.stderr)
+        steps = sum(result["steps"] for result in results)
+        print(f"{len(results)} 件中 {len(results) - len(failures)} 件一致, {steps} ステップ, {elapsed:.2f} 秒 "
+              f"(実時間の {steps / STEP_RATE / elapsed if elapsed > 0 else 0:.0f} 倍)")
+        return 1 if failures else 0
+    elif args.command == "render":
+        replay = Replay.read(args.path)
+        try:
+            simulate(replay, (args.start, args.end), args.output, args.every)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(f"{args.output} に保存しました")
+    else:
+        replay = record_bot(args.output, args.seed, args.levels)
+        print(f"{args.output}: {replay.steps} ステップ, スコア {replay.score}, ライフ {replay.lives}, "
+              f"入力 {len(replay.events)} バイト")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
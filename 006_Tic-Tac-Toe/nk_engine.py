@@ -0,0 +1,313 @@
+"""
+N×N 盤で K 個並べたら勝ちの一般化した三目並べ (4×4, 5×5 の4目, 15×15 の五目並べなど)
+
+盤面は手番側 / 相手側の2つの整数ビットマスク (マス番号 = row * size + col) で持ち、
+K 個並びの全ての線をビットマスクにしておいて勝ち判定を整数演算で行う。
+探索は反復深化の negamax + αβ 枝刈り + 置換表で、深さと1手あたりの時間で打ち切れる。
+読み切れない深さでは、相手の石がない線ほど (自分の石が多いほど) 高くなる評価関数を使う。
+
+使い方:
+    python nk_engine.py --size 3 --k 3                  (人間 vs コンピュータ)
+    python nk_engine.py --size 15 --k 5 --time 2 --self-play
+"""
+import argparse
+import time
+
+WIN_SCORE = 1_000_000_000  # 勝ちの評価値 (早く勝つほど高くなるように手数を引く)
+NEIGHBOR_DISTANCE = 2  # 候補手は既にある石からこの距離以内の空きマスに限る (盤が広いとき)
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class SearchTimeout(Exception):
+    """持ち時間切れで探索を打ち切るときに送出する"""
+
+
+# --- 盤面の定義 ---
+class NKGame:
+    """盤の大きさ size と勝ちに必要な個数 k から、線のビットマスクなどを作っておく"""
+
+    def __init__(self, size=3, k=3):
+        if not 1 <= k <= size:
+            raise ValueError(f"k は 1 以上 size 以下にしてください: size={size}, k={k}")
+        self.size = size
+        self.k = k
+        self.cells = size * size
+        self.full_mask = (1 << self.cells) - 1
+        self.lines = self._build_lines()
+        self.cell_lines = [tuple(line for line in self.lines if line >> i & 1) for i in range(self.cells)]
+        self.neighbors = [self._neighbor_mask(i) for i in range(self.cells)]
+        # 線上の自分の石の数ごとの評価値 (k 個は勝ちなので別に扱う)
+        self.line_weights = [0] + [10 ** (n - 1) for n in range(1, k + 1)]
+
+    def _build_lines(self):
+        lines = []
+        size, k = self.size, self.k
+        for row in range(size):
+            for col in range(size):
+                for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_row, end_col = row + dr * (k - 1), col + dc * (k - 1)
+                    if 0 <= end_row < size and 0 <= end_col < size:
+                        lines.append(sum(1 << ((row + dr * n) * size + col + dc * n) for n in range(k)))
+        return lines
+
+    def _neighbor_mask(self, cell):
+        row, col = divmod(cell, self.size)
+        mask = 0
+        for r in range(max(0, row - NEIGHBOR_DISTANCE), min(self.size, row + NEIGHBOR_DISTANCE + 1)):
+            for c in range(max(0, col - NEIGHBOR_DISTANCE), min(self.size, col + NEIGHBOR_DISTANCE + 1)):
+                mask |= 1 << (r * self.size + c)
+        return mask
+
+    def is_win(self, mask, cell):
+        """cell に置いた直後の mask が、cell を通る線のどれかを揃えているか"""
+        for line in self.cell_lines[cell]:
+            if mask & line == line:
+                return True
+        return False
+
+    def has_win(self, mask):
+        return any(mask & line == line for line in self.lines)
+
+    def evaluate(self, own, opp):
+        """手番側から見た評価値 (相手の石がない線の自分の石の数で加点、その逆で減点)"""
+        weights = self.line_weights
+        score = 0
+        for line in self.lines:
+            a = own & line
+            b = opp & line
+            if a and not b:
+                score += weights[a.bit_count()]
+            elif b and not a:
+                score -= weights[b.bit_count()]
+        return score
+
+    def candidates(self, own, opp):
+        """候補手のビットマスク (盤が広いときは既にある石の近くだけ)"""
+        occupied = own | opp
+        empty = ~occupied & self.full_mask
+        if self.cells <= 25:
+            return empty
+        if not occupied:
+            return 1 << (self.cells // 2)  # 初手は中央
+        near = 0
+        mask = occupied
+        while mask:
+            low = mask & -mask
+            near |= self.neighbors[low.bit_length() - 1]
+            mask ^= low
+        return near & empty
+
+    def move_priority(self, own, opp, cell):
+        """手の並べ替え用の点数: 自分の線を伸ばす価値 + 相手の線をふさぐ価値"""
+        weights = self.line_weights
+        score = 0
+        for line in self.cell_lines[cell]:
+            a = own & line
+            b = opp & line
+            if not b:
+                score += weights[a.bit_count() + 1]
+            elif not a:
+                score += weights[b.bit_count() + 1]
+        return score
+
+    def format_board(self, black, white, marks=("X", "O")):
+        width = len(str(self.cells - 1))
+        rows = []
+        for row in range(self.size):
+            cells = []
+            for col in range(self.size):
+                bit = 1 << (row * self.size + col)
+                cells.append((marks[0] if black & bit else marks[1] if white & bit else ".").rjust(width))
+            rows.append(" ".join(cells))
+        return "\n".join(rows)
+
+
+# --- 探索エンジン ---
+class NKEngine:
+    """反復深化 negamax + αβ 枝刈り + 置換表。max_depth / time_limit のどちらも None なら読み切る"""
+
+    def __init__(self, game, max_depth=None, time_limit=None, max_candidates=None):
+        self.game = game
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.max_candidates = max_candidates  # 各局面で読む手の上限 (None なら全部)
+        self.table = {}  # { (own, opp): (depth, value, flag, move) }
+        self.nodes = 0
+        self.last_info = {}
+        self._deadline = None
+
+    def best_move(self, own, opp):
+        """手番側 own の最善手のマス番号。打てる手がなければ None"""
+        game = self.game
+        moves = self._ordered_moves(own, opp, -1)
+        if not moves or game.has_win(opp):
+            return None
+        start = time.perf_counter()
+        self._deadline = start + self.time_limit if self.time_limit is not None else None
+        self.nodes = 0
+        self.table = {}
+        empties = (~(own | opp) & game.full_mask).bit_count()
+        max_depth = empties if self.max_depth is None else min(self.max_depth, empties)
+
+        best_move, best_score, completed = moves[0], 0, 0
+        for depth in range(1, max_depth + 1):
+            try:
+                best_score, best_move = self._search_root(own, opp, depth, moves, best_move)
+            except SearchTimeout:
+                break
+            completed = depth
+            if abs(best_score) >= WIN_SCORE - game.cells:
+                break  # 勝ち負けが読み切れた
+        elapsed = time.perf_counter() - start
+        self.last_info = {
+            "depth": completed,
+            "score": best_score,
+            "nodes": self.nodes,
+            "time": elapsed,
+            "nps": int(self.nodes / elapsed) if elapsed > 0 else 0,
+        }
+        return best_move
+
+    def _search_root(self, own, opp, depth, moves, previous_best):
+        moves = [previous_best] + [m for m in moves if m != previous_best]
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        best_move = previous_best
+        for cell in moves:
+            score = self._score_move(own, opp, cell, depth, alpha, beta, 0)
+            if score > alpha:
+                alpha = score
+                best_move = cell
+        return alpha, best_move
+
+    def _score_move(self, own, opp, cell, depth, alpha, beta, ply):
+        """手番側が cell に打った手の評価値"""
+        new_own = own | (1 << cell)
+        if self.game.is_win(new_own, cell):
+            return WIN_SCORE - ply - 1
+        return -self._negamax(opp, new_own, depth - 1, -beta, -alpha, ply + 1)
+
+    def _negamax(self, own, opp, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self._deadline is not None and not self.nodes & 0xFF and time.perf_counter() > self._deadline:
+            raise SearchTimeout
+
+        game = self.game
+        if (own | opp) == game.full_mask:
+            return 0  # 引き分け
+        if depth <= 0:
+            return game.evaluate(own, opp)
+
+        key = (own, opp)
+        entry = self.table.get(key)
+        tt_move = -1
+        if entry is not None:
+            tt_depth, tt_value, tt_flag, tt_move = entry
+            if tt_depth >= depth:
+                if tt_flag == EXACT:
+                    return tt_value
+                if tt_flag == LOWER and tt_value > alpha:
+                    alpha = tt_value
+                elif tt_flag == UPPER and tt_value < beta:
+                    beta = tt_value
+                if alpha >= beta:
+                    return tt_value
+
+        alpha_orig = alpha
+        best_score = -WIN_SCORE - 1
+        best_move = -1
+        for cell in self._ordered_moves(own, opp, tt_move):
+            score = self._score_move(own, opp, cell, depth, alpha, beta, ply)
+            if score > best_score:
+                best_score = score
+                best_move = cell
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (depth, best_score, flag, best_move)
+        return best_score
+
+    def _ordered_moves(self, own, opp, tt_move):
+        """置換表の手 -> 線を伸ばす / ふさぐ価値の高い手の順 (同点はマス番号の小さい順)"""
+        game = self.game
+        mask = game.candidates(own, opp)
+        cells = []
+        while mask:
+            low = mask & -mask
+            cells.append(low.bit_length() - 1)
+            mask ^= low
+        cells.sort(key=lambda cell: -game.move_priority(own, opp, cell))
+        if self.max_candidates is not None:
+            cells = cells[:self.max_candidates]
+        if tt_move >= 0 and not (own | opp) >> tt_move & 1:
+            if tt_move in cells:
+                cells.remove(tt_move)
+            cells.insert(0, tt_move)
+        return cells
+
+
+# --- コンソール対局 ---
+def play(game, engine, human=None):
+    """human に 0 (先手 X) / 1 (後手 O) を渡すと人間が打つ。None ならコンピュータ同士"""
+    discs = [0, 0]
+    turn = 0
+    while True:
+        print(game.format_board(discs[0], discs[1]))
+        own, opp = discs[turn], discs[1 - turn]
+        if turn == human:
+            text = input(f"{'XO'[turn]} の番です。行 列 を入力してください (0-{game.size - 1}): ")
+            try:
+                row, col = (int(v) for v in text.split())
+            except ValueError:
+                print("無効な入力です。")
+                continue
+            cell = row * game.size + col
+            if not (0 <= row < game.size and 0 <= col < game.size) or (own | opp) >> cell & 1:
+                print("その位置には置けません。")
+                continue
+        else:
+            cell = engine.best_move(own, opp)
+            info = engine.last_info
+            print(f"{'XO'[turn]}: {divmod(cell, game.size)} (深さ {info['depth']}, 評価値 {info['score']}, "
+                  f"{info['nodes']} ノード, {info['nps']} nps)")
+        discs[turn] |= 1 << cell
+        if game.is_win(discs[turn], cell):
+            print(game.format_board(discs[0], discs[1]))
+            print(f"{'XO'[turn]} の勝ちです！")
+            return turn
+        if discs[0] | discs[1] == game.full_mask:
+            print(game.format_board(discs[0], discs[1]))
+            print("引き分けです！")
+            return None
+        turn = 1 - turn
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="N×N 盤の K 目並べ")
+    parser.add_argument("--size", type=int, default=3, help="盤の一辺のマス数")
+    parser.add_argument("--k", type=int, default=3, help="勝ちに必要な個数")
+    parser.add_argument("--depth", type=int, default=None, help="探索の最大深さ (既定: 制限なし)")
+    parser.add_argument("--time", type=float, default=None, help="1手あたりの思考時間 (秒, 既定: 制限なし)")
+    parser.add_argument("--candidates", type=int, default=None, help="各局面で読む手の上限")
+    parser.add_argument("--second", action="store_true", help="人間が後手 (O) で打つ")
+    parser.add_argument("--self-play", action="store_true", help="コンピュータ同士で対局する")
+    args = parser.parse_args(argv)
+
+    game = NKGame(args.size, args.k)
+    time_limit = args.time
+    if time_limit is None and args.depth is None and game.cells > 16:
+        time_limit = 1.0  # 広い盤を読み切ろうとすると終わらない
+    engine = NKEngine(game, args.depth, time_limit, args.candidates)
+    play(game, engine, None if args.self_play else 1 if args.second else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,19 @@
 import random
 
+from ttt_solver import WINNING_COMBINATIONS, best_move_for_masks
+
+# --- ビットマスク ---
+# 各プレイヤーの石をマス番号 (0-8) のビットで表す
+FULL_MASK = 0x1FF
+WIN_MASKS = tuple(sum(1 << i for i in combo) for combo in WINNING_COMBINATIONS)
+# WINS[mask]: mask の石で揃っている列があるか (512 通りを前計算しておき、勝ち判定を1回の添え字で済ませる)
+WINS = bytes(any(mask & w == w for w in WIN_MASKS) for mask in range(FULL_MASK + 1))
+
+
 class TicTacToe:
     def __init__(self):
-        self.board = [' ' for _ in range(9)]  # 3x3のボード
+        self.board = [' ' for _ in range(9)]  # 3x3のボード (表示用。masks と常に同じ内容)
+        self.masks = {'X': 0, 'O': 0}  # プレイヤーごとの石のビットマスク
         self.current_player = 'X'  # デフォルトでプレイヤーが先攻
         self.winner = None
 
@@ -15,79 +26,82 @@ class TicTacToe:
         print("\n")
 
     def make_move(self, position):
-        if self.board[position] == ' ':
+        bit = 1 << position
+        if not (self.masks['X'] | self.masks['O']) & bit:
+            self.masks[self.current_player] |= bit
             self.board[position] = self.current_player
             self.check_winner()
             self.current_player = 'O' if self.current_player == 'X' else 'X'
         else:
             print("その位置はすでに埋まっています。別の位置を選んでください。")
 
+    def undo_move(self, position):
+        """position の石を取り除き、手番をその石のプレイヤーに戻す"""
+        bit = 1 << position
+        player = 'X' if self.masks['X'] & bit else 'O'
+        self.masks[player] &= ~bit
+        self.board[position] = ' '
+        self.current_player = player
+        self.winner = None
+        self.check_winner()
+
     def check_winner(self):
-        winning_combinations = [
-            (0, 1, 2), (3, 4, 5), (6, 7, 8),  # 横
-            (0, 3, 6), (1, 4, 7), (2, 5, 8),  # 縦
-            (0, 4, 8), (2, 4, 6)              # 斜め
-        ]
-        for combo in winning_combinations:
-            if self.board[combo[0]] == self.board[combo[1]] == self.board[combo[2]] != ' ':
-                self.winner = self.board[combo[0]]
-                return
+        if WINS[self.masks['X']]:
+            self.winner = 'X'
+        elif WINS[self.masks['O']]:
+            self.winner = 'O'
 
     def is_draw(self):
-        return ' ' not in self.board and self.winner is None
+        return (self.masks['X'] | self.masks['O']) == FULL_MASK and self.winner is None
 
     def reset_game(self):
         self.board = [' ' for _ in range(9)]
+        self.masks = {'X': 0, 'O': 0}
         self.current_player = 'X'
         self.winner = None
 
     def computer_move(self):
-        # ミニマックスアルゴリズムを使用して最適な手を選ぶ
-        best_score = float('-inf')
-        best_move = None
-        for i in range(9):
-            if self.board[i] == ' ':
-                self.board[i] = 'O'  # コンピュータの手を仮定
-                score = self.minimax(False)
-                self.board[i] = ' '  # 元に戻す
-                if score > best_score:
-                    best_score = score
-                    best_move = i
-        self.make_move(best_move)
+        # 完全解の表 (ttt_solver.py) から最適な手を引く
+        own = self.masks[self.current_player]
+        opp = self.masks['O' if self.current_player == 'X' else 'X']
+        self.make_move(best_move_for_masks(own, opp))
 
     def minimax(self, is_maximizing):
+        """コンピュータ (O) から見た評価値 (1: 勝ち / 0: 引き分け / -1: 負け) を全探索で求める"""
         if self.winner == 'X':
             return -1  # プレイヤーが勝つ場合
         elif self.winner == 'O':
             return 1  # コンピュータが勝つ場合
         elif self.is_draw():
             return 0  # 引き分けの場合
-
-        if is_maximizing:
-            best_score = float('-inf')
-            for i in range(9):
-                if self.board[i] == ' ':
-                    self.board[i] = 'O'
-                    self.check_winner()
-                    score = self.minimax(False)
-                    self.board[i] = ' '
-                    self.winner = None
-                    best_score = max(score, best_score)
-            return best_score
-        else:
-            best_score = float('inf')
-            for i in range(9):
-                if self.board[i] == ' ':
-                    self.board[i] = 'X'
-                    self.check_winner()
-                    score = self.minimax(True)
-                    self.board[i] = ' '
-                    self.winner = None
-                    best_score = min(score, best_score)
-            return best_score
-
-def main():
-    game = TicTacToe()
+        return minimax_masks(self.masks['O'], self.masks['X'], is_maximizing)
+
+
+def minimax_masks(o_mask, x_mask, is_maximizing):
+    """ビットマスクの盤面で minimax を行う (石の置き方と取り消しは整数演算1回ずつ)"""
+    if WINS[x_mask]:
+        return -1
+    if WINS[o_mask]:
+        return 1
+    empty = ~(o_mask | x_mask) & FULL_MASK
+    if not empty:
+        return 0
+    if is_maximizing:
+        best_score = -1
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+            best_score = max(best_score, minimax_masks(o_mask | bit, x_mask, False))
+        return best_score
+    best_score = 1
+    while empty:
+        bit = empty & -empty
+        empty ^= bit
+        best_score = min(best_score, minimax_masks(o_mask, x_mask | bit, True))
+    return best_score
+
+def play_game(game):
+    """1ゲーム分の対局を行う"""
     print("三目並べゲームへようこそ！")
     print("ボードの位置は以下のように番号で指定します：")
     print("0 | 1 | 2\n---------\n3 | 4 | 5\n---------\n6 | 7 | 8\n")
@@ -126,18 +140,23 @@ def main():
             print("ゲーム終了！引き分けです！")
             break
 
-    # リセットオプション
+
+def main():
+    game = TicTacToe()
     while True:
-        reset = input("もう一度プレイしますか？ (y/n): ").lower()
-        if reset == 'y':
-            game.reset_game()
-            main()  # 再帰的にゲームを再スタート
-            break
-        elif reset == 'n':
-            print("ゲームを終了します。ありがとうございました！")
-            break
-        else:
-            print("無効な入力です。'y' または 'n' を入力してください。")
+        play_game(game)
+
+        # リセットオプション (再帰せずにループでゲームを再スタートする)
+        while True:
+            reset = input("もう一度プレイしますか？ (y/n): ").lower()
+            if reset == 'y':
+                game.reset_game()
+                break
+            elif reset == 'n':
+                print("ゲームを終了します。ありがとうございました！")
+                return
+            else:
+                print("無効な入力です。'y' または 'n' を入力してください。")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
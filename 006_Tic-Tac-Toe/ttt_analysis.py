@@ -0,0 +1,241 @@
+"""
+三目並べの全局面解析とベンチマーク
+
+- 初期局面 (X が先手) から到達できる全ての局面を数える (局面数・終局数・X の勝ち・O の勝ち・引き分け)
+- 全ての局面で ttt_solver.py の評価値を、置換表を使わない全探索の結果と照合する
+- 初期局面からの minimax のノード数と1秒あたりのノード数を、元のリスト版・ビットマスク版・
+  nk_engine.py の αβ 探索で比べ、ttt_solver の表を引く速さも測る
+
+結果は JSON で出力する。--baseline に以前の結果を渡すと、許容幅を超えて遅くなった項目があれば終了コード 1 で終わる。
+
+使い方:
+    python ttt_analysis.py --output bench.json
+    python ttt_analysis.py --baseline bench.json --tolerance 0.2
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import ttt_solver
+from nk_engine import NKEngine, NKGame
+from tic_tac_toe import FULL_MASK, WINS, minimax_masks
+from ttt_solver import WINNING_COMBINATIONS
+
+# 初期局面から到達できる局面の既知の値
+EXPECTED_COUNTS = {
+    "positions": 5478,
+    "terminal": 958,
+    "x_wins": 626,
+    "o_wins": 316,
+    "draws": 16,
+}
+
+
+# --- 全局面の列挙 ---
+def enumerate_positions():
+    """到達できる全ての局面を { (X のマスク, O のマスク): 手番 ('X' / 'O') } で返す"""
+    positions = {}
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        if (x, o) in positions:
+            continue
+        player = 'X' if (x.bit_count() == o.bit_count()) else 'O'
+        positions[(x, o)] = player
+        if WINS[x] or WINS[o]:
+            continue
+        empty = ~(x | o) & FULL_MASK
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+            stack.append((x | bit, o) if player == 'X' else (x, o | bit))
+    return positions
+
+
+def count_positions(positions):
+    counts = dict.fromkeys(EXPECTED_COUNTS, 0)
+    counts["positions"] = len(positions)
+    for x, o in positions:
+        if WINS[x]:
+            counts["x_wins"] += 1
+        elif WINS[o]:
+            counts["o_wins"] += 1
+        elif x | o == FULL_MASK:
+            counts["draws"] += 1
+        else:
+            continue
+        counts["terminal"] += 1
+    return counts
+
+
+def full_tree_value(own, opp):
+    """置換表を使わない全探索での手番側から見た評価値"""
+    if WINS[opp]:
+        return -1
+    empty = ~(own | opp) & FULL_MASK
+    if not empty:
+        return 0
+    best = -1
+    while empty:
+        bit = empty & -empty
+        empty ^= bit
+        best = max(best, -full_tree_value(opp, own | bit))
+        if best == 1:
+            break
+    return best
+
+
+def check_solver(positions):
+    """ttt_solver の評価値と最善手が全探索と食い違う局面のリスト"""
+    mismatches = []
+    for (x, o), player in positions.items():
+        own, opp = (x, o) if player == 'X' else (o, x)
+        value = full_tree_value(own, opp)
+        if ttt_solver.solve(ttt_solver.encode_masks(own, opp)) != value:
+            mismatches.append({"x": x, "o": o, "expected": value})
+            continue
+        move = ttt_solver.best_move_for_masks(own, opp)
+        if move is not None and -full_tree_value(opp, own | 1 << move) != value:
+            mismatches.append({"x": x, "o": o, "move": move, "expected": value})
+    return mismatches
+
+
+# --- 元のリスト版 minimax (比較用) ---
+class _Counter:
+    nodes = 0
+
+
+def _list_winner(board):
+    for combo in WINNING_COMBINATIONS:
+        if board[combo[0]] == board[combo[1]] == board[combo[2]] != ' ':
+            return board[combo[0]]
+    return None
+
+
+def naive_minimax(board, is_maximizing, winner=None):
+    """変更前の TicTacToe.minimax と同じ手順 (リストの盤面・毎回8通りの勝ち判定・' ' の線形探索)"""
+    _Counter.nodes += 1
+    if winner == 'X':
+        return -1
+    elif winner == 'O':
+        return 1
+    elif ' ' not in board:
+        return 0
+    mark = 'O' if is_maximizing else 'X'
+    best_score = float('-inf') if is_maximizing else float('inf')
+    for i in range(9):
+        if board[i] == ' ':
+            board[i] = mark
+            score = naive_minimax(board, not is_maximizing, _list_winner(board))
+            board[i] = ' '
+            best_score = max(score, best_score) if is_maximizing else min(score, best_score)
+    return best_score
+
+
+def _count_mask_nodes(o_mask, x_mask, is_maximizing):
+    """minimax_masks が訪れるノード数 (時間を測る本体とは別に数える)"""
+    nodes = 1
+    if WINS[x_mask] or WINS[o_mask]:
+        return nodes
+    empty = ~(o_mask | x_mask) & FULL_MASK
+    while empty:
+        bit = empty & -empty
+        empty ^= bit
+        if is_maximizing:
+            nodes += _count_mask_nodes(o_mask | bit, x_mask, False)
+        else:
+            nodes += _count_mask_nodes(o_mask, x_mask | bit, True)
+    return nodes
+
+
+# --- 計測 ---
+def _best_time(func, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_benchmarks(positions, repeat=3):
+    results = {}
+
+    def naive():
+        _Counter.nodes = 0
+        naive_minimax([' '] * 9, True)
+        return _Counter.nodes
+
+    seconds, nodes = _best_time(naive, repeat)
+    results["naive_minimax"] = {"nodes": nodes, "seconds": seconds, "nodes_per_second": nodes / seconds}
+
+    nodes = _count_mask_nodes(0, 0, True)
+    seconds, _ = _best_time(lambda: minimax_masks(0, 0, True), repeat)
+    results["bitmask_minimax"] = {"nodes": nodes, "seconds": seconds, "nodes_per_second": nodes / seconds}
+
+    engine = NKEngine(NKGame(3, 3))
+    seconds, _ = _best_time(lambda: engine.best_move(0, 0), repeat)
+    nodes = engine.last_info["nodes"]
+    results["nk_engine_alphabeta"] = {"nodes": nodes, "seconds": seconds, "nodes_per_second": nodes / seconds}
+
+    lookups = [((x, o) if p == 'X' else (o, x)) for (x, o), p in positions.items()]
+    seconds, _ = _best_time(lambda: [ttt_solver.best_move_for_masks(own, opp) for own, opp in lookups], repeat)
+    results["solver_lookup"] = {"lookups": len(lookups), "seconds": seconds,
+                                "lookups_per_second": len(lookups) / seconds}
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """baseline より (1 + tolerance) 倍を超えて遅くなった項目のリストを返す"""
+    regressions = []
+    for name, entry in results["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if base and entry["seconds"] > base["seconds"] * (1 + tolerance):
+            regressions.append({"name": name, "baseline": base["seconds"], "current": entry["seconds"]})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="三目並べの全局面解析とベンチマーク")
+    parser.add_argument("--repeat", type=int, default=3, help="計測の繰り返し回数 (最速の値を使う)")
+    parser.add_argument("--output", help="結果の JSON の出力先 (省略時は標準出力)")
+    parser.add_argument("--baseline", help="比較対象の以前の結果 (JSON)")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="遅くなったとみなす割合 (既定: 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    positions = enumerate_positions()
+    counts = count_positions(positions)
+    mismatches = check_solver(positions)
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "counts": counts,
+        "counts_ok": counts == EXPECTED_COUNTS,
+        "solver_mismatches": len(mismatches),
+        "benchmarks": run_benchmarks(positions, args.repeat),
+    }
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            results["regressions"] = compare(results, json.load(f), args.tolerance)
+
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if not results["counts_ok"]:
+        print(f"局面数が既知の値と一致しません: {counts}", file=sys.stderr)
+    if mismatches:
+        print(f"全探索と食い違う局面があります: {mismatches[:5]}", file=sys.stderr)
+    for reg in results.get("regressions", []):
+        print(f"遅くなっています: {reg['name']} {reg['baseline']:.4f}s -> {reg['current']:.4f}s", file=sys.stderr)
+    return 1 if not results["counts_ok"] or mismatches or results.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
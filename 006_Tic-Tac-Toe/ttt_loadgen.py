@@ -0,0 +1,86 @@
+"""
+三目並べサーバ (ttt_server.py) の負荷テスト用クライアント
+
+たくさんの接続を同時に開き、それぞれがランダムな手で何局も対局して、1秒あたりの対局数を測る。
+コンピュータは完全解で打つので、プレイヤー (X) が1局でも勝ったら異常として終了コード 1 で終わる。
+
+使い方:
+    python ttt_loadgen.py --connections 1000 --games 10             (サーバに接続)
+    python ttt_loadgen.py --local --connections 1000 --games 10     (同じプロセスでサーバも起動)
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+from ttt_server import DEFAULT_HOST, DEFAULT_PORT, GameServer
+
+
+async def _request(reader, writer, command):
+    writer.write(command.encode("utf-8") + b"\n")
+    await writer.drain()
+    response = (await reader.readline()).decode("utf-8").split()
+    if not response or response[0] != "OK":
+        raise RuntimeError(f"{command}: {' '.join(response)}")
+    return response[2], response[3]  # (盤面, 状態)
+
+
+async def run_client(host, port, games, rng, results):
+    """1つの接続で games 局対局し、結果を results に数える"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(games):
+            board, status = await _request(reader, writer, f"NEW {rng.choice('XO')}")
+            while status == "PLAY":
+                position = rng.choice([i for i, cell in enumerate(board) if cell == "."])
+                board, status = await _request(reader, writer, f"MOVE {position}")
+            results[status] += 1
+        writer.write(b"QUIT\n")
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, connections, games, seed=0, local=False):
+    listener = None
+    if local:
+        listener = await GameServer().start(host, 0)
+        port = listener.sockets[0].getsockname()[1]
+    results = {"X": 0, "O": 0, "DRAW": 0}
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(run_client(host, port, games, random.Random(seed * 100003 + i), results)
+                               for i in range(connections)))
+    finally:
+        if listener is not None:
+            listener.close()
+            await listener.wait_closed()
+    return results, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="三目並べサーバの負荷テスト")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--connections", type=int, default=100, help="同時接続数")
+    parser.add_argument("--games", type=int, default=10, help="1接続あたりの対局数")
+    parser.add_argument("--seed", type=int, default=0, help="ランダムな手の乱数 seed")
+    parser.add_argument("--local", action="store_true", help="同じプロセスでサーバを起動して測る")
+    args = parser.parse_args(argv)
+
+    results, elapsed = asyncio.run(run_load(args.host, args.port, args.connections, args.games,
+                                            args.seed, args.local))
+    total = sum(results.values())
+    print(f"{args.connections} 接続 x {args.games} 局 = {total} 局, {elapsed:.2f} 秒, "
+          f"{total / elapsed if elapsed > 0 else 0:.1f} 局/秒")
+    print(f"プレイヤー (X) の勝ち {results['X']} / コンピュータ (O) の勝ち {results['O']} / "
+          f"引き分け {results['DRAW']}")
+    if results["X"]:
+        print("コンピュータが負けた対局があります", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
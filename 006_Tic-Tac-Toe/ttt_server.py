@@ -0,0 +1,155 @@
+"""
+三目並べの対局サーバ (asyncio)
+
+1行1コマンドのテキストプロトコルで、たくさんのクライアントが同時にコンピュータと対局できる。
+コンピュータの手は全セッションで共有する ttt_solver.py の完全解の表から引く。
+1局の状態はプレイヤー (X) とコンピュータ (O) の2つのビットマスクだけで持つ。
+
+プロトコル (クライアント -> サーバ):
+    NEW [X|O]     新しい対局を始める (X: プレイヤーが先手 / O: コンピュータが先手。既定は X)
+    MOVE <0-8>    プレイヤー (X) が打つ
+    QUIT          接続を終える
+応答 (サーバ -> クライアント):
+    OK <コンピュータの手 (打っていなければ -)> <盤面9文字 (X / O / .)> <状態 (PLAY / X / O / DRAW)>
+    ERR <理由>
+
+使い方:
+    python ttt_server.py --port 8765
+    python ttt_loadgen.py --port 8765 --connections 1000 --games 10
+"""
+import argparse
+import asyncio
+import time
+
+from tic_tac_toe import FULL_MASK, WINS
+from ttt_solver import best_move_for_masks
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+def status_of(x_mask, o_mask):
+    """対局の状態: 'X' / 'O' (勝ち), 'DRAW', 'PLAY' (続行中)"""
+    if WINS[x_mask]:
+        return "X"
+    if WINS[o_mask]:
+        return "O"
+    if x_mask | o_mask == FULL_MASK:
+        return "DRAW"
+    return "PLAY"
+
+
+def board_text(x_mask, o_mask):
+    return "".join("X" if x_mask >> i & 1 else "O" if o_mask >> i & 1 else "." for i in range(9))
+
+
+class ServerStats:
+    """サーバ全体の集計 (接続数・対局数)"""
+
+    def __init__(self):
+        self.connections = 0
+        self.active = 0
+        self.games_started = 0
+        self.games_finished = 0
+        self.started_at = time.perf_counter()
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started_at
+        return (f"接続 {self.connections} (同時 {self.active}), 対局開始 {self.games_started}, "
+                f"終局 {self.games_finished}, {self.games_finished / elapsed if elapsed > 0 else 0:.1f} 局/秒")
+
+
+class GameServer:
+    def __init__(self):
+        self.stats = ServerStats()
+
+    def handle_line(self, line, game):
+        """1行のコマンドを処理して (応答, 新しい対局状態) を返す。game は (X のマスク, O のマスク) か None"""
+        command, _, arg = line.strip().partition(" ")
+        command = command.upper()
+        if command == "NEW":
+            first = arg.strip().upper() or "X"
+            if first not in ("X", "O"):
+                return "ERR 先手は X か O で指定してください", game
+            self.stats.games_started += 1
+            x_mask = o_mask = 0
+            computer = "-"
+            if first == "O":
+                move = best_move_for_masks(o_mask, x_mask)
+                o_mask |= 1 << move
+                computer = str(move)
+            return f"OK {computer} {board_text(x_mask, o_mask)} PLAY", (x_mask, o_mask)
+        if command == "MOVE":
+            if game is None or status_of(*game) != "PLAY":
+                return "ERR 対局中ではありません (NEW で始めてください)", game
+            try:
+                position = int(arg)
+            except ValueError:
+                return "ERR 位置は 0 から 8 の数字で指定してください", game
+            x_mask, o_mask = game
+            if not 0 <= position <= 8 or (x_mask | o_mask) >> position & 1:
+                return "ERR その位置には置けません", game
+            x_mask |= 1 << position
+            computer = "-"
+            status = status_of(x_mask, o_mask)
+            if status == "PLAY":
+                move = best_move_for_masks(o_mask, x_mask)
+                o_mask |= 1 << move
+                computer = str(move)
+                status = status_of(x_mask, o_mask)
+            if status != "PLAY":
+                self.stats.games_finished += 1
+            return f"OK {computer} {board_text(x_mask, o_mask)} {status}", (x_mask, o_mask)
+        return f"ERR 不明なコマンドです: {command}", game
+
+    async def handle_client(self, reader, writer):
+        self.stats.connections += 1
+        self.stats.active += 1
+        game = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                text = line.decode("utf-8", "replace")
+                if text.strip().upper() == "QUIT":
+                    break
+                response, game = self.handle_line(text, game)
+                writer.write(response.encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.stats.active -= 1
+            writer.close()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """サーバを起動して asyncio.Server を返す (port に 0 を渡すと空いているポートを使う)"""
+        return await asyncio.start_server(self.handle_client, host, port, backlog=4096)
+
+
+async def serve(host, port, report_interval):
+    server = GameServer()
+    listener = await server.start(host, port)
+    address = listener.sockets[0].getsockname()
+    print(f"三目並べサーバを起動しました: {address[0]}:{address[1]}")
+    async with listener:
+        while True:
+            await asyncio.sleep(report_interval)
+            print(server.stats.summary())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="三目並べの対局サーバ")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--report", type=float, default=10.0, help="集計を表示する間隔 (秒)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.report))
+    except KeyboardInterrupt:
+        print("サーバを終了します。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+三目並べの完全解 (置換表による探索結果の使い回し)
+
+盤面を手番側から見た3進数 (空き: 0 / 手番側: 1 / 相手: 2) で符号化し、
+回転・反転の8通りの対称形のうち最小の番号を置換表のキーにして、局面の勝敗を1回だけ計算する。
+最善手は全ての局面の番号 (3^9 通り) を添え字にした bytearray に入れておくので、
+TicTacToe.computer_move はこの表を引くだけになる。
+
+最善手の選び方は tic_tac_toe.py の minimax と同じで、評価値 (勝ち 1 / 引き分け 0 / 負け -1) が
+最大の手のうち、番号が最も小さい手を選ぶ。
+"""
+
+CELLS = 9
+EMPTY, MOVER, OPPONENT = 0, 1, 2
+POWERS = tuple(3 ** i for i in range(CELLS))
+NO_MOVE = 0xFF
+
+WINNING_COMBINATIONS = (
+    (0, 1, 2), (3, 4, 5), (6, 7, 8),  # 横
+    (0, 3, 6), (1, 4, 7), (2, 5, 8),  # 縦
+    (0, 4, 8), (2, 4, 6)              # 斜め
+)
+
+
+def _build_symmetries():
+    """8通りの対称変換を、変換後のマス i に元のどのマスが来るかの並びで作る"""
+    rotate = tuple(3 * (2 - i % 3) + i // 3 for i in range(CELLS))  # 90度回転
+    mirror = tuple(3 * (i // 3) + 2 - i % 3 for i in range(CELLS))  # 左右反転
+    symmetries = []
+    perm = tuple(range(CELLS))
+    for _ in range(4):
+        symmetries.append(perm)
+        symmetries.append(tuple(perm[j] for j in mirror))
+        perm = tuple(perm[j] for j in rotate)
+    return tuple(symmetries)
+
+
+SYMMETRIES = _build_symmetries()
+
+
+# --- 符号化 ---
+def encode(board, player):
+    """TicTacToe.board (' ' / 'X' / 'O' のリスト) を player から見た番号にする"""
+    code = 0
+    for i, cell in enumerate(board):
+        if cell == player:
+            code += POWERS[i]
+        elif cell != ' ':
+            code += 2 * POWERS[i]
+    return code
+
+
+# TERNARY[mask]: ビットマスクの立っているマスを 1 にした3進数 (手番側 + 2 * 相手 で番号になる)
+TERNARY = tuple(sum(POWERS[i] for i in range(CELLS) if mask >> i & 1) for mask in range(1 << CELLS))
+
+
+def encode_masks(own, opp):
+    """手番側 / 相手のビットマスク (マス番号 i がビット i) から番号を求める"""
+    return TERNARY[own] + 2 * TERNARY[opp]
+
+
+def digits(code):
+    """番号を各マスの状態 (0 / 1 / 2) のリストに戻す"""
+    cells = []
+    for _ in range(CELLS):
+        code, cell = divmod(code, 3)
+        cells.append(cell)
+    return cells
+
+
+def canonical(code):
+    """対称な8局面の番号のうち最小のもの"""
+    cells = digits(code)
+    return min(sum(POWERS[i] * cells[perm[i]] for i in range(CELLS)) for perm in SYMMETRIES)
+
+
+def _has_line(cells, who):
+    return any(cells[a] == who and cells[b] == who and cells[c] == who
+               for a, b, c in WINNING_COMBINATIONS)
+
+
+def _child(cells, position):
+    """手番側が position に打った後の番号 (次の手番側から見た番号なので、1 と 2 を入れ替える)"""
+    code = 2 * POWERS[position]
+    for i, cell in enumerate(cells):
+        if cell:
+            code += (3 - cell) * POWERS[i]
+    return code
+
+
+# --- 探索 ---
+_values = {}  # { 対称形をまとめた番号: 手番側から見た評価値 }
+_code_values = {}  # { 番号: 評価値 } (同じ番号で対称形を何度も求めないためのキャッシュ)
+_best_moves = bytearray([NO_MOVE]) * 3 ** CELLS  # { 番号: 最善手 } (NO_MOVE は未計算か打てる手がない)
+
+
+def solve(code):
+    """手番側から見た局面の評価値 (勝ち 1 / 引き分け 0 / 負け -1)"""
+    value = _code_values.get(code)
+    if value is not None:
+        return value
+    key = canonical(code)
+    value = _values.get(key)
+    if value is not None:
+        _code_values[code] = value
+        return value
+    cells = digits(code)
+    if _has_line(cells, OPPONENT):
+        value = -1  # 直前に相手が揃えた
+    elif EMPTY not in cells:
+        value = 0
+    else:
+        value = max(-solve(_child(cells, i)) for i in range(CELLS) if cells[i] == EMPTY)
+    _values[key] = _code_values[code] = value
+    return value
+
+
+def best_move_for_code(code):
+    """手番側から見た番号 code の最善手 (打てる手がなければ None)"""
+    move = _best_moves[code]
+    if move != NO_MOVE:
+        return move
+    cells = digits(code)
+    if _has_line(cells, OPPONENT):
+        return None
+    best_score = -2
+    for i in range(CELLS):
+        if cells[i] == EMPTY:
+            score = -solve(_child(cells, i))
+            if score > best_score:
+                best_score = score
+                move = i
+    if move == NO_MOVE:
+        return None
+    _best_moves[code] = move
+    return move
+
+
+def best_move(board, player):
+    """TicTacToe.board の局面で player が打つべき位置 (0-8)。打てる手がなければ None"""
+    return best_move_for_code(encode(board, player))
+
+
+def best_move_for_masks(own, opp):
+    """手番側 own / 相手 opp のビットマスクの局面の最善手 (0-8)。打てる手がなければ None"""
+    return best_move_for_code(TERNARY[own] + 2 * TERNARY[opp])
+
+
+def build_table():
+    """初期局面から到達できる全ての局面の最善手を計算しておき、計算した局面数を返す"""
+    seen = set()
+    stack = [0]
+    while stack:
+        code = stack.pop()
+        if code in seen:
+            continue
+        seen.add(code)
+        if best_move_for_code(code) is None:
+            continue
+        cells = digits(code)
+        stack.extend(_child(cells, i) for i in range(CELLS) if cells[i] == EMPTY)
+    return len(seen)
+
+
+build_table()  # 表は小さい (数千局面) ので、読み込み時に作っておく